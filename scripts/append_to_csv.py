@@ -1,6 +1,22 @@
+from __future__ import annotations
+
 import csv
 import os
+import gzip
+import json
+import hashlib
+import argparse
 import logging
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+import dataset_writer
+import text_dedup
+from lazy_import import lazy_import
+
+# Imported on first use, see lazy_import.py
+np = lazy_import('numpy')
 
 # --- Set up correct paths ---
 # This finds the script's own directory
@@ -10,6 +26,8 @@ BASE_DIR = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
 
 METADATA_FILE = os.path.join(BASE_DIR, "metadata.csv")
 SOURCE_TEXT_FILE = "kirundi_prompts_scraped.txt"
+# Record of the source files already imported (replaces truncating them)
+IMPORT_LEDGER = os.path.join(BASE_DIR, ".cache", "import_ledger.json")
 # ----------------------------
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -25,101 +43,333 @@ TARGET_COLUMN = "kirundi_transcription"
 # Examples: "proverbs", "jokes", "grammar", "lessons", etc.
 DOMAIN = "proverbs"  # Change this value based on what you're importing
 
-def append_from_txt_to_csv(domain=None):
-    """Append new sentences from text file to CSV with specified domain.
+# --- NEAR-DUPLICATE GATE ---
+# Also skip sentences that nearly match an existing one (a word or a suffix
+# apart), by MinHash similarity. None disables the gate; 0.8 is a good start
+NEAR_DUPLICATE_THRESHOLD = None
+
+# --- BULK IMPORT ---
+# Sentences are read, deduplicated and written this many at a time, so a
+# large scraped corpus never has to fit in memory
+IMPORT_BATCH_SIZE = 10000
+WRITE_BUFFER_SIZE = 1 << 20  # 1 MB of CSV text buffered between writes
+
+# Keys checked (in order) for the sentence in a .jsonl record
+JSONL_TEXT_KEYS = ("text", "sentence", "Kirundi_Transcription", TARGET_COLUMN)
+
+def open_source(path):
+    """Open a source file as text, transparently decompressing .gz files."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def iter_source_sentences(path, domain, source=''):
+    """Yield (sentence, domain, source) for every sentence of a source file.
     
-    Args:
-        domain: The domain/category for the new entries (e.g., 'proverbs', 'jokes').
-                If None, uses the DOMAIN variable defined at module level.
+    Supported formats (optionally gzip-compressed, e.g. corpus.jsonl.gz):
+    - .txt: one sentence per line
+    - .jsonl: one JSON object per line, with the sentence under one of
+      JSONL_TEXT_KEYS and optional "domain" / "source" fields that
+      override the file's defaults
     """
-    # Use provided domain or fall back to module-level DOMAIN
-    if domain is None:
-        domain = DOMAIN
+    is_jsonl = str(path).removesuffix('.gz').endswith('.jsonl')
     
-    if not os.path.exists(METADATA_FILE):
-        logger.error(f"Error: Master file not found at: '{METADATA_FILE}'")
-        return
-        
-    if not os.path.exists(SOURCE_TEXT_FILE):
-        logger.error(f"Error: Source file not found at: '{SOURCE_TEXT_FILE}'")
-        logger.error(f"Please run 'STEP_1_scrape_and_clean.py' first.")
-        return
-
-    existing_sentences = set()
-    transcription_index = -1
-    
-    try:
-        # --- THIS IS THE FIX ---
-        # Use encoding='utf-8-sig' to automatically handle
-        # invisible BOM characters at the start of the file.
-        with open(METADATA_FILE, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
+    with open_source(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
             
-            try:
-                header = next(reader) # Read the header row
-            except StopIteration:
-                logger.error(f"Error: The file {METADATA_FILE} is empty.")
-                return
-
-            # Clean up header names (remove whitespace, make lowercase)
-            cleaned_header = [h.strip().lower() for h in header]
+            if not is_jsonl:
+                yield line, domain, source
+                continue
             
-            # Find the index of our target column
             try:
-                transcription_index = cleaned_header.index(TARGET_COLUMN)
+                record = json.loads(line)
             except ValueError:
-                logger.error(f"Error: Could not find '{TARGET_COLUMN}' column in {METADATA_FILE}.")
-                logger.error(f"--> Headers found in file: {header}")
-                logger.error(f"--> Cleaned headers (what script searched for): {cleaned_header}")
-                return
-
-            # Add all existing sentences to a set
-            for row in reader:
-                if row and len(row) > transcription_index and row[transcription_index]:
-                    existing_sentences.add(row[transcription_index])
-            
-        logger.info(f"Loaded {len(existing_sentences)} existing sentences from {METADATA_FILE}.")
+                logger.warning(f"Skipping invalid JSON at {path}:{line_number}")
+                continue
+            sentence = next((record[k] for k in JSONL_TEXT_KEYS if record.get(k)), None)
+            if not isinstance(sentence, str) or not sentence.strip():
+                logger.warning(f"Skipping record without text at {path}:{line_number}")
+                continue
+            yield (sentence.strip(), record.get('domain') or domain,
+                   record.get('source') or source)
+
+def iter_batches(iterable, size):
+    """Split an iterable into lists of at most size items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def filter_duplicates(batches, dedup_index, seen_keys, stats):
+    """Drop sentences already in metadata.csv or seen earlier in this import.
     
-    except Exception as e:
-        logger.error(f"Could not read {METADATA_FILE}: {e}")
-        return
+    Yields each batch as a list of (sentence, domain, source, key); the
+    keys of kept sentences are added to seen_keys.
+    """
+    for batch in batches:
+        keys = text_dedup.sentence_keys(sentence for sentence, _, _ in batch)
+        already_present = text_dedup.contains(dedup_index, keys)
+        kept = []
+        for (sentence, domain, source), key, present in zip(batch, keys.tolist(), already_present):
+            if present or key in seen_keys:
+                logger.debug(f"Skipping duplicate: {sentence}")
+                continue
+            seen_keys.add(key)
+            kept.append((sentence, domain, source, key))
+        stats['read'] += len(batch)
+        stats['duplicates'] += len(batch) - len(kept)
+        yield kept
+
+def filter_near_duplicates(batches, near_index, stats):
+    """Drop sentences nearly matching metadata.csv or a sentence kept
+    earlier in this import (any batch).
+    
+    Kept sentences are added to near_index, so later batches are checked
+    against them too.
+    """
+    for batch in batches:
+        if batch:
+            near = near_index.add(text_dedup.minhash_signatures(
+                [sentence for sentence, _, _, _ in batch]))
+            for (sentence, _, _, _), skip in zip(batch, near):
+                if skip:
+                    logger.info(f"Skipping near-duplicate: {sentence}")
+            batch = [row for row, skip in zip(batch, near) if not skip]
+            stats['near_duplicates'] += int(near.sum())
+        yield batch
+
+def file_digest(path):
+    """Content hash of a source file, read in chunks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # --- Step 3: Read all sentences from your CLEANED text file ---
-    new_sentences_to_add = []
+def load_import_ledger():
+    """Load the record of imported source files (empty if none)."""
+    if not os.path.exists(IMPORT_LEDGER):
+        return {}
     try:
-        with open(SOURCE_TEXT_FILE, 'r', encoding='utf-8') as f:
-            for line in f:
-                sentence = line.strip()
-                if sentence and sentence not in existing_sentences:
-                    new_sentences_to_add.append(sentence)
-                    existing_sentences.add(sentence) 
-        
-        if not new_sentences_to_add:
-            logger.info("No new sentences found in the text file. Your CSV is already up to date!")
-            return
-        logger.info(f"Found {len(new_sentences_to_add)} new sentences from {SOURCE_TEXT_FILE} to add.")
+        with open(IMPORT_LEDGER, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable import ledger {IMPORT_LEDGER}: {e}")
+        return {}
 
-    except Exception as e:
-        logger.error(f"Could not read {SOURCE_TEXT_FILE}: {e}")
-        return
+def save_import_ledger(ledger):
+    """Write the import ledger atomically (temp file + rename)."""
+    os.makedirs(os.path.dirname(IMPORT_LEDGER), exist_ok=True)
+    tmp_path = IMPORT_LEDGER + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(ledger, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, IMPORT_LEDGER)
+
+def import_sources(sources, near_duplicate_threshold=None, force=False):
+    """Stream sentences from many source files into metadata.csv.
+    
+    Sentences flow through a generator pipeline (read -> dedup ->
+    near-duplicate gate -> write) in batches of IMPORT_BATCH_SIZE, so
+    memory stays bounded whatever the size of the inputs. Rows go through
+    a buffered writer and are fsynced once at the end.
+    
+    Source files are left untouched: each imported file is recorded with
+    its content hash in IMPORT_LEDGER and skipped on later runs until its
+    content changes.
+    
+    Args:
+        sources: List of (path, domain, source) tuples; source fills the
+                 Source column and may be ''.
+        near_duplicate_threshold: Skip sentences at least this similar to an
+                 existing one, or to one imported earlier in this run (0-1).
+                 If None, uses NEAR_DUPLICATE_THRESHOLD.
+        force: Import files even if the ledger says they were imported.
+    
+    Returns:
+        Number of rows added
+    """
+    if near_duplicate_threshold is None:
+        near_duplicate_threshold = NEAR_DUPLICATE_THRESHOLD
+    
+    if not os.path.exists(METADATA_FILE):
+        logger.error(f"Error: Master file not found at: '{METADATA_FILE}'")
+        return 0
+
+    # --- Step 1: Pick the source files that still need importing ---
+    ledger = load_import_ledger()
+    pending = []
+    for path, domain, source in sources:
+        if not os.path.exists(path):
+            logger.error(f"Error: Source file not found at: '{path}'")
+            continue
+        digest = file_digest(path)
+        entry = ledger.get(os.path.abspath(path))
+        if entry and entry.get('hash') == digest and not force:
+            logger.info(f"Already imported on {entry['imported_at']}: {path} (use --force to re-import)")
+            continue
+        pending.append((path, domain, source, digest))
+    
+    if not pending:
+        logger.info("No new source files to import.")
+        return 0
 
-    # --- Step 4: Append (add) the new sentences to your CSV ---
+    stats = {'read': 0, 'duplicates': 0, 'near_duplicates': 0}
+    rows_per_file = {path: 0 for path, _, _, _ in pending}
+    
+    def tagged_sentences():
+        # The file path travels with the source so rows can be counted per file
+        for path, domain, source, _ in pending:
+            logger.info(f"Reading {path} (domain '{domain}')")
+            for sentence, row_domain, row_source in iter_source_sentences(path, domain, source):
+                yield sentence, row_domain, (row_source, path)
+    
+    # Steps 2-4 run under the lock of metadata.csv (see dataset_writer.py),
+    # so two imports never add the same sentence or lose each other's keys.
+    # If the import fails or is killed, the appended rows are rolled back
     try:
-        with open(METADATA_FILE, 'a', newline='', encoding='utf-8') as f:
+        with dataset_writer.locked_append(METADATA_FILE, newline='', encoding='utf-8',
+                                          buffering=WRITE_BUFFER_SIZE) as f:
+            # --- Step 2: Load the dedup index of existing sentences ---
+            # Sentences are compared by a hash of their normalized form (see
+            # text_dedup.py), so a copy with different tone marks, spacing or
+            # punctuation counts as a duplicate too
+            dedup_index = text_dedup.load_index(METADATA_FILE)
+            logger.info(f"Loaded dedup index of {len(dedup_index)} existing sentences from {METADATA_FILE}.")
+            near_index = None
+            if near_duplicate_threshold:
+                near_index = text_dedup.NearDuplicateIndex(
+                    text_dedup.minhash_signatures(text_dedup.read_transcriptions(METADATA_FILE)),
+                    near_duplicate_threshold)
+            
+            # --- Step 3: Build the streaming pipeline ---
+            seen_keys = set()
+            batches = filter_duplicates(iter_batches(tagged_sentences(), IMPORT_BATCH_SIZE),
+                                        dedup_index, seen_keys, stats)
+            if near_duplicate_threshold:
+                batches = filter_near_duplicates(batches, near_index, stats)
+            
+            # --- Step 4: Append (add) the new sentences to your CSV ---
+            new_keys = []
             writer = csv.writer(f)
-            for sentence in new_sentences_to_add:
+            for batch in batches:
                 # Row format matching metadata.csv structure (12 columns):
                 # [File_Path, Kirundi_Transcription, French_Translation, English_Translation, 
                 #  Domain, Machine_Suggestion, Source, Duration, Speaker_id, Age, Gender, Kirundi_Length]
-                writer.writerow(['', sentence, '', '', domain, '', '', '', '', '', '', ''])
-        
-        logger.info(f"✅ Successfully added {len(new_sentences_to_add)} new sentences to {METADATA_FILE} with domain '{domain}'!")
+                writer.writerows(['', sentence, '', '', domain, '', source, '', '', '', '', '']
+                                 for sentence, domain, (source, _), _ in batch)
+                new_keys.append(np.array([key for _, _, _, key in batch], dtype=np.uint64))
+                for _, _, (_, path), _ in batch:
+                    rows_per_file[path] += 1
+            
+            # Record the new keys, stamped with the CSV we just appended to.
+            # locked_append() fsyncs the rows once when the block ends
+            f.flush()
+            added = sum(rows_per_file.values())
+            if added:
+                text_dedup.add_to_index(METADATA_FILE, dedup_index, np.concatenate(new_keys))
 
+    except ValueError as e:
+        logger.error(f"Error: {e}")
+        return 0
     except Exception as e:
         logger.error(f"Failed to write to {METADATA_FILE}: {e}")
         logger.error("Please make sure the file is not open in Excel.")
+        return 0
+    
+    if stats['duplicates']:
+        logger.info(f"Skipped {stats['duplicates']} sentences already in {METADATA_FILE} (after normalization).")
+    if stats['near_duplicates']:
+        logger.info(f"Skipped {stats['near_duplicates']} near-duplicates (similarity >= {near_duplicate_threshold}).")
+    
+    # Record the consumed inputs instead of truncating them (re-read under
+    # a lock, so entries written by a concurrent import are kept)
+    imported_at = datetime.now().isoformat(timespec='seconds')
+    with dataset_writer.file_lock(Path(IMPORT_LEDGER + ".lock")):
+        ledger = load_import_ledger()
+        for path, domain, source, digest in pending:
+            ledger[os.path.abspath(path)] = {
+                'hash': digest,
+                'domain': domain,
+                'source': source,
+                'rows_added': rows_per_file[path],
+                'imported_at': imported_at
+            }
+        save_import_ledger(ledger)
+    
+    if added:
+        logger.info(f"✅ Successfully added {added} new sentences to {METADATA_FILE} "
+                    f"(read {stats['read']} from {len(pending)} files)!")
+    else:
+        logger.info("No new sentences found in the source files. Your CSV is already up to date!")
+    return added
+
+def append_from_txt_to_csv(domain=None, near_duplicate_threshold=None):
+    """Append new sentences from text file to CSV with specified domain.
+    
+    Args:
+        domain: The domain/category for the new entries (e.g., 'proverbs', 'jokes').
+                If None, uses the DOMAIN variable defined at module level.
+        near_duplicate_threshold: Skip sentences at least this similar to an
+                existing one (0-1). If None, uses NEAR_DUPLICATE_THRESHOLD.
+    """
+    # Use provided domain or fall back to module-level DOMAIN
+    if domain is None:
+        domain = DOMAIN
+        
+    if not os.path.exists(SOURCE_TEXT_FILE):
+        logger.error(f"Error: Source file not found at: '{SOURCE_TEXT_FILE}'")
+        logger.error(f"Please run 'STEP_1_scrape_and_clean.py' first.")
+        return
+    
+    import_sources([(SOURCE_TEXT_FILE, domain, '')], near_duplicate_threshold)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Append new Kirundi sentences to metadata.csv without duplicates',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Default: import kirundi_prompts_scraped.txt with DOMAIN
+  python append_to_csv.py
+
+  # Several files, each with its own domain (and optional source)
+  python append_to_csv.py --input proverbs.txt proverbs --input news.jsonl.gz news "Iwacu"
+
+  # Same domain for every file
+  python append_to_csv.py corpus/*.txt.gz --domain lessons
+        """
+    )
+    parser.add_argument('files', nargs='*', help='Source files (.txt, .jsonl, optionally .gz)')
+    parser.add_argument('--input', nargs='+', action='append', default=[], metavar='ARG',
+                        help='FILE [DOMAIN [SOURCE]]: a source file with its own domain and source')
+    parser.add_argument('--domain', default=DOMAIN,
+                        help=f'Domain for positional files (default: {DOMAIN})')
+    parser.add_argument('--source', default='', help='Source column for positional files')
+    parser.add_argument('--near-duplicates', type=float, metavar='THRESHOLD',
+                        help='Also skip near-duplicates at this similarity (e.g. 0.8)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-import files already recorded in the import ledger')
+    args = parser.parse_args()
+    
+    sources = [(path, args.domain, args.source) for path in args.files]
+    for spec in args.input:
+        if len(spec) > 3:
+            parser.error(f"--input takes FILE [DOMAIN [SOURCE]], got {spec}")
+        path, domain, source = (spec + [args.domain, args.source][len(spec) - 1:])[:3]
+        sources.append((path, domain, source))
+    
+    if not sources:
+        append_from_txt_to_csv(near_duplicate_threshold=args.near_duplicates)
+        return
+    
+    import_sources(sources, args.near_duplicates, args.force)
 
 if __name__ == "__main__":
-    append_from_txt_to_csv()
-    with open("kirundi_prompts_scraped.txt", "w", encoding="utf-8") as f:
-        f.write("")
\ No newline at end of file
+    main()
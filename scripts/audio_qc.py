@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Audio Quality Control for Kirundi Dataset
+=========================================
+
+Measures every recorded clip so reviewers can start with the ones most
+likely to need re-recording instead of listening to everything:
+
+- rms_db: overall level (dBFS)
+- clipping: share of samples at full scale
+- snr_db: loud frames (90th percentile) vs. quiet frames (10th percentile)
+- speech_ratio: share of 25ms frames within 30dB of the loudest frame
+- chars_per_second: letters of Kirundi_Transcription per second of speech
+- cut off: speech in the very first or last frame
+- header problems (sample rate, channels, bit depth)
+
+Clips are measured in batches: the samples of many clips are concatenated
+and framed together, and every metric is one NumPy reduction over the
+batch (reduceat per clip), not a Python loop per clip.
+
+Results are stored in .cache/audio_qc.sqlite, keyed by sentence ID and
+the clip's size + mtime, so unchanged clips are not measured again. Clips
+failing a threshold get flags; --reject-flagged marks flagged 'recorded'
+rows as 'rejected' (through the journaled status writes).
+
+Usage:
+    python audio_qc.py                      # Measure recorded clips, list flagged ones
+    python audio_qc.py --status recorded validated
+    python audio_qc.py --report qc.csv      # Every metric, flagged clips first
+    python audio_qc.py --reject-flagged --dry-run   # Preview auto-rejections
+    python audio_qc.py --reject-flagged
+
+Dependencies:
+    pip install numpy
+    pip install librosa   # optional, for clips that are not 16kHz PCM WAV
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import time
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+
+import update_audio_status as status_tool
+from export_shards import load_rows
+from lazy_import import lazy_import
+
+# Imported on first use, see lazy_import.py
+np = lazy_import('numpy')
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+QC_CACHE_PATH = BASE_DIR / ".cache" / "audio_qc.sqlite"
+QC_CACHE_VERSION = 1  # Bump when the metrics or their layout change
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.025
+SPEECH_THRESHOLD_DB = -30  # Relative to the loudest frame, as process_audio's trim
+SILENCE_FLOOR_DB = -60  # Frames below this are never speech
+CLIPPING_LEVEL = 0.999  # |sample| at or above this counts as clipped
+BATCH_SECONDS = 600  # Audio measured per batch (bounds memory)
+QC_STATUSES = ('recorded',)
+
+# Thresholds that flag a clip
+MAX_CLIPPING = 0.001
+MIN_RMS_DB = -40.0
+MIN_SNR_DB = 15.0
+MIN_SPEECH_RATIO = 0.3
+CHARS_PER_SECOND_RANGE = (4.0, 25.0)
+MIN_SECONDS = 0.5
+
+# Flags that say nothing about the recording itself, never auto-rejected
+NOT_MEASURED = ('missing clip', 'unreadable')
+
+METRICS = ('duration', 'rms_db', 'clipping', 'snr_db', 'speech_ratio',
+           'speech_seconds', 'chars_per_second')
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def open_qc_cache(cache_path: Path = QC_CACHE_PATH) -> sqlite3.Connection:
+    """Open (and create if needed) the QC results table."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(cache_path))
+    
+    if conn.execute("PRAGMA user_version").fetchone()[0] != QC_CACHE_VERSION:
+        conn.execute("DROP TABLE IF EXISTS qc")
+        conn.execute(f"PRAGMA user_version = {QC_CACHE_VERSION}")
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS qc (
+            sentence_id      TEXT PRIMARY KEY,
+            rel_path         TEXT NOT NULL,
+            size             INTEGER NOT NULL,
+            mtime_ns         INTEGER NOT NULL,
+            text_chars       INTEGER NOT NULL,
+            duration         REAL,
+            rms_db           REAL,
+            clipping         REAL,
+            snr_db           REAL,
+            speech_ratio     REAL,
+            speech_seconds   REAL,
+            chars_per_second REAL,
+            flags            TEXT NOT NULL,
+            checked_at       REAL NOT NULL
+        )
+    """)
+    return conn
+
+
+def text_chars(text: str) -> int:
+    """Letters in a transcription (spaces and punctuation are not spoken)."""
+    return sum(ch.isalpha() for ch in text)
+
+
+def load_clip(audio_path: Path) -> tuple:
+    """
+    Read a clip as float32 samples at SAMPLE_RATE.
+    
+    16kHz mono PCM WAV clips are read straight from their data chunk;
+    anything else is decoded (and resampled) with librosa.
+    
+    Returns:
+        (samples, header problems)
+    """
+    header = None
+    if audio_path.suffix.lower() == '.wav':
+        header = status_tool.read_wav_header(str(audio_path))
+    anomalies = status_tool.find_header_anomalies(header) if header else []
+    
+    if header is not None and not anomalies:
+        samples = np.fromfile(audio_path, dtype='<i2', count=header['data_size'] // 2,
+                              offset=header['data_offset'])
+        return samples.astype(np.float32) / 32768.0, anomalies
+    
+    librosa = lazy_import('librosa')
+    samples, _ = librosa.load(str(audio_path), sr=SAMPLE_RATE, mono=True)
+    return samples.astype(np.float32), anomalies
+
+
+def batch_metrics(clips: list, sr: int = SAMPLE_RATE) -> dict:
+    """
+    Compute the QC metrics of many clips at once.
+    
+    Args:
+        clips: float32 sample arrays, each at least one frame long
+        sr: Sample rate of every clip
+    
+    Returns:
+        Dictionary of metric name -> array with one value per clip, plus
+        'cut_off' (bool array)
+    """
+    frame = int(FRAME_SECONDS * sr)
+    lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    audio = np.concatenate(clips)
+    
+    # Whole-clip level and clipping: one reduceat per metric
+    squares = np.square(audio, dtype=np.float64)
+    rms = np.sqrt(np.add.reduceat(squares, starts) / lengths)
+    clipped = np.add.reduceat((np.abs(audio) >= CLIPPING_LEVEL).astype(np.int32), starts)
+    
+    # Non-overlapping frames of every clip, through one cumulative sum
+    n_frames = lengths // frame
+    frame_starts = np.concatenate([[0], np.cumsum(n_frames)[:-1]])
+    clip_of_frame = np.repeat(np.arange(len(clips)), n_frames)
+    frame_in_clip = np.arange(n_frames.sum()) - np.repeat(frame_starts, n_frames)
+    offsets = np.repeat(starts, n_frames) + frame_in_clip * frame
+    cumulative = np.concatenate([[0.0], np.cumsum(squares)])
+    power = (cumulative[offsets + frame] - cumulative[offsets]) / frame
+    frame_db = 10 * np.log10(np.maximum(power, 1e-10))
+    
+    loudest = np.maximum.reduceat(frame_db, frame_starts)
+    speech = ((frame_db > np.repeat(loudest, n_frames) + SPEECH_THRESHOLD_DB)
+              & (frame_db > SILENCE_FLOOR_DB))
+    speech_frames = np.add.reduceat(speech.astype(np.int32), frame_starts)
+    
+    # Per-clip percentiles: sort frames by (clip, level) once
+    order = np.lexsort((frame_db, clip_of_frame))
+    sorted_db = frame_db[order]
+    noise_db = sorted_db[frame_starts + ((n_frames - 1) * 0.1).astype(np.int64)]
+    loud_db = sorted_db[frame_starts + ((n_frames - 1) * 0.9).astype(np.int64)]
+    
+    last_frames = frame_starts + n_frames - 1
+    return {
+        'duration': lengths / sr,
+        'rms_db': 20 * np.log10(np.maximum(rms, 1e-5)),
+        'clipping': clipped / lengths,
+        'snr_db': loud_db - noise_db,
+        'speech_ratio': speech_frames / n_frames,
+        'speech_seconds': speech_frames * frame / sr,
+        'cut_off': speech[frame_starts] | speech[last_frames],
+    }
+
+
+def find_flags(metrics: dict, chars: int, anomalies: list) -> list:
+    """Threshold checks of one clip's metrics; empty if the clip looks fine."""
+    flags = list(anomalies)
+    if metrics['duration'] < MIN_SECONDS:
+        flags.append('too short')
+        return flags
+    if metrics['clipping'] > MAX_CLIPPING:
+        flags.append('clipping')
+    if metrics['rms_db'] < MIN_RMS_DB:
+        flags.append('too quiet')
+    if metrics['snr_db'] < MIN_SNR_DB:
+        flags.append('low SNR')
+    if metrics['speech_ratio'] < MIN_SPEECH_RATIO:
+        flags.append('mostly silence')
+    if metrics.get('cut_off'):
+        flags.append('cut off')
+    cps = metrics['chars_per_second']
+    if chars and cps is not None:
+        if cps < CHARS_PER_SECOND_RANGE[0]:
+            flags.append('too slow for its text')
+        elif cps > CHARS_PER_SECOND_RANGE[1]:
+            flags.append('too fast for its text')
+    return flags
+
+
+def _measure_batch(batch: list) -> list:
+    """Metrics and flags of a batch of (row, stat, samples, anomalies)."""
+    results = []
+    long_enough = [item for item in batch if len(item[2]) >= int(FRAME_SECONDS * SAMPLE_RATE)]
+    metrics = batch_metrics([item[2] for item in long_enough]) if long_enough else {}
+    
+    measured = {id(item): i for i, item in enumerate(long_enough)}
+    for item in batch:
+        row, stat, samples, anomalies = item
+        chars = text_chars(row.get('Kirundi_Transcription', ''))
+        if id(item) in measured:
+            i = measured[id(item)]
+            values = {name: float(metrics[name][i]) for name in METRICS if name in metrics}
+            values['cut_off'] = bool(metrics['cut_off'][i])
+        else:
+            values = {name: None for name in METRICS}
+            values['duration'] = len(samples) / SAMPLE_RATE
+            values['cut_off'] = False
+        speech_seconds = values.get('speech_seconds')
+        values['chars_per_second'] = chars / speech_seconds if speech_seconds else None
+        if values['speech_ratio'] is None:
+            flags = list(anomalies) + ['too short']
+        else:
+            flags = find_flags(values, chars, anomalies)
+        results.append((row, stat, chars, values, flags))
+    return results
+
+
+def run_qc(statuses: tuple = QC_STATUSES, use_cache: bool = True) -> list:
+    """
+    Measure the clips of every row with one of statuses.
+    
+    Args:
+        statuses: Audio_Status values whose clips are checked
+        use_cache: Reuse stored results of unchanged clips
+    
+    Returns:
+        List of result dictionaries (ID, path, status, metrics, flags)
+    """
+    conn = open_qc_cache()
+    check_time = time.time()
+    results = []
+    pending = []
+    pending_seconds = 0.0
+    
+    def flush():
+        for row, stat, chars, values, flags in _measure_batch(pending):
+            conn.execute(
+                "INSERT OR REPLACE INTO qc VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (row['ID'], row['File_Path'], stat.st_size, stat.st_mtime_ns, chars,
+                 *(values[name] for name in METRICS), json.dumps(flags), check_time))
+            results.append(_result(row, values, flags))
+        pending.clear()
+    
+    try:
+        for row in load_rows(statuses):
+            if not row.get('File_Path'):
+                continue
+            audio_path = BASE_DIR / row['File_Path']
+            try:
+                stat = audio_path.stat()
+            except OSError:
+                results.append(_result(row, {}, ['missing clip']))
+                continue
+            
+            chars = text_chars(row.get('Kirundi_Transcription', ''))
+            cached = conn.execute(
+                f"SELECT {', '.join(METRICS)}, flags FROM qc WHERE sentence_id = ? AND "
+                "rel_path = ? AND size = ? AND mtime_ns = ? AND text_chars = ?",
+                (row['ID'], row['File_Path'], stat.st_size, stat.st_mtime_ns, chars)
+            ).fetchone() if use_cache else None
+            if cached is not None:
+                results.append(_result(row, dict(zip(METRICS, cached)), json.loads(cached[-1])))
+                continue
+            
+            try:
+                samples, anomalies = load_clip(audio_path)
+            except Exception as e:
+                logger.warning(f"⚠️  Could not read {row['File_Path']}: {e}")
+                results.append(_result(row, {}, ['unreadable']))
+                continue
+            
+            pending.append((row, stat, samples, anomalies))
+            pending_seconds += len(samples) / SAMPLE_RATE
+            if pending_seconds >= BATCH_SECONDS:
+                flush()
+                pending_seconds = 0.0
+        
+        if pending:
+            flush()
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return results
+
+
+def _result(row: dict, values: dict, flags: list) -> dict:
+    return {
+        'ID': row['ID'],
+        'File_Path': row['File_Path'],
+        'Audio_Status': row['Audio_Status'],
+        **{name: values.get(name) for name in METRICS},
+        'flags': flags,
+    }
+
+
+def write_report(results: list, report_path: str):
+    """Write every result as CSV, flagged clips first."""
+    ordered = sorted(results, key=lambda r: (-len(r['flags']), r['ID']))
+    with open(report_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ID', 'File_Path', 'Audio_Status', *METRICS, 'flags'])
+        for result in ordered:
+            writer.writerow([result['ID'], result['File_Path'], result['Audio_Status'],
+                             *('' if result[name] is None else round(result[name], 4)
+                               for name in METRICS),
+                             '; '.join(result['flags'])])
+
+
+def reject_flagged(results: list, dry_run: bool = False) -> dict:
+    """Mark flagged clips that are still 'recorded' as 'rejected'."""
+    decisions = [(result['ID'], 'rejected') for result in results
+                 if result['Audio_Status'] == 'recorded'
+                 and set(result['flags']) - set(NOT_MEASURED)]
+    if not decisions:
+        logger.info("No flagged recordings to reject")
+        return {'updated': 0, 'unknown': [], 'invalid': []}
+    
+    id_to_location = status_tool.index_split_rows(status_tool.read_split_rows())
+    return status_tool.review_batch(decisions, id_to_location, dry_run=dry_run)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure clip quality and flag likely re-recordings',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--status', nargs='+', default=list(QC_STATUSES),
+                        choices=status_tool.AUDIO_STATUSES,
+                        help='Audio_Status values to check (default: recorded)')
+    parser.add_argument('--report', metavar='CSV',
+                        help='Write every metric to a CSV file, flagged clips first')
+    parser.add_argument('--reject-flagged', action='store_true',
+                        help="Mark flagged 'recorded' clips as 'rejected'")
+    parser.add_argument('--dry-run', action='store_true',
+                        help='With --reject-flagged: preview only')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Measure every clip again')
+    args = parser.parse_args()
+    
+    start = time.time()
+    results = run_qc(tuple(args.status), use_cache=not args.no_cache)
+    flagged = [result for result in results if result['flags']]
+    logger.info(f"🔍 Checked {len(results)} clips in {time.time() - start:.1f}s, "
+                f"{len(flagged)} flagged")
+    
+    for result in sorted(flagged, key=lambda r: r['ID']):
+        logger.info(f"   ⚠️  {result['ID']}: {', '.join(result['flags'])}")
+    
+    if args.report:
+        write_report(results, args.report)
+        logger.info(f"📄 Report written to {args.report}")
+    
+    if args.reject_flagged:
+        result = reject_flagged(results, args.dry_run)
+        logger.info(f"✅ {result['updated']} flagged recordings marked rejected"
+                    + (" (dry run)" if args.dry_run else ""))
+
+
+if __name__ == "__main__":
+    main()
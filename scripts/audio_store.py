@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Packed Audio Store for Kirundi Dataset
+======================================
+
+Concatenates the PCM samples of every processed clip into a few large
+files in .cache/audio_store/ and indexes them by sentence ID, so tools
+that inspect or evaluate many clips in random order fetch a clip with an
+index lookup instead of opening, parsing and decoding a WAV file:
+
+    store = AudioStore()
+    samples = store['krd_000001_jokes']     # int16 view into the mmap, no copy
+    audio = store.get_float('krd_000001_jokes')   # float32 in [-1, 1], like load_audio()
+
+- Packs (audio_NNN.pcm) hold raw little-endian int16 mono samples, copied
+  byte for byte from the WAV data chunks; nothing is decoded. A pack is
+  closed at PACK_MAX_BYTES and a new one started.
+- index.npy is a sorted structured array (ID, pack, offset, length, source
+  size/mtime); lookups are a binary search over the memory-mapped index.
+- --build is incremental: clips whose file did not change keep their place,
+  new or modified clips are appended. Space left behind by replaced clips
+  is reclaimed by --rebuild.
+- Only 16kHz mono 16-bit PCM WAV clips (process_audio.py output) are
+  packed; others are listed and skipped.
+
+Usage:
+    python audio_store.py --build                 # Pack every recorded clip
+    python audio_store.py --build --status validated
+    python audio_store.py --rebuild               # Repack from scratch
+    python audio_store.py --stats
+    python audio_store.py --bench 200             # Store vs. librosa.load
+
+Dependencies:
+    pip install numpy
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import random
+import argparse
+import logging
+from pathlib import Path
+
+import dataset_writer
+from export_shards import load_rows
+from lazy_import import lazy_import
+from update_audio_status import read_wav_header, find_header_anomalies, AUDIO_STATUSES
+
+# Imported on first use, see lazy_import.py
+np = lazy_import('numpy')
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+STORE_DIR = BASE_DIR / ".cache" / "audio_store"
+INDEX_NAME = "index.npy"
+
+PACK_MAX_BYTES = 1 << 30  # 1 GiB per pack file
+SAMPLE_RATE = 16000
+STORE_STATUSES = ('recorded', 'validated')
+COPY_CHUNK_BYTES = 1 << 20
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def pack_path(store_dir: Path, pack: int) -> Path:
+    return Path(store_dir) / f"audio_{pack:03d}.pcm"
+
+
+def index_dtype(id_width: int):
+    """Layout of one index record; IDs are stored as fixed-width bytes."""
+    return np.dtype([
+        ('id', f'S{max(id_width, 1)}'),
+        ('pack', '<u2'),
+        ('offset', '<u8'),      # In samples from the start of the pack
+        ('length', '<u8'),      # In samples
+        ('source_size', '<u8'),
+        ('source_mtime_ns', '<i8'),
+    ])
+
+
+def load_index(store_dir: Path = STORE_DIR):
+    """The store index (memory-mapped), None if the store was never built."""
+    path = Path(store_dir) / INDEX_NAME
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode='r')
+
+
+def save_index(store_dir: Path, records: list):
+    """Write the index sorted by ID, atomically."""
+    records = sorted(records, key=lambda record: record[0])
+    width = max((len(record[0]) for record in records), default=1)
+    index = np.array(records, dtype=index_dtype(width))
+    
+    path = Path(store_dir) / INDEX_NAME
+    tmp_path = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npy")
+    np.save(tmp_path, index)
+    os.replace(tmp_path, path)
+
+
+def _copy_range(src, dst, nbytes: int):
+    """Copy nbytes from the current position of src to dst."""
+    while nbytes > 0:
+        chunk = src.read(min(COPY_CHUNK_BYTES, nbytes))
+        if not chunk:
+            raise OSError("clip is shorter than its header says")
+        dst.write(chunk)
+        nbytes -= len(chunk)
+
+
+def build_store(store_dir: Path = STORE_DIR, statuses: tuple = STORE_STATUSES,
+                rebuild: bool = False) -> dict:
+    """
+    Pack the clips of every row with one of statuses.
+    
+    Args:
+        store_dir: Store folder
+        statuses: Audio_Status values whose clips are packed
+        rebuild: Drop the existing packs and repack everything
+    
+    Returns:
+        Dictionary with clips, added, kept and skipped counts
+    """
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    result = {'clips': 0, 'added': 0, 'kept': 0, 'skipped': 0}
+    
+    rows = [row for row in load_rows(statuses) if row.get('File_Path')]
+    
+    with dataset_writer.file_lock(store_dir / ".lock"):
+        if rebuild:
+            for path in store_dir.glob("audio_*.pcm"):
+                path.unlink()
+            (store_dir / INDEX_NAME).unlink(missing_ok=True)
+        
+        old = {}
+        index = load_index(store_dir)
+        if index is not None:
+            old = {record['id'].decode(): record for record in index}
+        
+        packs = sorted(store_dir.glob("audio_*.pcm"))
+        pack = int(packs[-1].stem.split('_')[1]) if packs else 0
+        out = open(pack_path(store_dir, pack), 'ab')
+        records = {}
+        
+        try:
+            for row in rows:
+                sentence_id = row['ID']
+                audio_path = BASE_DIR / row['File_Path']
+                try:
+                    stat = audio_path.stat()
+                except OSError:
+                    logger.warning(f"⚠️  {sentence_id}: missing clip {row['File_Path']}")
+                    result['skipped'] += 1
+                    continue
+                
+                previous = old.get(sentence_id)
+                if (previous is not None and int(previous['source_size']) == stat.st_size
+                        and int(previous['source_mtime_ns']) == stat.st_mtime_ns):
+                    records[sentence_id] = tuple(previous.item())
+                    result['kept'] += 1
+                    continue
+                
+                header = read_wav_header(str(audio_path)) if audio_path.suffix.lower() == '.wav' else None
+                if header is None or find_header_anomalies(header):
+                    problems = find_header_anomalies(header) if header else ['not a WAV file']
+                    logger.warning(f"⚠️  {sentence_id}: {', '.join(problems)}, not packed "
+                                   f"(run process_audio.py first)")
+                    result['skipped'] += 1
+                    continue
+                
+                if out.tell() >= PACK_MAX_BYTES:
+                    out.close()
+                    pack += 1
+                    out = open(pack_path(store_dir, pack), 'ab')
+                
+                offset = out.tell()
+                nbytes = header['data_size'] - header['data_size'] % 2
+                with open(audio_path, 'rb') as f:
+                    f.seek(header['data_offset'])
+                    try:
+                        _copy_range(f, out, nbytes)
+                    except OSError as e:
+                        out.truncate(offset)
+                        out.seek(offset)
+                        logger.warning(f"⚠️  {sentence_id}: {e}, not packed")
+                        result['skipped'] += 1
+                        continue
+                
+                records[sentence_id] = (sentence_id.encode(), pack, offset // 2, nbytes // 2,
+                                        stat.st_size, stat.st_mtime_ns)
+                result['added'] += 1
+            
+            # The samples must be on disk before the index points at them
+            out.flush()
+            os.fsync(out.fileno())
+        finally:
+            out.close()
+        
+        save_index(store_dir, list(records.values()))
+    
+    result['clips'] = len(records)
+    return result
+
+
+class AudioStore:
+    """
+    Read-only access to the packed clips.
+    
+    Packs are memory-mapped on first use; returned arrays are views into
+    them, so nothing is copied or decoded until the samples are touched.
+    """
+    
+    def __init__(self, store_dir: Path = STORE_DIR):
+        self.store_dir = Path(store_dir)
+        self.index = load_index(self.store_dir)
+        if self.index is None:
+            raise FileNotFoundError(f"No audio store in {self.store_dir}, "
+                                    f"build it with: python audio_store.py --build")
+        self._packs = {}
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def __contains__(self, sentence_id: str) -> bool:
+        return self._find(sentence_id) is not None
+    
+    def __getitem__(self, sentence_id: str):
+        return self.get(sentence_id)
+    
+    def ids(self) -> list:
+        """Every packed sentence ID, sorted."""
+        return [key.decode() for key in self.index['id']]
+    
+    def _find(self, sentence_id: str):
+        key = sentence_id.encode()
+        position = int(np.searchsorted(self.index['id'], key))
+        if position < len(self.index) and self.index['id'][position] == key:
+            return self.index[position]
+        return None
+    
+    def _pack(self, pack: int):
+        if pack not in self._packs:
+            self._packs[pack] = np.memmap(pack_path(self.store_dir, pack), dtype='<i2', mode='r')
+        return self._packs[pack]
+    
+    def get(self, sentence_id: str):
+        """
+        Samples of one clip as a read-only int16 array (a view, no copy).
+        
+        Raises:
+            KeyError: The ID has no packed clip
+        """
+        record = self._find(sentence_id)
+        if record is None:
+            raise KeyError(sentence_id)
+        length = int(record['length'])
+        if not length:
+            return np.zeros(0, dtype='<i2')
+        offset = int(record['offset'])
+        return self._pack(int(record['pack']))[offset:offset + length]
+    
+    def get_float(self, sentence_id: str):
+        """Samples of one clip as float32 in [-1, 1] (a new array)."""
+        return self.get(sentence_id).astype(np.float32) / 32768.0
+    
+    def duration(self, sentence_id: str) -> float:
+        """Clip length in seconds, from the index alone."""
+        record = self._find(sentence_id)
+        if record is None:
+            raise KeyError(sentence_id)
+        return int(record['length']) / SAMPLE_RATE
+
+
+def print_stats(store_dir: Path = STORE_DIR):
+    """Clip count, audio length and dead space of the store."""
+    store = AudioStore(store_dir)
+    live = int(store.index['length'].sum()) * 2
+    total = sum(path.stat().st_size for path in store.store_dir.glob("audio_*.pcm"))
+    logger.info(f"📦 {len(store)} clips, {live / 2 / SAMPLE_RATE / 3600:.2f}h of audio")
+    logger.info(f"   {total / (1 << 20):.1f} MB in packs, "
+                f"{(total - live) / (1 << 20):.1f} MB unused (--rebuild reclaims it)")
+
+
+def benchmark(count: int, store_dir: Path = STORE_DIR):
+    """Time random clip fetches: packed store vs. decoding the WAV files."""
+    store = AudioStore(store_dir)
+    rows = {row['ID']: row for row in load_rows(STORE_STATUSES)}
+    ids = [sentence_id for sentence_id in store.ids() if sentence_id in rows]
+    if not ids:
+        logger.error("❌ No packed clips to benchmark")
+        return
+    sample = [random.choice(ids) for _ in range(count)]
+    
+    import process_audio
+    start = time.perf_counter()
+    for sentence_id in sample:
+        process_audio.load_audio(str(BASE_DIR / rows[sentence_id]['File_Path']))
+    decode_ms = (time.perf_counter() - start) * 1000 / count
+    
+    start = time.perf_counter()
+    for sentence_id in sample:
+        store.get_float(sentence_id)
+    store_ms = (time.perf_counter() - start) * 1000 / count
+    
+    start = time.perf_counter()
+    for sentence_id in sample:
+        store.get(sentence_id)
+    view_ms = (time.perf_counter() - start) * 1000 / count
+    
+    logger.info(f"⏱️  {count} random clips, mean per clip:")
+    logger.info(f"   load_audio (librosa): {decode_ms:8.3f} ms")
+    logger.info(f"   store.get_float:      {store_ms:8.3f} ms")
+    logger.info(f"   store.get (view):     {view_ms:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Pack processed clips into memory-mapped files indexed by ID',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--build', action='store_true',
+                        help='Pack new and changed clips')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Repack every clip from scratch')
+    parser.add_argument('--status', nargs='+', default=list(STORE_STATUSES),
+                        choices=AUDIO_STATUSES,
+                        help='Audio_Status values to pack (default: recorded validated)')
+    parser.add_argument('--stats', action='store_true',
+                        help='Show clip count and pack sizes')
+    parser.add_argument('--bench', type=int, metavar='N',
+                        help='Time N random fetches against librosa decoding')
+    parser.add_argument('--store', default=str(STORE_DIR),
+                        help='Store folder (default: .cache/audio_store)')
+    args = parser.parse_args()
+    
+    if args.build or args.rebuild:
+        result = build_store(Path(args.store), tuple(args.status), rebuild=args.rebuild)
+        logger.info(f"✅ {result['clips']} clips packed ({result['added']} added, "
+                    f"{result['kept']} unchanged, {result['skipped']} skipped)")
+    
+    try:
+        if args.stats:
+            print_stats(Path(args.store))
+        if args.bench:
+            benchmark(args.bench, Path(args.store))
+    except FileNotFoundError as e:
+        logger.error(f"❌ {e}")
+    
+    if not (args.build or args.rebuild or args.stats or args.bench):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
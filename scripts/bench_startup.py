@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI startup time per command
+=======================================
+
+Runs each command of the CLI scripts in a fresh interpreter and reports
+its wall time (best and median of N runs) and the heaviest top-level
+imports it paid for (python -X importtime), so a module-level import that
+slows every command down shows up right away.
+
+Review commands run with --dry-run; nothing in the dataset is modified.
+
+Usage:
+    python bench_startup.py                # All commands, 5 runs each
+    python bench_startup.py --repeat 10
+    python bench_startup.py --json startup.json   # Also save the results
+
+Dependencies:
+    None (standard library); the benchmarked scripts need theirs
+"""
+
+import re
+import csv
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def sample_id() -> str:
+    """A sentence ID that exists, for the review commands."""
+    for csv_path in sorted(SPLITS_DIR.glob("final_dataset_part_*.csv")):
+        with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                return row['ID']
+    return 'krd_000001_jokes'
+
+
+def commands() -> list:
+    """(label, argv) of every benchmarked command."""
+    sentence_id = sample_id()
+    return [
+        ('update_audio_status --help', ['update_audio_status.py', '--help']),
+        ('update_audio_status --summary', ['update_audio_status.py', '--summary']),
+        ('update_audio_status --validate', ['update_audio_status.py', '--validate',
+                                            sentence_id, '--dry-run']),
+        ('update_audio_status --reject', ['update_audio_status.py', '--reject',
+                                          sentence_id, '--dry-run']),
+        ('process_audio --help', ['process_audio.py', '--help']),
+        ('append_to_csv --help', ['append_to_csv.py', '--help']),
+        ('text_dedup --help', ['text_dedup.py', '--help']),
+        ('dataset_writer --pending', ['dataset_writer.py', '--pending']),
+        ('status_daemon --help', ['status_daemon.py', '--help']),
+        ('review_client --help', ['review_client.py', '--help']),
+    ]
+
+
+def run_once(argv: list) -> float:
+    """Wall time of one run, in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *argv], cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def heaviest_imports(argv: list, top: int = 3) -> list:
+    """Top-level imports with the largest cumulative time, in milliseconds."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', *argv], cwd=SCRIPT_DIR,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # One leading space = imported by the script itself
+        if match and len(match.group(3)) == 1:
+            imports.append((match.group(4), int(match.group(2)) / 1000))
+    return sorted(imports, key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the startup time of the CLI scripts')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per command (default: 5)')
+    parser.add_argument('--json', metavar='FILE', help='Also write the results as JSON')
+    args = parser.parse_args()
+    
+    results = []
+    print(f"\n{'command':<32} {'best (ms)':>10} {'median (ms)':>12}  heaviest imports")
+    print('-' * 100)
+    for label, argv in commands():
+        times = [run_once(argv) for _ in range(args.repeat)]
+        imports = heaviest_imports(argv)
+        results.append({'command': label, 'best_ms': round(min(times), 1),
+                        'median_ms': round(statistics.median(times), 1),
+                        'imports_ms': {name: round(ms, 1) for name, ms in imports}})
+        heavy = ', '.join(f"{name} {ms:.0f}" for name, ms in imports)
+        print(f"{label:<32} {min(times):>10.1f} {statistics.median(times):>12.1f}  {heavy}")
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat,
+                       'results': results}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
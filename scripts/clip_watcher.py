@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""
+Clip Watcher for Kirundi Dataset
+================================
+
+Keeps final_dataset_splits/ in sync with clips/ continuously: instead of
+walking and re-probing the whole clips/ tree on every run, it reacts to
+the clips that were created, modified, renamed or deleted.
+
+- Changes are detected with inotify on Linux (no extra dependency) and
+  by polling the tree (stat only, no decoding) elsewhere or with --poll.
+- A snapshot of every clip's size and mtime is kept in
+  .cache/clips_snapshot.json, so changes made while the watcher was not
+  running are picked up when it starts.
+- New or modified clips go through the normal update path
+  (plan_audio_updates/apply_audio_updates): the row becomes 'recorded'.
+- When a clip is deleted (or renamed to another sentence), the row that
+  pointed to it is reverted to 'pending' and its File_Path, Duration and
+  Speaker_id (all set from the clip by the sync) are cleared.
+
+Usage:
+    python clip_watcher.py                # inotify, polling fallback
+    python clip_watcher.py --poll 5       # Poll every 5 seconds
+    python clip_watcher.py --once         # Apply pending changes and exit
+    python update_audio_status.py --watch # Same as the first line
+
+Dependencies:
+    pip install pandas
+"""
+
+import os
+import json
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+import logging
+from pathlib import Path
+
+import dataset_store
+import update_audio_status as status_tool
+
+# Configuration
+CLIPS_DIR = status_tool.CLIPS_DIR
+BASE_DIR = status_tool.BASE_DIR
+SNAPSHOT_PATH = BASE_DIR / ".cache" / "clips_snapshot.json"
+
+POLL_INTERVAL = 2.0  # Seconds between scans when inotify is unavailable
+DEBOUNCE_SECONDS = 0.5  # Quiet time before a burst of events is processed
+SETTLE_SECONDS = 1.0  # Clips modified more recently may still be written
+RETRY_SECONDS = 5.0  # Wait before retrying a batch that failed
+
+# inotify constants (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class InotifyWatcher:
+    """Recursive inotify watch of a directory tree (Linux only)."""
+    
+    def __init__(self, root: Path):
+        libc_name = ctypes.util.find_library('c')
+        self.libc = ctypes.CDLL(libc_name or 'libc.so.6', use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError("inotify is not available")
+        
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}  # watch descriptor -> directory
+        self.add_tree(root)
+    
+    def add_tree(self, root: Path) -> list:
+        """Watch root and every directory below it; returns the files found."""
+        files = []
+        for dirpath, _, filenames in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"⚠️  Cannot watch {dirpath} "
+                               f"({os.strerror(ctypes.get_errno())}), try --poll")
+                continue
+            self.directories[wd] = Path(dirpath)
+            files.extend(Path(dirpath) / name for name in filenames)
+        return files
+    
+    def read(self, timeout: float) -> tuple:
+        """
+        Wait up to timeout seconds for events.
+        
+        Returns:
+            (paths, prefixes, overflow): files that may have changed,
+            directories whose whole content may have changed, and whether
+            the kernel dropped events (a full rescan is then needed)
+        """
+        paths, prefixes, overflow = set(), set(), False
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return paths, prefixes, overflow
+        
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return paths, prefixes, overflow
+        
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length]
+            offset += EVENT_HEADER.size + length
+            
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+            
+            directory = self.directories.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(name.rstrip(b'\0'))
+            
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # A folder moved in may already contain clips
+                    paths.update(self.add_tree(path))
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    prefixes.add(path)
+            elif name:
+                paths.add(path)
+        
+        return paths, prefixes, overflow
+    
+    def close(self):
+        os.close(self.fd)
+
+
+def load_snapshot() -> dict:
+    """Last known state of clips/: {relative path: [size, mtime_ns]}."""
+    if not SNAPSHOT_PATH.exists():
+        return {}
+    try:
+        with open(SNAPSHOT_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️  Ignoring unreadable snapshot {SNAPSHOT_PATH}: {e}")
+        return {}
+
+
+def save_snapshot(snapshot: dict):
+    """Write the snapshot atomically (temp file + rename)."""
+    SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SNAPSHOT_PATH.with_name(SNAPSHOT_PATH.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, SNAPSHOT_PATH)
+
+
+def walk_clips() -> list:
+    """Every audio file under clips/ (no probing)."""
+    if not CLIPS_DIR.exists():
+        return []
+    return [Path(dirpath) / name
+            for dirpath, _, filenames in os.walk(CLIPS_DIR)
+            for name in filenames
+            if status_tool.is_audio_file(Path(name))]
+
+
+def diff_snapshot(snapshot: dict, paths, prefixes=()) -> tuple:
+    """
+    Compare the given clips (and everything known under prefixes) with the
+    snapshot.
+    
+    Args:
+        snapshot: Output of load_snapshot()
+        paths: Absolute paths to check, or None to check the whole tree
+        prefixes: Directories that were deleted or moved away
+    
+    Returns:
+        (changed, deleted, unsettled): relative paths of new or modified
+        clips, of clips that are gone, and absolute paths of clips still
+        being written (to check again later)
+    """
+    if paths is None:
+        paths = walk_clips()
+        # A full walk sees every clip, so anything else in the snapshot is gone
+        candidates = set(snapshot)
+    else:
+        candidates = set()
+    
+    prefixes = [str(Path(p).relative_to(BASE_DIR)) + os.sep for p in prefixes]
+    if prefixes:
+        candidates.update(rel for rel in snapshot if rel.startswith(tuple(prefixes)))
+    
+    changed, unsettled = [], []
+    now = time.time()
+    
+    for path in paths:
+        path = Path(path)
+        if not status_tool.is_audio_file(path):
+            continue
+        rel_path = str(path.relative_to(BASE_DIR))
+        candidates.add(rel_path)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        candidates.discard(rel_path)
+        
+        if now - stat.st_mtime < SETTLE_SECONDS:
+            unsettled.append(path)
+            continue
+        if snapshot.get(rel_path) != [stat.st_size, stat.st_mtime_ns]:
+            changed.append(rel_path)
+    
+    deleted = [rel for rel in candidates if rel in snapshot and not (BASE_DIR / rel).exists()]
+    return changed, deleted, unsettled
+
+
+def refresh_frames(frames: dict, id_to_location: dict) -> dict:
+    """Re-read splits changed on disk by another tool; returns the ID index."""
+    changed = False
+    csv_files = sorted(status_tool.SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    for csv_path in csv_files:
+        frame = frames.get(csv_path)
+        if frame is None or frame.attrs.get('source_stamp') != dataset_store.source_stamp(csv_path):
+            frames[csv_path] = status_tool.read_split(csv_path)
+            changed = True
+    for csv_path in set(frames) - set(csv_files):
+        del frames[csv_path]
+        changed = True
+    return status_tool.load_all_csvs(frames) if changed else id_to_location
+
+
+def apply_clip_changes(changed: list, deleted: list, snapshot: dict, frames: dict,
+                       id_to_location: dict, conn) -> tuple:
+    """
+    Feed clip changes into the status update path and update the snapshot.
+    
+    Args:
+        changed: Relative paths of new or modified clips
+        deleted: Relative paths of clips that disappeared
+        snapshot: Snapshot to update in place
+        frames: Loaded splits (kept current)
+        id_to_location: Mapping of IDs to CSV locations
+        conn: Probe cache connection
+    
+    Returns:
+        (rows marked recorded, rows reverted to pending)
+    """
+    scan_time = time.time()
+    audio_files = []
+    for rel_path in changed:
+        audio_file = BASE_DIR / rel_path
+        try:
+            stat = audio_file.stat()
+            audio_files.append(status_tool.describe_clip(audio_file, conn, scan_time))
+        except OSError as e:
+            logger.warning(f"⚠️  Could not read {rel_path}: {e}")
+            continue
+        logger.info(f"🎙️  {'Modified' if rel_path in snapshot else 'New'} clip: {rel_path}")
+        snapshot[rel_path] = [stat.st_size, stat.st_mtime_ns]
+    
+    plan = status_tool.plan_audio_updates(audio_files, id_to_location)
+    recorded = status_tool.apply_audio_updates(plan, frames) if plan else 0
+    
+    # Sentences that (still) have a clip after this batch, e.g. the new
+    # name of a renamed clip, are not reverted
+    has_clip = {info['parsed']['sentence_id'] for info in audio_files if info['parsed']}
+    reverts = {}
+    for rel_path in deleted:
+        snapshot.pop(rel_path, None)
+        conn.execute("DELETE FROM probes WHERE rel_path = ?", (rel_path,))
+        logger.info(f"🗑️  Clip removed: {rel_path}")
+        
+        parsed = status_tool.parse_filename(Path(rel_path).name)
+        if parsed is None or parsed['sentence_id'] in has_clip:
+            continue
+        location = id_to_location.get(parsed['sentence_id'])
+        if location is None:
+            continue
+        # Only revert rows that still point to the deleted clip
+        df = frames[location['csv_path']]
+        if df.at[location['row_index'], 'File_Path'] != rel_path:
+            continue
+        reverts.setdefault(location['csv_path'], {})[parsed['sentence_id']] = {
+            'File_Path': '', 'Duration': '', 'Speaker_id': '', 'Audio_Status': 'pending'}
+    
+    reverted = 0
+    for csv_path, changes in reverts.items():
+        previous, _ = status_tool.write_changes(csv_path, changes, frames)
+        for sentence_id, old in previous.items():
+            logger.info(f"   {sentence_id}: {old['Audio_Status']} → pending (clip deleted)")
+        reverted += len(previous)
+    
+    conn.commit()
+    return recorded, reverted
+
+
+def watch(poll_interval: float = None, once: bool = False):
+    """
+    Sync clip changes into the splits until interrupted.
+    
+    Args:
+        poll_interval: Poll every this many seconds instead of using inotify
+        once: Only catch up with changes since the last run, then return
+    """
+    CLIPS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    logger.info("📂 Loading dataset...")
+    frames = status_tool.load_splits()
+    id_to_location = status_tool.load_all_csvs(frames)
+    snapshot = load_snapshot()
+    conn = status_tool.open_probe_cache()
+    
+    def process(changed, deleted) -> list:
+        """
+        Apply one batch. If it fails, the error is logged and the batch is
+        undone in memory; its clips are returned so they are checked again.
+        """
+        nonlocal id_to_location
+        if not changed and not deleted:
+            return []
+        before = {rel_path: snapshot.get(rel_path) for rel_path in (*changed, *deleted)}
+        try:
+            id_to_location = refresh_frames(frames, id_to_location)
+            recorded, reverted = apply_clip_changes(changed, deleted, snapshot, frames,
+                                                    id_to_location, conn)
+            save_snapshot(snapshot)
+        except Exception as e:
+            logger.error(f"❌ Failed to apply {len(changed)} changed and {len(deleted)} "
+                         f"deleted clips, will retry: {e}")
+            conn.rollback()
+            for rel_path, entry in before.items():
+                if entry is None:
+                    snapshot.pop(rel_path, None)
+                else:
+                    snapshot[rel_path] = entry
+            # Rows may be half updated in memory: read every split again
+            frames.clear()
+            return [BASE_DIR / rel_path for rel_path in before]
+        logger.info(f"✅ {recorded} rows recorded, {reverted} reverted to pending")
+        return []
+    
+    watcher = None
+    try:
+        # Start watching before the catch-up scan, so nothing written in
+        # between is missed
+        if poll_interval is None and not once:
+            try:
+                watcher = InotifyWatcher(CLIPS_DIR)
+            except (OSError, AttributeError) as e:
+                logger.info(f"   inotify unavailable ({e}), polling instead")
+                poll_interval = POLL_INTERVAL
+        
+        # Catch up with changes made while we were not watching
+        logger.info(f"🔍 Comparing {CLIPS_DIR} with the last snapshot...")
+        changed, deleted, unsettled = diff_snapshot(snapshot, None)
+        retry = process(changed, deleted)
+        if once:
+            return
+        
+        logger.info(f"👀 Watching {CLIPS_DIR} "
+                    f"({'inotify' if watcher else f'polling every {poll_interval}s'}), Ctrl+C to stop")
+        dirty, prefixes = set(unsettled) | set(retry), set()
+        
+        while True:
+            if watcher is None:
+                # Every scan sees the clips of a failed batch again
+                time.sleep(poll_interval)
+                changed, deleted, _ = diff_snapshot(snapshot, None)
+                process(changed, deleted)
+                continue
+            
+            # Collect a burst of events, then handle it in one batch
+            paths, gone, overflow = watcher.read(DEBOUNCE_SECONDS if dirty else None)
+            if overflow:
+                logger.warning("⚠️  Event queue overflowed, rescanning clips/")
+                changed, deleted, unsettled = diff_snapshot(snapshot, None)
+                dirty = set(unsettled) | set(process(changed, deleted))
+                continue
+            dirty |= paths
+            prefixes |= gone
+            if paths or gone or not dirty:
+                continue
+            
+            changed, deleted, unsettled = diff_snapshot(snapshot, dirty, prefixes)
+            retry = process(changed, deleted)
+            dirty, prefixes = set(unsettled) | set(retry), set()
+            if retry:
+                time.sleep(RETRY_SECONDS)
+            elif dirty:
+                # Still being written: look again after the settle time
+                time.sleep(SETTLE_SECONDS)
+    
+    except KeyboardInterrupt:
+        logger.info("👋 Stopped")
+    finally:
+        if watcher is not None:
+            watcher.close()
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sync clip changes into the dataset splits as they happen',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help='Poll clips/ instead of using inotify')
+    parser.add_argument('--once', action='store_true',
+                        help='Apply changes since the last run and exit')
+    args = parser.parse_args()
+    
+    watch(args.poll, args.once)
+
+
+if __name__ == "__main__":
+    main()
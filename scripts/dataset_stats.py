@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Persistent Dataset Statistics for Kirundi Dataset
+=================================================
+
+Keeps per-split counters in .cache/stats.json so status summaries never
+scan the splits:
+
+- Per domain and per speaker: number of sentences in each Audio_Status,
+  number of clips with a Duration and their total length in seconds.
+- Every change written through dataset_writer.py updates the counters of
+  its split incrementally (old row out, new row in), under the split's
+  lock.
+- Each split entry records the size and mtime of the CSV it describes; a
+  split changed by anything else (git pull, manual edit) is recounted the
+  next time the statistics are read, and only that split.
+
+Breakdowns by domain, by speaker or by split are sums over the stored
+counters.
+
+Usage:
+    python dataset_stats.py              # Totals as JSON
+    python dataset_stats.py --by domain  # Also: speaker, split
+    python dataset_stats.py --rebuild    # Recount every split
+
+    python update_audio_status.py --summary --by speaker   # Formatted table
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import argparse
+import logging
+from pathlib import Path
+
+import dataset_store
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+STATS_PATH = BASE_DIR / ".cache" / "stats.json"
+STATS_VERSION = 1  # Bump when the layout of stats.json changes
+
+# Columns a statistics record is made of, in record order
+STAT_COLUMNS = ('Domain', 'Audio_Status', 'Duration', 'Speaker_id')
+
+BREAKDOWNS = ('domain', 'speaker', 'split')
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def split_files() -> list:
+    """All split CSVs, the files the statistics cover."""
+    return sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+
+
+def is_split(csv_path: Path) -> bool:
+    """True if csv_path is one of the splits (metadata.csv is not counted)."""
+    csv_path = Path(csv_path)
+    return (csv_path.match("final_dataset_part_*.csv")
+            and csv_path.parent.resolve() == SPLITS_DIR.resolve())
+
+
+def frame_record(df, row) -> tuple:
+    """Statistics record (STAT_COLUMNS values) of one frame row."""
+    return tuple(df.at[row, col] if col in df.columns else '' for col in STAT_COLUMNS)
+
+
+def frame_records(df):
+    """Statistics records of every row of a frame."""
+    return (frame_record(df, row) for row in df.index)
+
+
+def row_records(header: list, rows: list):
+    """Statistics records of rows read with dataset_writer.read_rows()."""
+    positions = [header.index(col) if col in header else None for col in STAT_COLUMNS]
+    return (tuple(row[i] if i is not None else '' for i in positions) for row in rows)
+
+
+def _seconds(duration: str):
+    """Duration cell as seconds, None if the row has no (valid) duration."""
+    try:
+        return float(duration) if duration else None
+    except ValueError:
+        return None
+
+
+def _empty_bucket() -> dict:
+    return {'statuses': {}, 'clips': 0, 'seconds': 0.0}
+
+
+def _add_to_bucket(bucket: dict, status: str, seconds, sign: int):
+    statuses = bucket['statuses']
+    statuses[status] = statuses.get(status, 0) + sign
+    if not statuses[status]:
+        del statuses[status]
+    if seconds is not None:
+        bucket['clips'] += sign
+        # Durations have two decimals; rounding keeps the sum from drifting
+        bucket['seconds'] = round(bucket['seconds'] + sign * seconds, 2) if bucket['clips'] else 0.0
+
+
+def count_record(entry: dict, record: tuple, sign: int = 1):
+    """Add (sign=1) or remove (sign=-1) one row from a split entry."""
+    domain, status, duration, speaker = record
+    seconds = _seconds(duration)
+    
+    for table, key in (('domains', domain), ('speakers', speaker)):
+        if table == 'speakers' and not speaker:
+            continue
+        buckets = entry[table]
+        bucket = buckets.setdefault(key, _empty_bucket())
+        _add_to_bucket(bucket, status, seconds, sign)
+        if not bucket['statuses'] and not bucket['clips']:
+            del buckets[key]
+
+
+def count_records(records, stamp: str = None) -> dict:
+    """Split entry counted from scratch."""
+    entry = {'stamp': stamp, 'domains': {}, 'speakers': {}}
+    for record in records:
+        count_record(entry, record)
+    return entry
+
+
+def load_stats() -> dict:
+    """Stored statistics as they are (possibly stale), empty if missing."""
+    try:
+        with open(STATS_PATH, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        if stats.get('version') == STATS_VERSION:
+            return stats
+    except (OSError, ValueError):
+        pass
+    return {'version': STATS_VERSION, 'splits': {}}
+
+
+def save_stats(stats: dict):
+    """Write the statistics atomically. Call with stats_lock() held."""
+    STATS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = STATS_PATH.with_name(f".{STATS_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, STATS_PATH)
+
+
+def stats_lock():
+    """Lock of stats.json. Take it after a CSV lock, never before one."""
+    # Imported here: dataset_writer itself depends on this module
+    import dataset_writer
+    return dataset_writer.file_lock(STATS_PATH.with_suffix('.lock'))
+
+
+def record_changes(csv_path: Path, stamp_before: str, deltas: list, records):
+    """
+    Update the counters of a split after dataset_writer.py rewrote it.
+    
+    Call with the split's lock still held, right after the write.
+    
+    Args:
+        csv_path: The split that was written
+        stamp_before: Source stamp of the version the changes were applied to
+        deltas: (old record, new record) of every changed row
+        records: Callable returning the records of the whole split as
+                 written, used when the stored entry is not for stamp_before
+    """
+    if not is_split(csv_path):
+        return
+    csv_path = Path(csv_path)
+    
+    with stats_lock():
+        stats = load_stats()
+        entry = stats['splits'].get(csv_path.name)
+        if entry is not None and entry['stamp'] == stamp_before:
+            for old, new in deltas:
+                count_record(entry, old, -1)
+                count_record(entry, new, 1)
+        else:
+            entry = count_records(records())
+        entry['stamp'] = dataset_store.source_stamp(csv_path)
+        stats['splits'][csv_path.name] = entry
+        save_stats(stats)
+
+
+def refresh_split(csv_path: Path):
+    """Recount one split from its CSV."""
+    import dataset_writer
+    
+    # Under the split's lock, so no write lands between stamp and read
+    with dataset_writer.csv_lock(csv_path):
+        stamp = dataset_store.source_stamp(csv_path)
+        entry = count_records(row_records(*dataset_writer.read_rows(csv_path)), stamp)
+        with stats_lock():
+            stats = load_stats()
+            stats['splits'][Path(csv_path).name] = entry
+            save_stats(stats)
+
+
+def read_stats() -> dict:
+    """
+    Current statistics of every split.
+    
+    Normally one small JSON read plus a stat() per split; splits whose CSV
+    changed without going through dataset_writer.py are recounted first.
+    """
+    stats = load_stats()
+    csv_files = split_files()
+    
+    stale = [csv_path for csv_path in csv_files
+             if stats['splits'].get(csv_path.name, {}).get('stamp')
+             != dataset_store.source_stamp(csv_path)]
+    removed = set(stats['splits']) - {csv_path.name for csv_path in csv_files}
+    if not stale and not removed:
+        return stats
+    
+    for csv_path in stale:
+        logger.debug(f"Recounting statistics of {csv_path.name}")
+        refresh_split(csv_path)
+    if removed:
+        with stats_lock():
+            stats = load_stats()
+            for name in removed:
+                stats['splits'].pop(name, None)
+            save_stats(stats)
+    return load_stats()
+
+
+def summarize(stats: dict, by: str = None) -> dict:
+    """
+    Add up the split counters.
+    
+    Args:
+        stats: Output of read_stats()
+        by: None for dataset totals, or 'domain', 'speaker' or 'split'
+    
+    Returns:
+        {key: {'statuses': {status: n}, 'clips': n, 'seconds': s}}, with
+        the single key 'all' when by is None. Only rows with a Speaker_id
+        appear in the speaker breakdown.
+    """
+    groups = {}
+    
+    for name, entry in stats['splits'].items():
+        if by == 'speaker':
+            buckets = entry['speakers'].items()
+        elif by == 'domain':
+            buckets = entry['domains'].items()
+        else:
+            key = name if by == 'split' else 'all'
+            buckets = [(key, bucket) for bucket in entry['domains'].values()]
+        
+        for key, bucket in buckets:
+            total = groups.setdefault(key, _empty_bucket())
+            for status, n in bucket['statuses'].items():
+                total['statuses'][status] = total['statuses'].get(status, 0) + n
+            total['clips'] += bucket['clips']
+            total['seconds'] = round(total['seconds'] + bucket['seconds'], 2)
+    
+    if by is None and not groups:
+        groups['all'] = _empty_bucket()
+    return groups
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Show or rebuild the persisted dataset statistics',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--by', choices=BREAKDOWNS,
+                        help='Break the totals down by domain, speaker or split')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Recount every split from its CSV')
+    args = parser.parse_args()
+    
+    if args.rebuild:
+        for csv_path in split_files():
+            refresh_split(csv_path)
+        logger.info(f"✅ Recounted {len(split_files())} splits into {STATS_PATH}")
+    
+    stats = read_stats()
+    result = summarize(stats)['all']
+    if args.by:
+        result = {'all': result, f'by_{args.by}': summarize(stats, args.by)}
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Columnar Dataset Store for Kirundi Dataset
+==========================================
+
+Keeps an Arrow IPC (Feather v2) copy of metadata.csv and of every
+final_dataset_splits/final_dataset_part_*.csv file in .cache/store/.
+The scripts read the dataset through this store: files are memory-mapped,
+so loading and filtering the whole dataset does not parse any text.
+
+- Domain, Audio_Status and Speaker_id are dictionary-encoded.
+- Each store file records the size and mtime of the CSV it mirrors and
+  is rebuilt automatically when the CSV changes (e.g. after a git pull or
+  a contributor edit), so the CSVs stay the reviewable format in git.
+- Scripts that modify a CSV refresh the store from the frame they just
+  wrote, without parsing the CSV again.
+
+Usage:
+    python dataset_store.py --build     # Build/refresh the store for every CSV
+    python dataset_store.py --export    # Re-export the CSVs from the store
+    python dataset_store.py --stats     # Row counts per file
+
+Dependencies:
+    pip install pandas pyarrow
+    (without pyarrow every read falls back to parsing the CSV)
+"""
+
+from __future__ import annotations
+
+import os
+import argparse
+import logging
+from pathlib import Path
+
+from lazy_import import lazy_import, is_installed
+
+# Imported on first use, see lazy_import.py
+pd = lazy_import('pandas')
+
+# pyarrow is optional: without it the scripts simply parse the CSVs
+ARROW_AVAILABLE = is_installed('pyarrow')
+if ARROW_AVAILABLE:
+    pa = lazy_import('pyarrow')
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+METADATA_FILE = BASE_DIR / "metadata.csv"
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+STORE_DIR = BASE_DIR / ".cache" / "store"
+
+# Low-cardinality columns stored as dictionary arrays
+DICTIONARY_COLUMNS = ('Domain', 'Audio_Status', 'Speaker_id')
+
+# Schema metadata keys
+SOURCE_STAMP_KEY = b'kirundi.source_stamp'
+SOURCE_BOM_KEY = b'kirundi.source_bom'
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def csv_files() -> list:
+    """All CSV files mirrored by the store: metadata.csv and the splits."""
+    files = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    if METADATA_FILE.exists():
+        files.insert(0, METADATA_FILE)
+    return files
+
+
+def store_path(csv_path: Path) -> Path:
+    """Location of the Arrow file mirroring csv_path."""
+    return STORE_DIR / f"{Path(csv_path).stem}.arrow"
+
+
+def source_stamp(csv_path: Path) -> str:
+    """Size + mtime of a CSV, used to detect that its store copy is stale."""
+    stat = Path(csv_path).stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def read_csv_frame(csv_path: Path) -> pd.DataFrame:
+    """
+    Parse a dataset CSV with every column kept as text.
+    
+    Empty cells stay empty strings instead of NaN, so writing the frame
+    back reproduces the untouched rows byte for byte.
+    """
+    return pd.read_csv(csv_path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+
+
+def frame_to_table(df: pd.DataFrame):
+    """Convert a text frame to an Arrow table with dictionary columns."""
+    columns = {}
+    for name in df.columns:
+        array = pa.array(df[name].tolist(), type=pa.string())
+        if name in DICTIONARY_COLUMNS:
+            array = array.dictionary_encode()
+        columns[name] = array
+    return pa.table(columns)
+
+
+def table_to_frame(table) -> pd.DataFrame:
+    """Convert a store table back to a plain, editable text frame."""
+    columns = {}
+    for name in table.column_names:
+        column = table.column(name)
+        if pa.types.is_dictionary(column.type):
+            column = column.cast(pa.string())
+        columns[name] = column.to_pandas()
+    return pd.DataFrame(columns, columns=table.column_names, dtype=str)
+
+
+def write_table(csv_path: Path, table, has_bom: bool = False):
+    """
+    Write the store copy of csv_path atomically.
+    
+    The CSV must already be in its final state: its current size and
+    mtime are recorded as the source stamp.
+    """
+    STORE_DIR.mkdir(parents=True, exist_ok=True)
+    path = store_path(csv_path)
+    table = table.replace_schema_metadata({
+        SOURCE_STAMP_KEY: source_stamp(csv_path).encode(),
+        SOURCE_BOM_KEY: b'1' if has_bom else b'0'
+    })
+    
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp_path), 'wb') as sink:
+        # Uncompressed, so the file can be memory-mapped without decoding
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _open_table(path: Path):
+    """Memory-map a store file; the returned table does not copy the data."""
+    source = pa.memory_map(str(path), 'r')
+    return pa.ipc.open_file(source).read_all()
+
+
+def _has_bom(csv_path: Path) -> bool:
+    with open(csv_path, 'rb') as f:
+        return f.read(3) == UTF8_BOM
+
+
+def read_table(csv_path: Path):
+    """
+    Read a dataset file as a memory-mapped Arrow table.
+    
+    The store copy is (re)built from the CSV first if it is missing or
+    older than the CSV.
+    
+    Args:
+        csv_path: metadata.csv or a split CSV
+    
+    Returns:
+        pyarrow.Table backed by the memory-mapped store file
+    """
+    path = store_path(csv_path)
+    
+    if path.exists():
+        table = _open_table(path)
+        metadata = table.schema.metadata or {}
+        if metadata.get(SOURCE_STAMP_KEY) == source_stamp(csv_path).encode():
+            return table
+    
+    logger.debug(f"Rebuilding store copy of {Path(csv_path).name}")
+    write_table(csv_path, frame_to_table(read_csv_frame(csv_path)), _has_bom(csv_path))
+    return _open_table(path)
+
+
+def read_frame(csv_path: Path) -> pd.DataFrame:
+    """
+    Read a dataset file as an editable text DataFrame.
+    
+    Goes through the memory-mapped store when pyarrow is installed and
+    parses the CSV otherwise; both give the same frame.
+    """
+    if not ARROW_AVAILABLE:
+        return read_csv_frame(csv_path)
+    return table_to_frame(read_table(csv_path))
+
+
+def update_store(csv_path: Path, df: pd.DataFrame):
+    """
+    Refresh the store after csv_path was rewritten from df.
+    
+    Call this right after writing the CSV; the frame is converted
+    directly, so the CSV is not parsed again.
+    """
+    if not ARROW_AVAILABLE:
+        return
+    write_table(csv_path, frame_to_table(df), _has_bom(csv_path))
+
+
+def load_dataset(paths: list = None):
+    """
+    Load several dataset files as one memory-mapped Arrow table.
+    
+    Args:
+        paths: CSV paths to load (default: all splits)
+    
+    Returns:
+        pyarrow.Table with a 'Split' column naming the source file
+    """
+    if paths is None:
+        paths = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    
+    tables = []
+    for csv_path in paths:
+        table = read_table(csv_path)
+        split = pa.array([Path(csv_path).name] * table.num_rows).dictionary_encode()
+        tables.append(table.append_column('Split', split))
+    
+    return pa.concat_tables(tables, promote_options='default') if tables else None
+
+
+def filter_rows(table, column: str, value: str):
+    """Select rows where column == value, without leaving Arrow."""
+    import pyarrow.compute as pc
+    return table.filter(pc.equal(table[column], value))
+
+
+def export_csv(csv_path: Path) -> bool:
+    """
+    Write csv_path back from its store copy (atomic, under its lock).
+    
+    The store is only a cache of the CSV: if the CSV changed since the
+    store copy was made (git pull, manual edit), nothing is written.
+    
+    Returns:
+        True if the CSV was written, False if its store copy is stale
+    """
+    path = store_path(csv_path)
+    
+    # Imported here: dataset_writer itself depends on this module
+    import dataset_writer
+    with dataset_writer.csv_lock(csv_path):
+        table = _open_table(path)
+        metadata = table.schema.metadata or {}
+        if metadata.get(SOURCE_STAMP_KEY) != source_stamp(csv_path).encode():
+            return False
+        has_bom = metadata.get(SOURCE_BOM_KEY) == b'1'
+        # Also re-stamps the (unchanged) store copy with the new mtime
+        dataset_writer.write_frame(table_to_frame(table), csv_path, has_bom)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Manage the columnar store of the Kirundi dataset',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--build', action='store_true',
+                        help='Build or refresh the store copy of every CSV')
+    parser.add_argument('--export', action='store_true',
+                        help='Re-export every CSV from its store copy')
+    parser.add_argument('--stats', action='store_true',
+                        help='Show row counts and status breakdown')
+    args = parser.parse_args()
+    
+    if not ARROW_AVAILABLE:
+        logger.error("❌ pyarrow is not installed: pip install pyarrow")
+        return
+    
+    if args.build or args.stats:
+        for csv_path in csv_files():
+            table = read_table(csv_path)
+            if args.stats:
+                logger.info(f"   {csv_path.name}: {table.num_rows} rows")
+        logger.info(f"✅ Store up to date in {STORE_DIR}")
+    
+    if args.stats:
+        import pyarrow.compute as pc
+        dataset = load_dataset()
+        if dataset is not None:
+            for entry in pc.value_counts(dataset['Audio_Status']).to_pylist():
+                logger.info(f"   {entry['values']}: {entry['counts']}")
+    
+    if args.export:
+        for csv_path in csv_files():
+            if not store_path(csv_path).exists():
+                continue
+            if export_csv(csv_path):
+                logger.info(f"   Exported {csv_path.name}")
+            else:
+                logger.warning(f"⚠️  {csv_path.name} changed since its store copy was built, "
+                               f"not exported (run --build to refresh the store)")
+    
+    if not (args.build or args.export or args.stats):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Crash-Safe Dataset Writes for Kirundi Dataset
+=============================================
+
+Every script that modifies metadata.csv or a split in final_dataset_splits/
+goes through this module, so a sync job and several reviewers can run at
+the same time:
+
+- Locking: each CSV has an advisory lock file in .cache/locks/. Writers
+  hold it for the whole read-modify-write, so nobody overwrites changes
+  made by someone else in the meantime.
+- Atomic writes: a CSV is written to a temporary file, fsynced and renamed
+  over the original; a crash never leaves a truncated split behind.
+- Write-ahead journal: every change is recorded in .cache/journal.jsonl
+  (and fsynced) before the CSV is touched, and marked committed once the
+  CSV is on disk. Changes left uncommitted by a crash are replayed the
+  next time that CSV is written, or with --replay.
+
+Changes are keyed by sentence ID, not by row position, so they still land
+on the right rows when the CSV was modified since the caller loaded it.
+
+Callers holding pandas frames use apply_changes(); commands that only
+change a few cells (review decisions) use apply_row_changes(), which reads
+and writes the CSV with the csv module and never imports pandas. Both
+update the split statistics incrementally (dataset_stats.py).
+
+Usage:
+    python dataset_writer.py --pending   # List uncommitted journal entries
+    python dataset_writer.py --replay    # Replay them now
+
+Dependencies:
+    pip install pandas
+"""
+
+from __future__ import annotations
+
+import os
+import csv
+import json
+import time
+import uuid
+import argparse
+import logging
+from contextlib import contextmanager
+from pathlib import Path
+
+import dataset_stats
+import dataset_store
+from lazy_import import lazy_import
+
+# Only the frame functions need pandas, see lazy_import.py
+pd = lazy_import('pandas')
+
+# Advisory locks: fcntl on Linux/macOS, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+LOCK_DIR = BASE_DIR / ".cache" / "locks"
+JOURNAL_PATH = BASE_DIR / ".cache" / "journal.jsonl"
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(lock_path: Path):
+    """Hold an exclusive advisory lock on lock_path (blocks until free)."""
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    pass  # LK_LOCK gives up after ~10s; keep waiting
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def csv_lock(csv_path: Path):
+    """
+    Advisory lock of one CSV.
+    
+    The lock lives in a separate file because the CSV itself is replaced
+    by every atomic write.
+    """
+    return file_lock(LOCK_DIR / f"{Path(csv_path).name}.lock")
+
+
+def _fsync_dir(path: Path):
+    """Make a rename in path durable (no-op where directories can't be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(csv_path: Path, write, has_bom: bool = False):
+    """Call write(f) on a temp file, fsync it and rename it over csv_path."""
+    csv_path = Path(csv_path)
+    tmp_path = csv_path.with_name(f".{csv_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8-sig' if has_bom else 'utf-8', newline='') as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, csv_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    _fsync_dir(csv_path.parent)
+
+
+def write_frame(df: pd.DataFrame, csv_path: Path, has_bom: bool = False):
+    """
+    Write a CSV atomically (temp file + fsync + rename) and refresh its
+    store copy. The caller should hold csv_lock(csv_path).
+    """
+    _write_atomic(csv_path, lambda f: df.to_csv(f, index=False), has_bom)
+    df.attrs['source_stamp'] = dataset_store.source_stamp(csv_path)
+    dataset_store.update_store(csv_path, df)
+
+
+def read_frame(csv_path: Path) -> pd.DataFrame:
+    """
+    Read a CSV as a text frame, remembering which version of the file it
+    came from (df.attrs['source_stamp']).
+    """
+    # Stamp first: if the file changes while we read, the frame just
+    # looks outdated and gets re-read before the next write
+    stamp = dataset_store.source_stamp(csv_path)
+    df = dataset_store.read_frame(csv_path)
+    df.attrs['source_stamp'] = stamp
+    return df
+
+
+def read_rows(csv_path: Path) -> tuple:
+    """
+    Read a CSV as (header, rows) of strings, without pandas.
+    
+    Blank lines are skipped and short rows padded with empty cells, like
+    read_frame() does, so write_rows() reproduces untouched rows byte for
+    byte.
+    """
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row + [''] * (len(header) - len(row)) for row in reader if row]
+    return header, rows
+
+
+def write_rows(csv_path: Path, header: list, rows: list, has_bom: bool = False):
+    """
+    Write rows from read_rows() atomically, formatted like write_frame().
+    
+    The store copy is not refreshed (that needs pyarrow); it is rebuilt
+    from the CSV the next time it is read. The caller should hold
+    csv_lock(csv_path).
+    """
+    def write(f):
+        # Same dialect as DataFrame.to_csv()
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(header)
+        writer.writerows(rows)
+    
+    _write_atomic(csv_path, write, has_bom)
+
+
+def _relative(csv_path: Path) -> str:
+    """Journal key of a CSV: its path relative to the repository."""
+    csv_path = Path(csv_path).resolve()
+    try:
+        return csv_path.relative_to(BASE_DIR.resolve()).as_posix()
+    except ValueError:
+        return str(csv_path)
+
+
+def _journal_write(records: list):
+    """Append records to the journal and fsync them."""
+    JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with file_lock(JOURNAL_PATH.with_suffix('.lock')):
+        with open(JOURNAL_PATH, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_journal() -> list:
+    """All journal records; a torn last line (crash mid-append) is ignored."""
+    if not JOURNAL_PATH.exists():
+        return []
+    records = []
+    with open(JOURNAL_PATH, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def pending_entries(csv_path: Path = None) -> list:
+    """Journal entries that were never committed, oldest first."""
+    records = read_journal()
+    committed = {r['tx'] for r in records if r.get('op') == 'commit'}
+    entries = [r for r in records if r.get('op') != 'commit' and r['tx'] not in committed]
+    if csv_path is not None:
+        entries = [r for r in entries if r['csv'] == _relative(csv_path)]
+    return entries
+
+
+def _begin(op: str, csv_path: Path, **fields) -> str:
+    """Journal an operation before it touches the CSV; returns its id."""
+    tx = uuid.uuid4().hex
+    _journal_write([{'tx': tx, 'op': op, 'csv': _relative(csv_path),
+                     'time': time.time(), **fields}])
+    return tx
+
+
+def _commit(tx: str):
+    """Mark an operation done; drop the journal once nothing is pending."""
+    _journal_write([{'tx': tx, 'op': 'commit'}])
+    with file_lock(JOURNAL_PATH.with_suffix('.lock')):
+        if not pending_entries():
+            JOURNAL_PATH.unlink(missing_ok=True)
+
+
+def _apply(df: pd.DataFrame, changes: dict) -> tuple:
+    """
+    Apply {sentence_id: {column: value}} to a frame in place.
+    
+    Returns:
+        (previous values of the changed cells, IDs not found in df,
+        (old, new) statistics record of every changed row)
+    """
+    positions = pd.Series(df.index, index=df['ID'])
+    positions = positions[~positions.index.duplicated(keep='last')]
+    previous = {}
+    missing = []
+    deltas = []
+    
+    for sentence_id, values in changes.items():
+        if sentence_id not in positions.index:
+            missing.append(sentence_id)
+            continue
+        row = positions[sentence_id]
+        old_record = dataset_stats.frame_record(df, row)
+        previous[sentence_id] = {col: df.at[row, col] for col in values}
+        for col, value in values.items():
+            df.at[row, col] = value
+        deltas.append((old_record, dataset_stats.frame_record(df, row)))
+    
+    return previous, missing, deltas
+
+
+def _apply_rows(header: list, rows: list, changes: dict) -> tuple:
+    """
+    Apply {sentence_id: {column: value}} to rows from read_rows() in place.
+    
+    Returns:
+        (previous values of the changed cells, IDs not found in rows,
+        (old, new) statistics record of every changed row)
+    """
+    columns = {name: i for i, name in enumerate(header)}
+    id_column = columns['ID']
+    positions = {row[id_column]: i for i, row in enumerate(rows)}  # Last one wins
+    previous = {}
+    missing = []
+    deltas = []
+    
+    for sentence_id, values in changes.items():
+        if sentence_id not in positions:
+            missing.append(sentence_id)
+            continue
+        row = rows[positions[sentence_id]]
+        old_record = next(dataset_stats.row_records(header, [row]))
+        previous[sentence_id] = {col: row[columns[col]] for col in values}
+        for col, value in values.items():
+            row[columns[col]] = value
+        deltas.append((old_record, next(dataset_stats.row_records(header, [row]))))
+    
+    return previous, missing, deltas
+
+
+def _recover(csv_path: Path):
+    """
+    Finish operations on csv_path interrupted by a crash.
+    
+    Updates are replayed; an interrupted append is rolled back to where it
+    started, since its rows may be incomplete. Call with csv_lock held.
+    """
+    entries = pending_entries(csv_path)
+    if not entries:
+        return
+    
+    rows = None
+    for entry in entries:
+        if entry['op'] == 'append':
+            with open(csv_path, 'r+b') as f:
+                if os.fstat(f.fileno()).st_size > entry['offset']:
+                    f.truncate(entry['offset'])
+                    f.flush()
+                    os.fsync(f.fileno())
+            logger.warning(f"⚠️  Rolled back an interrupted append to {Path(csv_path).name}")
+            rows = None
+        elif entry['op'] == 'update':
+            if rows is None:
+                header, rows = read_rows(csv_path)
+            _apply_rows(header, rows, entry['changes'])
+            write_rows(csv_path, header, rows)
+            logger.warning(f"⚠️  Replayed {len(entry['changes'])} journaled changes "
+                           f"to {Path(csv_path).name}")
+        _commit(entry['tx'])
+
+
+def apply_changes(csv_path: Path, changes: dict, frame: pd.DataFrame = None) -> tuple:
+    """
+    Apply cell changes to one CSV, safely.
+    
+    Under the CSV's lock: replays any interrupted operation, journals the
+    changes, re-reads the CSV if it changed since frame was loaded, applies
+    the changes by ID and writes the file atomically.
+    
+    Args:
+        csv_path: CSV to modify (must have an ID column)
+        changes: {sentence_id: {column: new_value}}; values are strings
+        frame: The caller's copy of the CSV, reused if still current
+    
+    Returns:
+        (frame, previous, missing): the up-to-date frame as written,
+        {sentence_id: {column: old_value}}, and IDs not found in the CSV
+    """
+    csv_path = Path(csv_path)
+    
+    with csv_lock(csv_path):
+        _recover(csv_path)
+        tx = _begin('update', csv_path, changes=changes)
+        
+        current = dataset_store.source_stamp(csv_path)
+        if frame is None or frame.attrs.get('source_stamp') != current:
+            if frame is not None:
+                logger.info(f"   {csv_path.name} changed on disk, re-reading it")
+            frame = read_frame(csv_path)
+        
+        previous, missing, deltas = _apply(frame, changes)
+        if previous:
+            write_frame(frame, csv_path)
+            dataset_stats.record_changes(csv_path, current, deltas,
+                                         lambda: dataset_stats.frame_records(frame))
+        _commit(tx)
+    
+    for sentence_id in missing:
+        logger.warning(f"⚠️  {sentence_id} is no longer in {csv_path.name}, change skipped")
+    return frame, previous, missing
+
+
+def apply_row_changes(csv_path: Path, changes: dict) -> tuple:
+    """
+    Apply cell changes to one CSV like apply_changes(), without pandas.
+    
+    For commands that change a few cells and hold no frame: the CSV is
+    read under its lock, changed by ID and written atomically, with the
+    same journaling.
+    
+    Returns:
+        ({sentence_id: {column: old_value}}, IDs not found in the CSV)
+    """
+    csv_path = Path(csv_path)
+    
+    with csv_lock(csv_path):
+        _recover(csv_path)
+        tx = _begin('update', csv_path, changes=changes)
+        current = dataset_store.source_stamp(csv_path)
+        header, rows = read_rows(csv_path)
+        previous, missing, deltas = _apply_rows(header, rows, changes)
+        if previous:
+            write_rows(csv_path, header, rows)
+            dataset_stats.record_changes(csv_path, current, deltas,
+                                         lambda: dataset_stats.row_records(header, rows))
+        _commit(tx)
+    
+    for sentence_id in missing:
+        logger.warning(f"⚠️  {sentence_id} is no longer in {csv_path.name}, change skipped")
+    return previous, missing
+
+
+@contextmanager
+def locked_append(csv_path: Path, **open_kwargs):
+    """
+    Open a CSV for appending, under its lock and journaled.
+    
+    The starting size is journaled first; the rows are fsynced once when
+    the block ends. If the process dies (or the block raises) before that,
+    the file is cut back to its starting size.
+    
+    Usage:
+        with locked_append(METADATA_FILE, newline='', encoding='utf-8') as f:
+            csv.writer(f).writerows(rows)
+    """
+    csv_path = Path(csv_path)
+    
+    with csv_lock(csv_path):
+        _recover(csv_path)
+        offset = csv_path.stat().st_size
+        tx = _begin('append', csv_path, offset=offset)
+        
+        try:
+            with open(csv_path, 'a', **open_kwargs) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            with open(csv_path, 'r+b') as f:
+                f.truncate(offset)
+            _commit(tx)
+            raise
+        _commit(tx)
+
+
+def replay_journal() -> int:
+    """Replay every pending journal entry; returns the number of CSVs fixed."""
+    csv_paths = sorted({entry['csv'] for entry in pending_entries()})
+    for rel_path in csv_paths:
+        csv_path = BASE_DIR / rel_path
+        with csv_lock(csv_path):
+            _recover(csv_path)
+    return len(csv_paths)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Inspect and replay the dataset write journal',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--pending', action='store_true',
+                        help='List uncommitted journal entries')
+    parser.add_argument('--replay', action='store_true',
+                        help='Replay uncommitted journal entries')
+    args = parser.parse_args()
+    
+    if args.pending:
+        entries = pending_entries()
+        for entry in entries:
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['time']))
+            size = len(entry['changes']) if entry['op'] == 'update' else f"from byte {entry['offset']}"
+            print(f"{when}  {entry['op']:<6}  {entry['csv']}  ({size})")
+        print(f"{len(entries)} pending entries")
+    elif args.replay:
+        fixed = replay_journal()
+        logger.info(f"✅ Journal replayed ({fixed} files)")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
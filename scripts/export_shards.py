@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+Sharded Training Export for Kirundi Dataset
+===========================================
+
+Packs every validated recording and its text into WebDataset tar shards
+that a trainer can stream sequentially, instead of joining CSV rows to
+clip paths and opening one file per sample.
+
+- Each sample is two tar members named after its sentence ID:
+  <ID>.wav (the clip as produced by process_audio.py, 16kHz mono PCM) and
+  <ID>.json (transcription, translations, domain, speaker, duration).
+- Shards are cut at --shard-size MB or --shard-samples samples.
+- With --buckets, samples are grouped by duration first (e.g. 0-3s, 3-6s,
+  6s+), each bucket in its own shards, so batches need little padding.
+- manifest.jsonl lists every sample with its shard, the byte offset and
+  size of its audio inside the tar, and its duration (manifest.parquet as
+  well with --parquet).
+- Shards are built in parallel (--jobs). A shard whose samples did not
+  change since the last export is kept as is; shards that are no longer
+  planned are deleted.
+
+Clips that are not 16kHz mono 16-bit PCM WAV (e.g. mp3 originals) are
+skipped and listed; run them through process_audio.py first.
+
+Usage:
+    python export_shards.py                          # -> export/shards/
+    python export_shards.py --buckets 3,6,10 --jobs 4
+    python export_shards.py --shard-size 256 --output /data/kirundi_wds
+    python export_shards.py --status validated recorded   # Also unreviewed clips
+    python export_shards.py --dry-run                # Show the shard plan only
+
+Dependencies:
+    None (standard library); pyarrow for --parquet
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import csv
+import json
+import time
+import bisect
+import hashlib
+import tarfile
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import dataset_store
+from update_audio_status import read_wav_header, find_header_anomalies
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+EXPORT_DIR = BASE_DIR / "export" / "shards"
+
+SHARD_PREFIX = "kirundi"
+SHARD_MAX_MB = 512  # Shard size limit (audio + metadata)
+SHARD_MAX_SAMPLES = 10000
+EXPORT_STATUSES = ('validated',)
+
+MANIFEST_NAME = "manifest.jsonl"
+INDEX_NAME = "shards.json"  # Per-shard digests, see plan_digest()
+
+# Row columns copied into each sample's .json member
+METADATA_COLUMNS = {
+    'ID': 'id',
+    'Kirundi_Transcription': 'text',
+    'French_Translation': 'french',
+    'English_Translation': 'english',
+    'Domain': 'domain',
+    'Speaker_id': 'speaker',
+    'Age': 'age',
+    'Gender': 'gender',
+}
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_rows(statuses: tuple = EXPORT_STATUSES) -> list:
+    """
+    Rows of every split whose Audio_Status is in statuses, in split order.
+    
+    Each row dictionary gets a 'Split' entry naming its split file.
+    """
+    rows = []
+    if dataset_store.ARROW_AVAILABLE:
+        dataset = dataset_store.load_dataset()
+        if dataset is not None:
+            for status in statuses:
+                rows += dataset_store.filter_rows(dataset, 'Audio_Status', status).to_pylist()
+    else:
+        for csv_path in sorted(SPLITS_DIR.glob("final_dataset_part_*.csv")):
+            with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+                rows += [dict(row, Split=csv_path.name) for row in csv.DictReader(f)
+                         if row['Audio_Status'] in statuses]
+    return rows
+
+
+def collect_samples(rows: list) -> tuple:
+    """
+    Check the clips of the selected rows and describe each sample.
+    
+    Only the WAV headers are read. Rows without a clip, with a missing
+    clip or with a clip in another format are skipped.
+    
+    Returns:
+        (samples sorted by ID, list of (ID, reason) for skipped rows)
+    """
+    samples = {}
+    skipped = []
+    
+    for row in rows:
+        sentence_id = row['ID']
+        if not row.get('File_Path'):
+            skipped.append((sentence_id, 'no File_Path'))
+            continue
+        
+        audio_path = BASE_DIR / row['File_Path']
+        try:
+            stat = audio_path.stat()
+            header = read_wav_header(str(audio_path)) if audio_path.suffix.lower() == '.wav' else None
+        except OSError:
+            skipped.append((sentence_id, f'missing clip {row["File_Path"]}'))
+            continue
+        if header is None:
+            skipped.append((sentence_id, f'not a WAV file: {row["File_Path"]}'))
+            continue
+        anomalies = find_header_anomalies(header)
+        if anomalies:
+            skipped.append((sentence_id, ', '.join(anomalies)))
+            continue
+        
+        metadata = {key: row.get(col, '') for col, key in METADATA_COLUMNS.items()}
+        metadata['duration'] = round(header['duration'], 3)
+        metadata['split'] = row['Split']
+        
+        # Duplicate IDs across splits: the last row wins, as in the ID index
+        samples[sentence_id] = {
+            'key': sentence_id,
+            'audio_path': str(audio_path),
+            'audio_size': stat.st_size,
+            'audio_mtime_ns': stat.st_mtime_ns,
+            'duration': metadata['duration'],
+            'metadata': metadata,
+        }
+    
+    return [samples[key] for key in sorted(samples)], skipped
+
+
+def bucket_label(index: int, bounds: list) -> str:
+    """Name of duration bucket index for the given bucket boundaries."""
+    if not bounds:
+        return ''
+    low = bounds[index - 1] if index > 0 else 0
+    if index == len(bounds):
+        return f"{low:g}s-plus"
+    return f"{low:g}to{bounds[index]:g}s"
+
+
+def plan_shards(samples: list, bounds: list = None, max_bytes: int = SHARD_MAX_MB << 20,
+                max_samples: int = SHARD_MAX_SAMPLES) -> list:
+    """
+    Assign samples to shards.
+    
+    Args:
+        samples: Output of collect_samples()
+        bounds: Ascending duration bucket boundaries in seconds (None: one bucket)
+        max_bytes: Shard size limit; a single larger sample gets its own shard
+        max_samples: Sample count limit per shard
+    
+    Returns:
+        List of {'name', 'bucket', 'samples'} in shard order
+    """
+    bounds = sorted(bounds or [])
+    buckets = {}
+    for sample in samples:
+        buckets.setdefault(bisect.bisect_right(bounds, sample['duration']), []).append(sample)
+    
+    shards = []
+    for index in sorted(buckets):
+        label = bucket_label(index, bounds)
+        prefix = f"{SHARD_PREFIX}-{label}" if label else SHARD_PREFIX
+        current, size = [], 0
+        
+        for sample in buckets[index]:
+            # Tar overhead: two 512-byte headers plus padding per sample
+            sample_bytes = sample['audio_size'] + 2048
+            if current and (size + sample_bytes > max_bytes or len(current) >= max_samples):
+                shards.append({'bucket': label, 'samples': current})
+                current, size = [], 0
+            current.append(sample)
+            size += sample_bytes
+        if current:
+            shards.append({'bucket': label, 'samples': current})
+        
+        for number, shard in enumerate(s for s in shards if s['bucket'] == label):
+            shard['name'] = f"{prefix}-{number:06d}.tar"
+    
+    return shards
+
+
+def plan_digest(shard: dict) -> str:
+    """Fingerprint of a shard's content: sample keys, clip versions and metadata."""
+    digest = hashlib.blake2b(digest_size=16)
+    for sample in shard['samples']:
+        digest.update(json.dumps([sample['key'], sample['audio_size'], sample['audio_mtime_ns'],
+                                  sample['metadata']], sort_keys=True).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _tar_info(name: str, size: int) -> tarfile.TarInfo:
+    """Member header with fixed owner and mtime, so shards are reproducible."""
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mode = 0o644
+    info.mtime = 0
+    return info
+
+
+def build_shard(shard: dict, output_dir: str) -> list:
+    """
+    Write one shard (atomically) and describe its samples.
+    
+    Runs in a worker process.
+    
+    Returns:
+        Manifest entries of the shard's samples, in tar order
+    """
+    output_dir = Path(output_dir)
+    shard_path = output_dir / shard['name']
+    tmp_path = output_dir / f".{shard['name']}.{os.getpid()}.tmp"
+    
+    try:
+        with open(tmp_path, 'wb') as f:
+            with tarfile.open(fileobj=f, mode='w', format=tarfile.USTAR_FORMAT) as tar:
+                for sample in shard['samples']:
+                    with open(sample['audio_path'], 'rb') as audio:
+                        tar.addfile(_tar_info(f"{sample['key']}.wav", sample['audio_size']), audio)
+                    data = json.dumps(sample['metadata'], ensure_ascii=False,
+                                      sort_keys=True).encode('utf-8')
+                    tar.addfile(_tar_info(f"{sample['key']}.json", len(data)), io.BytesIO(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, shard_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    
+    # Member offsets as the tar module laid them out (headers only are read)
+    with tarfile.open(shard_path) as tar:
+        offsets = {member.name: member.offset_data for member in tar}
+    
+    return [{
+        'key': sample['key'],
+        'shard': shard['name'],
+        'bucket': shard['bucket'],
+        'offset': offsets[f"{sample['key']}.wav"],
+        'size': sample['audio_size'],
+        'duration': sample['duration'],
+        'split': sample['metadata']['split'],
+        'domain': sample['metadata']['domain'],
+        'speaker': sample['metadata']['speaker'],
+        'text': sample['metadata']['text'],
+    } for sample in shard['samples']]
+
+
+def load_previous_export(output_dir: Path) -> tuple:
+    """Shard index and manifest entries (grouped per shard) of the last export."""
+    try:
+        with open(output_dir / INDEX_NAME, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}, {}
+    
+    entries = {}
+    try:
+        with open(output_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                entries.setdefault(entry['shard'], []).append(entry)
+    except (OSError, ValueError):
+        return {}, {}
+    return index, entries
+
+
+def _write_atomic(path: Path, lines):
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for line in lines:
+            f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_parquet(path: Path, entries: list):
+    """Write the manifest as Parquet (needs pyarrow)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    pq.write_table(pa.Table.from_pylist(entries), str(tmp_path))
+    os.replace(tmp_path, path)
+
+
+def export_shards(output_dir: Path = EXPORT_DIR, bounds: list = None,
+                  max_bytes: int = SHARD_MAX_MB << 20, max_samples: int = SHARD_MAX_SAMPLES,
+                  statuses: tuple = EXPORT_STATUSES, jobs: int = 1, force: bool = False,
+                  parquet: bool = False, dry_run: bool = False) -> dict:
+    """
+    Export the selected recordings as WebDataset shards.
+    
+    Args:
+        output_dir: Folder for the shards and manifests
+        bounds: Duration bucket boundaries in seconds (None: no bucketing)
+        max_bytes: Shard size limit
+        max_samples: Samples per shard limit
+        statuses: Audio_Status values to export
+        jobs: Worker processes building shards
+        force: Rebuild every shard, even unchanged ones
+        parquet: Also write manifest.parquet
+        dry_run: Only log the shard plan
+    
+    Returns:
+        Dictionary with samples, skipped, shards, built and seconds
+    """
+    start = time.time()
+    output_dir = Path(output_dir)
+    
+    logger.info(f"📂 Loading rows with status {', '.join(statuses)}...")
+    samples, skipped = collect_samples(load_rows(statuses))
+    for sentence_id, reason in skipped:
+        logger.warning(f"⚠️  Skipped {sentence_id}: {reason}")
+    
+    shards = plan_shards(samples, bounds, max_bytes, max_samples)
+    total_seconds = sum(sample['duration'] for sample in samples)
+    logger.info(f"   {len(samples)} samples ({total_seconds / 3600:.2f}h) in {len(shards)} shards, "
+                f"{len(skipped)} rows skipped")
+    result = {'samples': len(samples), 'skipped': len(skipped), 'shards': len(shards),
+              'built': 0, 'seconds': round(total_seconds, 2)}
+    
+    if dry_run:
+        for shard in shards:
+            seconds = sum(sample['duration'] for sample in shard['samples'])
+            size = sum(sample['audio_size'] for sample in shard['samples'])
+            logger.info(f"   {shard['name']}: {len(shard['samples'])} samples, "
+                        f"{seconds:.1f}s, {size / (1 << 20):.1f} MB")
+        return result
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    previous_index, previous_entries = ({}, {}) if force else load_previous_export(output_dir)
+    
+    index = {}
+    to_build = []
+    for shard in shards:
+        digest = plan_digest(shard)
+        index[shard['name']] = {
+            'digest': digest,
+            'bucket': shard['bucket'],
+            'samples': len(shard['samples']),
+            'seconds': round(sum(sample['duration'] for sample in shard['samples']), 2),
+        }
+        unchanged = (previous_index.get(shard['name'], {}).get('digest') == digest
+                     and shard['name'] in previous_entries
+                     and (output_dir / shard['name']).exists())
+        if not unchanged:
+            to_build.append(shard)
+    
+    logger.info(f"🔨 Building {len(to_build)} shards "
+                f"({len(shards) - len(to_build)} unchanged) with {jobs} worker(s)")
+    built = {}
+    if jobs > 1 and len(to_build) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(build_shard, shard, str(output_dir)) for shard in to_build]
+            for shard, future in zip(to_build, futures):
+                built[shard['name']] = future.result()
+                logger.info(f"   ✅ {shard['name']}")
+    else:
+        for shard in to_build:
+            built[shard['name']] = build_shard(shard, str(output_dir))
+            logger.info(f"   ✅ {shard['name']}")
+    
+    entries = []
+    for shard in shards:
+        entries += built.get(shard['name']) or previous_entries[shard['name']]
+    
+    # The manifest and index are replaced only once every shard is in place
+    _write_atomic(output_dir / MANIFEST_NAME,
+                  (json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+    _write_atomic(output_dir / INDEX_NAME, [json.dumps(index, indent=2) + '\n'])
+    if parquet:
+        write_parquet(output_dir / "manifest.parquet", entries)
+    else:
+        # Never leave a Parquet manifest of an older export next to the new one
+        (output_dir / "manifest.parquet").unlink(missing_ok=True)
+    
+    # Shards of an older plan (e.g. other bucket boundaries)
+    for stale in sorted(output_dir.glob(f"{SHARD_PREFIX}-*.tar")):
+        if stale.name not in index:
+            stale.unlink()
+            logger.info(f"   🗑️  Removed old shard {stale.name}")
+    
+    result['built'] = len(to_build)
+    logger.info(f"✅ Exported {len(entries)} samples to {output_dir} "
+                f"in {time.time() - start:.1f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Export recordings as WebDataset tar shards with a manifest',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--output', '-o', default=str(EXPORT_DIR),
+                        help=f'Output folder (default: {EXPORT_DIR.relative_to(BASE_DIR)})')
+    parser.add_argument('--buckets', metavar='SECONDS',
+                        help='Duration bucket boundaries, e.g. 3,6,10')
+    parser.add_argument('--shard-size', type=int, default=SHARD_MAX_MB, metavar='MB',
+                        help=f'Maximum shard size in MB (default: {SHARD_MAX_MB})')
+    parser.add_argument('--shard-samples', type=int, default=SHARD_MAX_SAMPLES,
+                        help=f'Maximum samples per shard (default: {SHARD_MAX_SAMPLES})')
+    parser.add_argument('--status', nargs='+', default=list(EXPORT_STATUSES),
+                        help='Audio_Status values to export (default: validated)')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes building shards (0 = all CPU cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild every shard, even unchanged ones')
+    parser.add_argument('--parquet', action='store_true',
+                        help='Also write manifest.parquet (needs pyarrow)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only show the shard plan')
+    args = parser.parse_args()
+    
+    try:
+        bounds = [float(b) for b in args.buckets.split(',')] if args.buckets else None
+    except ValueError:
+        parser.error('--buckets takes comma-separated seconds, e.g. 3,6,10')
+    if args.parquet and not dataset_store.ARROW_AVAILABLE:
+        parser.error('--parquet needs pyarrow: pip install pyarrow')
+    
+    export_shards(
+        Path(args.output),
+        bounds=bounds,
+        max_bytes=args.shard_size << 20,
+        max_samples=args.shard_samples,
+        statuses=tuple(args.status),
+        jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        force=args.force,
+        parquet=args.parquet,
+        dry_run=args.dry_run
+    )
+
+
+if __name__ == "__main__":
+    main()
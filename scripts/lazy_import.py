@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Deferred Imports for the Kirundi Dataset Scripts
+================================================
+
+pandas, pyarrow, numpy, librosa, scipy and noisereduce together take one
+to two seconds to import, which every command used to pay at startup,
+even --help or a single status change. The scripts bind them through
+lazy_import() instead: the name is available at module level as usual,
+but the module only executes on first attribute access, so a command
+only pays for the libraries its code path actually uses.
+
+Modules using this should start with `from __future__ import annotations`,
+otherwise annotations such as `-> pd.DataFrame` load the module when the
+function is defined.
+
+Usage:
+    from lazy_import import lazy_import
+    pd = lazy_import('pandas')       # Nothing imported yet
+    df = pd.read_csv(path)           # pandas is imported here
+
+Run `python bench_startup.py` to see the startup time of each command.
+"""
+
+import sys
+import importlib.util
+
+
+def is_installed(name: str) -> bool:
+    """True if a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name: str):
+    """
+    Return a module whose import runs on first attribute access.
+    
+    Args:
+        name: Top-level module name (e.g. 'pandas'); submodules such as
+              pyarrow.compute are imported where they are used instead
+    
+    Returns:
+        The module (already imported if some other code loaded it)
+    
+    Raises:
+        ImportError: The module is not installed
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
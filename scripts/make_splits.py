@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Split Generation for Kirundi Dataset
+====================================
+
+Builds the recording batches in final_dataset_splits/ from metadata.csv:
+
+- Sentences of metadata.csv that are in no split yet (compared in their
+  normalized form, see text_dedup.py) get the next free IDs
+  (krd_NNNNNN_domain) and are added as new batches.
+- Every batch gets the same share of each domain (±1 sentence) and about
+  the same estimated reading time. The reading time of a sentence is
+  estimated from its word and character counts (word_count/char_count of
+  metadata.csv).
+- With --resplit, the sentences still 'pending' in the splits are pooled
+  with the new ones and dealt into batches again. Recorded, validated and
+  rejected rows never move and keep their IDs; a split left with only
+  those rows keeps its number, emptied splits are reused for new batches.
+
+Batches are dealt per domain, longest sentences first: each round gives
+one sentence to every batch, the longest to the batch with the least
+reading time so far. This stays fast (n log k) for 100k+ sentences.
+
+All splits are locked while they are rewritten (dataset_writer.py), and
+files gaining rows are written before files losing rows, so an interrupted
+run can only leave a pending row in two splits; running --resplit again
+removes the extra copy. The statistics of the rewritten splits
+(dataset_stats.py) are counted from the rows as written.
+
+Usage:
+    python make_splits.py --dry-run      # Preview the batches
+    python make_splits.py                # Add new metadata sentences as batches
+    python make_splits.py --resplit      # Also re-deal every pending sentence
+    python make_splits.py --resplit --keep-started   # Leave started splits alone
+    python make_splits.py --batch-minutes 15
+
+Then run render_sheets.py to reissue the recording sheets of the changed splits.
+"""
+
+from __future__ import annotations
+
+import re
+import math
+import argparse
+import logging
+from pathlib import Path
+from contextlib import ExitStack
+
+import dataset_store
+import dataset_stats
+import dataset_writer
+from text_dedup import sentence_key
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+METADATA_FILE = BASE_DIR / "metadata.csv"
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+SPLIT_NAME = "final_dataset_part_{:03d}.csv"
+
+SPLIT_COLUMNS = ['ID', 'File_Path', 'Kirundi_Transcription', 'French_Translation',
+                 'English_Translation', 'Domain', 'Machine_Suggestion', 'Source',
+                 'Duration', 'Speaker_id', 'Age', 'Gender', 'Audio_Status']
+
+# Reading time model (seconds), per sentence plus per word and character
+SECONDS_PER_SENTENCE = 1.0
+SECONDS_PER_WORD = 0.3
+SECONDS_PER_CHAR = 0.04
+
+BATCH_MINUTES = 10  # Estimated reading time of one batch
+DEFAULT_DOMAIN = 'general'
+
+ID_NUMBER = re.compile(r'^krd_(\d+)_')
+SPLIT_NUMBER = re.compile(r'final_dataset_part_(\d+)\.csv$')
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def _count(value: str):
+    """word_count/char_count cell as int, None if empty or invalid."""
+    try:
+        return int(float(value))
+    except ValueError:
+        return None
+
+
+def reading_seconds(text: str, words: str = '', chars: str = '') -> float:
+    """Estimated reading time of a sentence; counts are computed if missing."""
+    words = _count(words)
+    chars = _count(chars)
+    if words is None:
+        words = len(text.split())
+    if chars is None:
+        chars = len(text)
+    return SECONDS_PER_SENTENCE + words * SECONDS_PER_WORD + chars * SECONDS_PER_CHAR
+
+
+def id_domain(domain: str) -> str:
+    """Domain as it appears in an ID (lowercase letters and hyphens)."""
+    slug = re.sub(r'[^a-z]+', '-', domain.strip().lower()).strip('-')
+    return slug or DEFAULT_DOMAIN
+
+
+def split_number(csv_path: Path) -> int:
+    return int(SPLIT_NUMBER.search(Path(csv_path).name).group(1))
+
+
+def id_number(sentence_id: str) -> int:
+    """Sequence number of an ID, 0 for IDs not in the krd_NNNNNN_domain form."""
+    match = ID_NUMBER.match(sentence_id)
+    return int(match.group(1)) if match else 0
+
+
+def read_splits() -> dict:
+    """Every split as (header, rows), from dataset_writer.read_rows()."""
+    return {csv_path: dataset_writer.read_rows(csv_path)
+            for csv_path in dataset_stats.split_files()}
+
+
+def new_sentences(split_rows: dict, header: list) -> list:
+    """
+    Sentences of metadata.csv not in any split yet, as split rows.
+    
+    Returns:
+        List of (seconds, domain, row) in metadata order, without IDs yet
+    """
+    known = set()
+    for split_header, rows in split_rows.values():
+        text_column = split_header.index('Kirundi_Transcription')
+        known.update(sentence_key(row[text_column]) for row in rows)
+    
+    if not METADATA_FILE.exists():
+        return []
+    meta_header, meta_rows = dataset_writer.read_rows(METADATA_FILE)
+    positions = {col: i for i, col in enumerate(meta_header)}
+    
+    def cell(row, col):
+        return row[positions[col]] if col in positions else ''
+    
+    sentences = []
+    for meta_row in meta_rows:
+        text = cell(meta_row, 'Kirundi_Transcription').strip()
+        key = sentence_key(text) if text else None
+        if key is None or key in known:
+            continue
+        known.add(key)
+        
+        row = [cell(meta_row, col) for col in header]
+        row[header.index('Kirundi_Transcription')] = text
+        row[header.index('Audio_Status')] = 'pending'
+        seconds = reading_seconds(text, cell(meta_row, 'word_count'), cell(meta_row, 'char_count'))
+        sentences.append((seconds, cell(meta_row, 'Domain'), row))
+    return sentences
+
+
+def deal_batches(pool: list, n_batches: int, id_column: int = 0) -> list:
+    """
+    Deal (seconds, domain, row) items into n_batches balanced batches.
+    
+    Per domain, longest first, in rounds of n_batches items: the longest
+    item of a round goes to the batch with the least reading time so far,
+    the next to the second least, and so on.
+    
+    Returns:
+        List of n_batches lists of rows, each in ID order
+    """
+    by_domain = {}
+    for item in pool:
+        by_domain.setdefault(item[1], []).append(item)
+    
+    batches = [[] for _ in range(n_batches)]
+    loads = [0.0] * n_batches
+    # Large domains first, so the small ones even out what is left
+    for domain in sorted(by_domain, key=lambda d: (-len(by_domain[d]), d)):
+        # Ties broken by ID, so dealing the same pool again gives the same batches
+        items = sorted(by_domain[domain], key=lambda item: (-item[0], id_number(item[2][id_column])))
+        for start in range(0, len(items), n_batches):
+            lightest = sorted(range(n_batches), key=loads.__getitem__)
+            for batch, (seconds, _, row) in zip(lightest, items[start:start + n_batches]):
+                batches[batch].append(row)
+                loads[batch] += seconds
+    
+    for batch in batches:
+        batch.sort(key=lambda row: id_number(row[id_column]))
+    return batches
+
+
+def plan_splits(split_rows: dict, resplit: bool = False, keep_started: bool = False,
+                batch_minutes: float = BATCH_MINUTES) -> dict:
+    """
+    Decide the new content of every split.
+    
+    Args:
+        split_rows: Output of read_splits()
+        resplit: Pool and re-deal every pending row
+        keep_started: With resplit, leave splits with any non-pending row
+                      untouched
+        batch_minutes: Estimated reading time of one batch
+    
+    Returns:
+        {'header', 'write': {csv_path: rows}, 'delete': [csv_path],
+         'new': n new sentences, 'pooled': n pending rows re-dealt,
+         'batches': [estimated minutes of each dealt batch]}
+    """
+    header = next(iter(split_rows.values()))[0] if split_rows else list(SPLIT_COLUMNS)
+    id_column = header.index('ID')
+    text_column = header.index('Kirundi_Transcription')
+    status_column = header.index('Audio_Status')
+    domain_column = header.index('Domain')
+    
+    # Rows that stay where they are, and pending rows to deal again
+    kept = {}
+    pool = []
+    placed = set()
+    for csv_path, (split_header, rows) in split_rows.items():
+        if split_header != header:
+            raise ValueError(f"{csv_path.name} has different columns than the other splits")
+        started = any(row[status_column] != 'pending' for row in rows)
+        movable = resplit and not (keep_started and started)
+        kept[csv_path] = [row for row in rows if not movable or row[status_column] != 'pending']
+        placed.update(row[id_column] for row in kept[csv_path])
+        if movable:
+            pool += [row for row in rows if row[status_column] == 'pending']
+    
+    # A pending copy of a row that is also kept elsewhere (interrupted run)
+    # is dropped, as is the second copy of a pooled row
+    unique_pool = []
+    for row in pool:
+        if row[id_column] not in placed:
+            placed.add(row[id_column])
+            unique_pool.append((reading_seconds(row[text_column]), row[domain_column], row))
+    pooled = len(unique_pool)
+    
+    next_number = max(map(id_number, placed), default=0) + 1
+    sentences = new_sentences(split_rows, header)
+    for i, (_, domain, row) in enumerate(sentences):
+        row[id_column] = f"krd_{next_number + i:06d}_{id_domain(domain)}"
+    unique_pool += sentences
+    
+    plan = {'header': header, 'write': {}, 'delete': [], 'new': len(sentences),
+            'pooled': pooled, 'batches': []}
+    if not unique_pool:
+        return plan
+    
+    total_seconds = sum(item[0] for item in unique_pool)
+    n_batches = max(1, math.ceil(total_seconds / (batch_minutes * 60)))
+    batches = deal_batches(unique_pool, n_batches, id_column)
+    seconds = {id(row): s for s, _, row in unique_pool}
+    plan['batches'] = [sum(seconds[id(row)] for row in batch) / 60 for batch in batches]
+    
+    # Emptied splits take the first batches, new files the rest
+    free = sorted((p for p, rows in kept.items() if not rows), key=split_number)
+    last = max(map(split_number, split_rows), default=0)
+    targets = free + [SPLITS_DIR / SPLIT_NAME.format(last + i + 1)
+                      for i in range(max(0, n_batches - len(free)))]
+    new_content = {p: rows for p, rows in kept.items() if rows}
+    new_content.update(zip(targets, batches))
+    
+    for csv_path, rows in new_content.items():
+        if csv_path not in split_rows or split_rows[csv_path][1] != rows:
+            plan['write'][csv_path] = rows
+    plan['delete'] = [p for p in split_rows if p not in new_content]
+    return plan
+
+
+def check_ids(plan: dict, split_rows: dict) -> list:
+    """IDs that would be lost or duplicated by plan (should be empty)."""
+    id_column = plan['header'].index('ID')
+    before = {row[id_column] for _, rows in split_rows.values() for row in rows}
+    after = []
+    for csv_path, (_, rows) in split_rows.items():
+        if csv_path not in plan['write'] and csv_path not in plan['delete']:
+            after += [row[id_column] for row in rows]
+    for rows in plan['write'].values():
+        after += [row[id_column] for row in rows]
+    
+    seen, problems = set(), []
+    for sentence_id in after:
+        if sentence_id in seen:
+            problems.append(f"{sentence_id} (duplicated)")
+        seen.add(sentence_id)
+    problems += [f"{sentence_id} (lost)" for sentence_id in sorted(before - seen)]
+    return problems
+
+
+def apply_plan(plan: dict, split_rows: dict):
+    """Write the splits of a plan; call with every split's lock held."""
+    header = plan['header']
+    id_column = header.index('ID')
+    gaining, losing = [], []
+    for csv_path, rows in sorted(plan['write'].items()):
+        old_ids = {row[id_column] for row in split_rows.get(csv_path, ([], []))[1]}
+        (gaining if any(row[id_column] not in old_ids for row in rows) else losing).append(csv_path)
+    
+    # Additions first: a crash leaves duplicates (repaired), never lost rows
+    for csv_path in gaining + losing:
+        dataset_writer.write_rows(csv_path, header, plan['write'][csv_path])
+    for csv_path in plan['delete']:
+        csv_path.unlink()
+        dataset_store.store_path(csv_path).unlink(missing_ok=True)
+    
+    # Counted from the rows in memory, with one stats.json write for all
+    with dataset_stats.stats_lock():
+        stats = dataset_stats.load_stats()
+        for csv_path, rows in plan['write'].items():
+            stats['splits'][csv_path.name] = dataset_stats.count_records(
+                dataset_stats.row_records(header, rows), dataset_store.source_stamp(csv_path))
+        for csv_path in plan['delete']:
+            stats['splits'].pop(csv_path.name, None)
+        dataset_stats.save_stats(stats)
+
+
+def make_splits(resplit: bool = False, keep_started: bool = False,
+                batch_minutes: float = BATCH_MINUTES, dry_run: bool = False) -> dict:
+    """
+    Plan and write the splits under their locks.
+    
+    Returns:
+        The plan from plan_splits()
+    """
+    dataset_writer.replay_journal()
+    SPLITS_DIR.mkdir(parents=True, exist_ok=True)
+    
+    with ExitStack() as locks:
+        # The new files' locks too, so nobody creates them meanwhile; all
+        # in name order, like every other multi-split writer
+        paths = set(dataset_stats.split_files())
+        last = max(map(split_number, paths), default=0)
+        for csv_path in sorted(paths):
+            locks.enter_context(dataset_writer.csv_lock(csv_path))
+        
+        split_rows = read_splits()
+        plan = plan_splits(split_rows, resplit, keep_started, batch_minutes)
+        for csv_path in sorted(plan['write']):
+            if split_number(csv_path) > last:
+                locks.enter_context(dataset_writer.csv_lock(csv_path))
+        
+        problems = check_ids(plan, split_rows)
+        if problems:
+            raise RuntimeError(f"Split plan would break the ID index: {', '.join(problems[:10])}")
+        if not dry_run:
+            apply_plan(plan, split_rows)
+    
+    return plan
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Build balanced recording batches from metadata.csv',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--resplit', action='store_true',
+                        help='Re-deal every pending sentence, not only new ones')
+    parser.add_argument('--keep-started', action='store_true',
+                        help='With --resplit: leave splits with recordings untouched')
+    parser.add_argument('--batch-minutes', type=float, default=BATCH_MINUTES,
+                        help=f'Estimated reading time per batch (default: {BATCH_MINUTES})')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Preview the batches without writing')
+    args = parser.parse_args()
+    
+    plan = make_splits(args.resplit, args.keep_started, args.batch_minutes, args.dry_run)
+    
+    logger.info(f"📊 {plan['new']} new sentences, {plan['pooled']} pending sentences re-dealt")
+    if plan['batches']:
+        logger.info(f"📦 {len(plan['batches'])} batches of "
+                    f"{min(plan['batches']):.1f}-{max(plan['batches']):.1f} min estimated reading time")
+    if not plan['write'] and not plan['delete']:
+        logger.info("✅ Splits are up to date")
+        return
+    
+    for csv_path, rows in sorted(plan['write'].items()):
+        logger.info(f"   {csv_path.name}: {len(rows)} sentences")
+    for csv_path in plan['delete']:
+        logger.info(f"   {csv_path.name}: removed")
+    
+    if args.dry_run:
+        logger.info("[DRY RUN - no splits written]")
+    else:
+        logger.info(f"✅ Wrote {len(plan['write'])} splits, removed {len(plan['delete'])}")
+        logger.info("📄 Run render_sheets.py to reissue their recording sheets")
+
+
+if __name__ == "__main__":
+    main()
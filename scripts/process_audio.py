@@ -11,6 +11,13 @@ Processing steps:
 2. Normalization - Unify volume levels
 3. Denoising - Remove background noise
 
+Clips named [DATE]_[SPEAKER]_... share one noise profile per speaker and
+date, estimated once and cached in .cache/noise_profiles/. A profile is
+estimated again when its settings or one of its source clips change.
+
+Session segmentation (--segment) splits one recording of a whole split CSV
+into one clip per pending sentence, named for update_audio_status.py.
+
 Audio specifications (from project guidelines):
 - Format: WAV (16-bit PCM)
 - Sample rate: 16kHz
@@ -21,29 +28,47 @@ Usage:
     python process_audio.py <input_file>
     python process_audio.py <input_file> --output <output_file>
     python process_audio.py --batch <input_folder> --output <output_folder>
+    python process_audio.py --batch <input_folder> --output <output_folder> --jobs 4
+    python process_audio.py <long_recording> --output <output_file> --stream
+    python process_audio.py <session_file> --segment <split_csv> --speaker <speaker_id>
+
+The audio libraries are imported on first use (see lazy_import.py), so
+--help and argument errors return at once.
 
 Dependencies:
     pip install librosa soundfile noisereduce numpy scipy
 """
 
+from __future__ import annotations
+
 import os
+import csv
+import json
+import math
+import hashlib
+import itertools
+import tempfile
 import argparse
 import logging
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from pathlib import Path
 from typing import Optional, Tuple
 
-import numpy as np
-import librosa
-import soundfile as sf
+import dataset_store
+from lazy_import import lazy_import, is_installed
+from update_audio_status import parse_filename, FILENAME_PATTERN
+
+# Imported on first use, see lazy_import.py
+np = lazy_import('numpy')
+librosa = lazy_import('librosa')
+sf = lazy_import('soundfile')
 
-# Try to import noisereduce, provide helpful message if not installed
-try:
-    import noisereduce as nr
-    NOISEREDUCE_AVAILABLE = True
-except ImportError:
-    NOISEREDUCE_AVAILABLE = False
-    print("⚠️  noisereduce not installed. Denoising will be skipped.")
-    print("   Install with: pip install noisereduce")
+# noisereduce is optional: without it denoising is skipped
+NOISEREDUCE_AVAILABLE = is_installed('noisereduce')
+if NOISEREDUCE_AVAILABLE:
+    nr = lazy_import('noisereduce')
 
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
@@ -57,6 +82,33 @@ TARGET_CHANNELS = 1  # Mono
 SILENCE_THRESHOLD_DB = -30  # dB threshold for VAD
 PEAK_NORMALIZE_DB = -0.1  # Target peak level
 
+# Batch processing
+MAX_IN_FLIGHT_PER_JOB = 2  # Queued files per worker, caps decoded audio in memory
+MANIFEST_NAME = ".process_manifest.json"  # Per output folder, see process_batch()
+MANIFEST_SAVE_EVERY = 20  # Results between manifest writes (in-place results: every one)
+NOISE_SAMPLE_DURATION = 0.5  # Seconds at the start of a clip used as noise profile
+
+# Streaming mode (long recordings), see process_audio_streaming()
+STREAM_BLOCK_SECONDS = 30  # Audio held in memory per block
+STREAM_CONTEXT_SECONDS = 0.5  # Overlap on each side of a block while denoising
+DENOISE_N_FFT = 1024  # noisereduce's STFT window
+DENOISE_HOP_LENGTH = DENOISE_N_FFT // 4  # and its hop; streamed blocks are cut on it
+TRIM_FRAME_LENGTH = 2048  # Same framing as librosa.effects.trim
+TRIM_HOP_LENGTH = 512
+
+# Noise profiles shared by all clips of one speaker/recording session
+NOISE_PROFILE_DIR = BASE_DIR / ".cache" / "noise_profiles"
+NOISE_PROFILE_SECONDS = 1.0  # Length of a stored profile
+NOISE_PROFILE_CLIPS = 3  # Clips of a session pooled when estimating its profile
+NOISE_PROFILE_QUANTILE = 0.2  # Only frames in the quietest 20% are treated as noise
+NOISE_PROFILE_VERSION = 1  # Bump when estimate_noise_profile() changes, so profiles are estimated again
+
+# Session segmentation (one long recording -> one clip per sentence)
+SEGMENT_FRAME_SECONDS = 0.01  # 10ms energy frames
+SEGMENT_MIN_PAUSE = 0.6  # Silence (s) that separates two sentences
+SEGMENT_MIN_UTTERANCE = 0.3  # Shorter bursts (clicks, breaths) are dropped
+SEGMENT_PADDING = 0.15  # Silence (s) kept around each utterance
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -116,6 +168,87 @@ def trim_silence(audio: np.ndarray, sr: int, threshold_db: float = SILENCE_THRES
     return trimmed_audio
 
 
+def find_utterances(
+    audio: np.ndarray,
+    sr: int,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    min_pause: float = SEGMENT_MIN_PAUSE,
+    min_utterance: float = SEGMENT_MIN_UTTERANCE,
+    padding: float = SEGMENT_PADDING
+) -> list:
+    """
+    Split a long recording at pauses (energy-based VAD).
+    
+    Frame energies are computed in one vectorized pass, so an hour of
+    audio is segmented in well under a second once loaded.
+    
+    Args:
+        audio: Audio data as numpy array
+        sr: Sample rate
+        threshold_db: Silence threshold in dB relative to the loudest frame
+        min_pause: Shortest silence (s) treated as a sentence boundary
+        min_utterance: Shortest utterance (s) kept
+        padding: Silence (s) kept before and after each utterance
+        
+    Returns:
+        List of (start_sample, end_sample) tuples in recording order
+    """
+    frame = max(1, int(SEGMENT_FRAME_SECONDS * sr))
+    n_frames = len(audio) // frame
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return utterances_from_rms(rms, len(audio), sr, threshold_db, min_pause, min_utterance, padding)
+
+
+def utterances_from_rms(
+    rms: np.ndarray,
+    n_samples: int,
+    sr: int,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    min_pause: float = SEGMENT_MIN_PAUSE,
+    min_utterance: float = SEGMENT_MIN_UTTERANCE,
+    padding: float = SEGMENT_PADDING
+) -> list:
+    """
+    find_utterances() from the RMS of consecutive SEGMENT_FRAME_SECONDS
+    frames, for callers that computed them block by block.
+    
+    Args:
+        rms: RMS of each frame
+        n_samples: Length of the recording
+        
+    Returns:
+        List of (start_sample, end_sample) tuples in recording order
+    """
+    frame = max(1, int(SEGMENT_FRAME_SECONDS * sr))
+    if len(rms) == 0 or rms.max() == 0:
+        return []
+    
+    voiced = rms > rms.max() * 10 ** (-abs(threshold_db) / 20)
+    
+    # Run boundaries of the voiced mask
+    edges = np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    
+    # Merge runs separated by less than min_pause
+    keep_break = (starts[1:] - ends[:-1]) >= min_pause / SEGMENT_FRAME_SECONDS
+    starts = starts[np.concatenate([[True], keep_break])]
+    ends = ends[np.concatenate([keep_break, [True]])]
+    
+    # Drop clicks and breaths
+    long_enough = (ends - starts) >= min_utterance / SEGMENT_FRAME_SECONDS
+    starts, ends = starts[long_enough], ends[long_enough]
+    
+    pad = int(padding * sr)
+    start_samples = np.maximum(starts * frame - pad, 0)
+    end_samples = np.minimum(ends * frame + pad, n_samples)
+    
+    return list(zip(start_samples.tolist(), end_samples.tolist()))
+
+
 def normalize_audio(audio: np.ndarray, target_db: float = PEAK_NORMALIZE_DB) -> np.ndarray:
     """
     Normalize audio to target peak level.
@@ -153,16 +286,332 @@ def normalize_audio(audio: np.ndarray, target_db: float = PEAK_NORMALIZE_DB) ->
     return normalized
 
 
-def denoise_audio(audio: np.ndarray, sr: int, noise_sample_duration: float = 0.5) -> np.ndarray:
+def find_trim_bounds(hop_energy: np.ndarray, n_samples: int, threshold_db: float) -> Tuple[int, int]:
+    """
+    Find trim boundaries from per-hop energies (vectorized).
+    
+    Reproduces librosa.effects.trim: centered RMS frames of
+    TRIM_FRAME_LENGTH every TRIM_HOP_LENGTH samples, kept when within
+    |threshold_db| of the loudest frame.
+    
+    Args:
+        hop_energy: Sum of squares of each TRIM_HOP_LENGTH-sample hop
+        n_samples: Total number of samples
+        threshold_db: Silence threshold in dB
+        
+    Returns:
+        (start, end) sample indices of the non-silent region
+    """
+    hops_per_frame = TRIM_FRAME_LENGTH // TRIM_HOP_LENGTH
+    n_frames = 1 + n_samples // TRIM_HOP_LENGTH
+    
+    # Frame t covers hops t-2 .. t+1 (centered, zero padded)
+    padded = np.concatenate([
+        np.zeros(hops_per_frame // 2),
+        hop_energy,
+        np.zeros(n_frames + hops_per_frame)
+    ])
+    window = np.convolve(padded, np.ones(hops_per_frame), mode='valid')[:n_frames]
+    rms = np.sqrt(window / TRIM_FRAME_LENGTH)
+    
+    if rms.max() == 0:
+        return 0, 0
+    
+    non_silent = np.flatnonzero(rms > rms.max() * 10 ** (-abs(threshold_db) / 20))
+    start = int(non_silent[0]) * TRIM_HOP_LENGTH
+    end = min(n_samples, (int(non_silent[-1]) + 1) * TRIM_HOP_LENGTH)
+    return start, end
+
+
+def finalize_audio(
+    audio: np.ndarray,
+    sr: int,
+    do_trim: bool = True,
+    do_normalize: bool = True,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    target_db: float = PEAK_NORMALIZE_DB
+) -> np.ndarray:
+    """
+    Trim, normalize and convert to 16-bit PCM in one fused pass.
+    
+    Equivalent to trim_silence() + normalize_audio() + sf.write(PCM_16),
+    but the only full-length allocation is the int16 output: trim bounds
+    and peak come from one strided pass over hop blocks, and gain, clip
+    and quantization run chunk by chunk through a small scratch buffer.
+    
+    Args:
+        audio: Audio data as numpy array (float)
+        sr: Sample rate
+        do_trim: Whether to trim silence
+        do_normalize: Whether to normalize volume
+        threshold_db: Silence threshold in dB
+        target_db: Target peak level in dB
+        
+    Returns:
+        Processed audio as int16 samples, ready to write as PCM_16
+    """
+    hop = TRIM_HOP_LENGTH
+    n = len(audio)
+    full = n // hop * hop
+    
+    # One pass over hop-sized rows: energy for trimming, peak for gain
+    hops = audio[:full].reshape(-1, hop)
+    tail = audio[full:]
+    hop_energy = np.einsum('ij,ij->i', hops, hops, dtype=np.float64)
+    hop_peak = np.maximum(hops.max(axis=1, initial=0), -hops.min(axis=1, initial=0))
+    if len(tail):
+        hop_energy = np.append(hop_energy, np.dot(tail, tail))
+        hop_peak = np.append(hop_peak, np.abs(tail).max())
+    
+    start, end = 0, n
+    if do_trim:
+        logger.info(f"🔇 Trimming silence (threshold: {threshold_db}dB)")
+        start, end = find_trim_bounds(hop_energy, n, threshold_db)
+        logger.info(f"   Trimmed {(n - (end - start)) / sr:.2f}s of silence")
+        logger.info(f"   New duration: {(end - start) / sr:.2f}s")
+    
+    # float -> int16: scale by 0x7FFF, clip and round
+    scale = 32767.0
+    if do_normalize:
+        logger.info(f"📊 Normalizing audio (target peak: {target_db}dB)")
+        current_peak = hop_peak[start // hop:-(-end // hop)].max() if end > start else 0
+        if current_peak == 0:
+            logger.warning("   Audio is silent, skipping normalization")
+        else:
+            scale *= 10 ** (target_db / 20) / current_peak
+            logger.info(f"   Peak adjusted from {20 * np.log10(current_peak):.1f}dB to {target_db}dB")
+    
+    out = np.empty(end - start, dtype=np.int16)
+    chunk = 1 << 16
+    scratch = np.empty(min(chunk, len(out)), dtype=np.float32)
+    for pos in range(0, len(out), chunk):
+        size = min(chunk, len(out) - pos)
+        buf = scratch[:size]
+        np.multiply(audio[start + pos:start + pos + size], scale, out=buf, casting='unsafe')
+        np.clip(buf, -32767.0, 32767.0, out=buf)
+        np.rint(buf, out=buf)
+        out[pos:pos + size] = buf
+    
+    return out
+
+
+def session_key(file_path: str) -> Optional[str]:
+    """
+    Identify the recording session of a clip from its filename.
+    
+    Returns:
+        "<SPEAKER>_<DATE>" for names following the clip convention, else None
+    """
+    parsed = parse_filename(Path(file_path).name)
+    if parsed is None or not parsed['speaker_id'] or not parsed['date']:
+        return None
+    return f"{parsed['speaker_id']}_{parsed['date']}"
+
+
+def estimate_noise_profile(clips: list, sr: int, duration: float = NOISE_PROFILE_SECONDS) -> Optional[np.ndarray]:
+    """
+    Estimate a noise profile from the quietest frames of one or more clips.
+    
+    Args:
+        clips: Audio arrays from the same session
+        sr: Sample rate
+        duration: Length of the profile in seconds
+        
+    Returns:
+        Noise samples (float32), or None if the clips hold no usable noise
+    """
+    frame = max(1, int(SEGMENT_FRAME_SECONDS * 2 * sr))
+    frames = np.concatenate([
+        audio[:len(audio) // frame * frame].reshape(-1, frame) for audio in clips
+    ]) if clips else np.zeros((0, frame))
+    
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    audible = rms > 0  # Digital silence says nothing about the room
+    if not audible.any():
+        return None
+    
+    cutoff = np.quantile(rms[audible], NOISE_PROFILE_QUANTILE)
+    quiet = frames[audible & (rms <= cutoff)]
+    
+    n_frames = max(1, int(duration * sr) // frame)
+    return quiet[:n_frames].reshape(-1).astype(np.float32)
+
+
+def noise_profile_params() -> dict:
+    """Settings that determine an estimated profile, stored next to it."""
+    return {
+        'version': NOISE_PROFILE_VERSION,
+        'sample_rate': TARGET_SAMPLE_RATE,
+        'seconds': NOISE_PROFILE_SECONDS,
+        'clips': NOISE_PROFILE_CLIPS,
+        'quantile': NOISE_PROFILE_QUANTILE,
+        'frame_seconds': SEGMENT_FRAME_SECONDS * 2
+    }
+
+
+def load_noise_profile_info(key: str) -> Optional[dict]:
+    """
+    Read what a cached profile was estimated from.
+    
+    Returns:
+        {'params', 'sources': {clip name: file_hash}, 'digest'}, or None if
+        there is no profile or it was estimated with other settings
+    """
+    info_path = NOISE_PROFILE_DIR / f"{key}.json"
+    try:
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if info.get('params') != noise_profile_params():
+        return None
+    if not (NOISE_PROFILE_DIR / f"{key}.npy").exists():
+        return None
+    return info
+
+
+def load_noise_profile(key: str) -> Optional[np.ndarray]:
+    """Load a cached session noise profile, None if there is none or it is stale."""
+    if load_noise_profile_info(key) is None:
+        return None
+    return np.load(NOISE_PROFILE_DIR / f"{key}.npy")
+
+
+def save_noise_profile(key: str, profile: np.ndarray, sources: dict):
+    """
+    Cache a session noise profile (atomic, safe with parallel workers).
+    
+    The profile's settings, source clip hashes and digest are written
+    after it to <key>.json; a profile without them counts as missing.
+    """
+    NOISE_PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_path = NOISE_PROFILE_DIR / f"{key}.npy"
+    tmp_path = profile_path.with_name(f"{key}.{os.getpid()}.tmp.npy")
+    np.save(tmp_path, profile)
+    os.replace(tmp_path, profile_path)
+    
+    info = {
+        'params': noise_profile_params(),
+        'sources': sources,
+        'digest': hashlib.blake2b(profile.tobytes(), digest_size=16).hexdigest()
+    }
+    info_path = NOISE_PROFILE_DIR / f"{key}.json"
+    tmp_path = info_path.with_name(f"{key}.{os.getpid()}.tmp.json")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+    os.replace(tmp_path, info_path)
+
+
+def remove_noise_profile(key: str):
+    """Drop a cached profile, info first so a half-removed one is missing."""
+    for suffix in ('.json', '.npy'):
+        (NOISE_PROFILE_DIR / f"{key}{suffix}").unlink(missing_ok=True)
+
+
+def get_noise_profile(file_path: str, audio: Optional[np.ndarray] = None,
+                      sr: int = TARGET_SAMPLE_RATE) -> Optional[np.ndarray]:
+    """
+    Return the noise profile of a clip's session, estimating it if needed.
+    
+    Args:
+        file_path: Clip path (its name identifies the session)
+        audio: Already loaded clip, used if the session has no profile yet
+        sr: Sample rate of audio
+        
+    Returns:
+        Noise samples, or None when the clip has no session or no profile
+        could be estimated (callers fall back to the clip's first seconds)
+    """
+    key = session_key(file_path)
+    if key is None:
+        return None
+    
+    profile = load_noise_profile(key)
+    if profile is None and audio is not None:
+        profile = estimate_noise_profile([audio], sr)
+        if profile is not None:
+            save_noise_profile(key, profile, {Path(file_path).name: file_hash(file_path)})
+            logger.info(f"   Saved noise profile for session {key}")
+    return profile
+
+
+def build_noise_profiles(audio_files: list, hashes: Optional[dict] = None,
+                         processed: frozenset = frozenset()):
+    """
+    Estimate missing or stale session profiles for a batch before processing it.
+    
+    Profiles are pooled from the first NOISE_PROFILE_CLIPS clips (sorted)
+    of each session, so the result does not depend on which worker
+    happens to reach a session first. A cached profile is stale when it
+    was estimated with other settings, or when one of its source clips
+    is gone or now has other content (e.g. it was recorded again).
+    
+    Args:
+        audio_files: Clips of the batch
+        hashes: file_hash() of clips by path, computed where missing
+        processed: Clips already processed in place. They hold denoised
+                   audio, so they are never used as sources, and their
+                   new content does not make a profile stale.
+    """
+    hashes = dict(hashes or {})
+    
+    def clip_hash(audio_file: Path) -> str:
+        if str(audio_file) not in hashes:
+            hashes[str(audio_file)] = file_hash(str(audio_file))
+        return hashes[str(audio_file)]
+    
+    sessions = {}
+    for audio_file in sorted(Path(f) for f in audio_files):
+        key = session_key(str(audio_file))
+        if key is not None:
+            sessions.setdefault(key, []).append(audio_file)
+    
+    for key, files in sessions.items():
+        present = {f.name: f for f in files}
+        raw = [f for f in files if f not in processed]
+        
+        info = load_noise_profile_info(key)
+        if info is not None:
+            changed = [name for name, source_hash in info['sources'].items()
+                       if name not in present
+                       or (present[name] not in processed
+                           and clip_hash(present[name]) != source_hash)]
+            if not changed:
+                continue
+            logger.info(f"🔉 Noise profile for session {key} is stale "
+                        f"({', '.join(changed)} changed or gone)")
+            remove_noise_profile(key)
+        
+        if not raw:
+            continue
+        sources = raw[:NOISE_PROFILE_CLIPS]
+        clips = [load_audio(str(f))[0] for f in sources]
+        profile = estimate_noise_profile(clips, TARGET_SAMPLE_RATE)
+        if profile is not None:
+            save_noise_profile(key, profile, {f.name: clip_hash(f) for f in sources})
+            logger.info(f"🔉 Noise profile for session {key} from {len(clips)} clips")
+
+
+def noise_profile_digest(file_path: str) -> Optional[str]:
+    """Digest of the cached profile a clip would be denoised with, if any."""
+    key = session_key(file_path)
+    info = load_noise_profile_info(key) if key is not None else None
+    return info['digest'] if info is not None else None
+
+
+def denoise_audio(audio: np.ndarray, sr: int, noise_sample_duration: float = NOISE_SAMPLE_DURATION,
+                  noise_profile: Optional[np.ndarray] = None) -> np.ndarray:
     """
     Remove background noise from audio.
     
-    Uses the first portion of the audio as a noise profile.
+    Uses the session noise profile if given, otherwise the first portion
+    of the audio as a noise profile.
     
     Args:
         audio: Audio data as numpy array
         sr: Sample rate
         noise_sample_duration: Duration in seconds to use as noise profile
+        noise_profile: Pre-computed session noise samples (optional)
         
     Returns:
         Denoised audio data
@@ -171,16 +620,18 @@ def denoise_audio(audio: np.ndarray, sr: int, noise_sample_duration: float = 0.5
         logger.warning("⚠️  noisereduce not available, skipping denoising")
         return audio
     
-    logger.info(f"🔊 Denoising audio (noise sample: {noise_sample_duration}s)")
-    
     # Use first portion as noise profile
     noise_sample_length = int(noise_sample_duration * sr)
     
-    # Make sure we have enough audio
-    if len(audio) < noise_sample_length * 2:
+    if noise_profile is not None:
+        logger.info(f"🔊 Denoising audio (session noise profile: {len(noise_profile)/sr:.2f}s)")
+        noise_clip = noise_profile
+    elif len(audio) < noise_sample_length * 2:
+        logger.info(f"🔊 Denoising audio (noise sample: {noise_sample_duration}s)")
         logger.warning("   Audio too short for reliable denoising, using full audio as reference")
         noise_clip = audio
     else:
+        logger.info(f"🔊 Denoising audio (noise sample: {noise_sample_duration}s)")
         noise_clip = audio[:noise_sample_length]
     
     # Apply noise reduction
@@ -202,7 +653,9 @@ def process_audio(
     output_path: Optional[str] = None,
     do_trim: bool = True,
     do_normalize: bool = True,
-    do_denoise: bool = True
+    do_denoise: bool = True,
+    stream: bool = False,
+    session_profile: bool = True
 ) -> str:
     """
     Process a single audio file through the full pipeline.
@@ -213,10 +666,18 @@ def process_audio(
         do_trim: Whether to trim silence
         do_normalize: Whether to normalize volume
         do_denoise: Whether to remove noise
+        stream: Process block by block with bounded memory (long recordings)
+        session_profile: Denoise with the cached speaker/session noise profile
         
     Returns:
         Path to processed audio file
     """
+    if stream:
+        return process_audio_streaming(
+            input_path, output_path, do_trim, do_normalize, do_denoise,
+            session_profile=session_profile
+        )
+    
     input_path = Path(input_path)
     
     if not input_path.exists():
@@ -241,18 +702,16 @@ def process_audio(
     
     # Process pipeline
     if do_denoise:
-        audio = denoise_audio(audio, sr)
-    
-    if do_trim:
-        audio = trim_silence(audio, sr)
+        profile = get_noise_profile(str(input_path), audio, sr) if session_profile else None
+        audio = denoise_audio(audio, sr, noise_profile=profile)
     
-    if do_normalize:
-        audio = normalize_audio(audio)
+    # Trim + normalize + 16-bit PCM conversion in one fused pass
+    audio = finalize_audio(audio, sr, do_trim, do_normalize)
     
     # Save processed audio
     logger.info(f"💾 Saving to: {output_path}")
     
-    # Convert to 16-bit PCM for WAV
+    # Already 16-bit PCM samples, written without another conversion
     sf.write(
         str(output_path),
         audio,
@@ -267,20 +726,627 @@ def process_audio(
     return str(output_path), duration
 
 
-def process_batch(input_folder: str, output_folder: str):
+def _iter_resampled_blocks(snd: sf.SoundFile, block_frames: int):
+    """
+    Yield the mono, TARGET_SAMPLE_RATE signal of an open file block by block.
+    
+    Each block is resampled with enough real input on both sides for the
+    polyphase filter, and block edges are aligned to the resampling ratio,
+    so the concatenated blocks equal resample_poly() over the whole file.
+    """
+    from scipy.signal import resample_poly
+    
+    g = math.gcd(TARGET_SAMPLE_RATE, snd.samplerate)
+    up, down = TARGET_SAMPLE_RATE // g, snd.samplerate // g
+    
+    # resample_poly's filter spans 10 * max(up, down) upsampled samples per side
+    pad = (math.ceil(10 * max(up, down) / up) // down + 1) * down
+    block_frames = max(block_frames // down, 1) * down
+    
+    buf = np.zeros(0, dtype=np.float32)
+    buf_start = 0  # Input index of buf[0]
+    emitted = 0  # Input samples already turned into output
+    eof = False
+    
+    while not eof:
+        chunk = snd.read(block_frames, dtype='float32', always_2d=True)
+        eof = len(chunk) < block_frames
+        buf = np.concatenate([buf, chunk.mean(axis=1)])
+        buf_end = buf_start + len(buf)
+        
+        if up == down:
+            yield buf
+            buf_start, buf = buf_end, buf[:0]
+            continue
+        
+        # Keep `pad` samples of right context unless the file is over
+        limit = buf_end if eof else emitted + (buf_end - pad - emitted) // down * down
+        if limit <= emitted:
+            continue
+        
+        seg_lo = max(buf_start, emitted - pad)
+        seg_hi = buf_end if eof else limit + pad
+        resampled = resample_poly(buf[seg_lo - buf_start:seg_hi - buf_start], up, down)
+        
+        first = (emitted - seg_lo) * up // down
+        count = math.ceil((limit - emitted) * up / down)
+        yield resampled[first:first + count].astype(np.float32)
+        
+        emitted = limit
+        drop = max(0, emitted - pad - buf_start)
+        buf, buf_start = buf[drop:], buf_start + drop
+
+
+def _iter_with_context(blocks, margin: int, fn, align: int = 1):
+    """
+    Apply fn to each block with `margin` samples of neighbouring audio.
+    
+    fn must return an array of the same length as its input; the context
+    is cut off again so only the block's own samples are yielded.
+    
+    Blocks are re-cut to multiples of `align` samples and the margin is
+    rounded up to one, so every segment passed to fn starts at a multiple
+    of `align` in the stream. With align set to the STFT hop of fn, the
+    frames fn computes are the frames it would compute over the whole
+    signal; only frames near the segment edges differ, and those fall in
+    the context that is cut off.
+    """
+    margin = -(-margin // align) * align
+    buf = np.zeros(0, dtype=np.float32)
+    left = 0  # Samples at the start of buf already yielded (left context)
+    
+    for block in itertools.chain(blocks, [None]):
+        if block is not None:
+            buf = np.concatenate([buf, block])
+            size = (len(buf) - left - margin) // align * align
+        else:
+            size = len(buf) - left  # End of stream: the rest, without right context
+        if size <= 0:
+            continue
+        
+        yield fn(buf[:left + size + margin])[left:left + size]
+        keep = min(margin, left + size)
+        buf, left = buf[left + size - keep:], keep
+
+
+def process_audio_streaming(
+    input_path: str,
+    output_path: Optional[str] = None,
+    do_trim: bool = True,
+    do_normalize: bool = True,
+    do_denoise: bool = True,
+    block_seconds: float = STREAM_BLOCK_SECONDS,
+    session_profile: bool = True
+) -> str:
+    """
+    Process a long recording with memory bounded by the block size.
+    
+    Pass 1 reads, resamples and denoises the file block by block (with a
+    fixed noise profile from its first NOISE_SAMPLE_DURATION seconds) into
+    a temporary float file, collecting per-hop energy and peak. Trim bounds
+    and normalization gain follow from those small arrays. Pass 2 streams
+    the kept region back, applies the gain and writes 16-bit PCM.
+    
+    Args:
+        input_path: Path to input audio file
+        output_path: Path for output file (optional, overwrites input if not provided)
+        do_trim: Whether to trim silence
+        do_normalize: Whether to normalize volume
+        do_denoise: Whether to remove noise
+        block_seconds: Seconds of audio processed per block
+        session_profile: Denoise with the cached session noise profile, if any
+        
+    Returns:
+        Path to processed audio file
+    """
+    input_path = Path(input_path)
+    
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input file not found: {input_path}")
+    
+    output_path = input_path if output_path is None else Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"Processing (streaming): {input_path.name}")
+    logger.info(f"{'='*60}")
+    
+    sr = TARGET_SAMPLE_RATE
+    hop = TRIM_HOP_LENGTH
+    # At least one STFT window of context, so no seam frame is kept
+    margin = max(int(STREAM_CONTEXT_SECONDS * sr), DENOISE_N_FFT)
+    hop_energy, hop_peak = [], []
+    leftover = np.zeros(0, dtype=np.float32)  # Samples not yet filling a hop
+    n_samples = 0
+    
+    fd, tmp_name = tempfile.mkstemp(suffix='.wav', dir=output_path.parent)
+    os.close(fd)
+    out_fd, out_tmp = tempfile.mkstemp(suffix='.wav', dir=output_path.parent)
+    os.close(out_fd)
+    
+    try:
+        # Pass 1: resample + denoise into a float scratch file
+        with sf.SoundFile(str(input_path)) as snd, \
+                sf.SoundFile(tmp_name, 'w', sr, 1, subtype='FLOAT') as scratch:
+            logger.info(f"   Original duration: {snd.frames / snd.samplerate:.2f}s, "
+                        f"Sample rate: {snd.samplerate}Hz")
+            
+            block_frames = int(block_seconds * snd.samplerate)
+            blocks = _iter_resampled_blocks(snd, block_frames)
+            
+            if do_denoise and NOISEREDUCE_AVAILABLE:
+                noise_length = int(NOISE_SAMPLE_DURATION * sr)
+                # Enough blocks for the noise sample, even with tiny blocks
+                first = np.zeros(0, dtype=np.float32)
+                for block in blocks:
+                    first = np.concatenate([first, block])
+                    if len(first) >= noise_length * 2:
+                        break
+                total = snd.frames * sr / snd.samplerate
+                noise_clip = get_noise_profile(str(input_path)) if session_profile else None
+                if noise_clip is not None:
+                    logger.info(f"🔊 Denoising block by block (session noise profile: "
+                                f"{len(noise_clip)/sr:.2f}s)")
+                else:
+                    noise_clip = first if total < noise_length * 2 else first[:noise_length]
+                    logger.info(f"🔊 Denoising block by block (noise sample: {NOISE_SAMPLE_DURATION}s)")
+                
+                def denoise(segment):
+                    return nr.reduce_noise(
+                        y=segment, sr=sr, y_noise=noise_clip,
+                        prop_decrease=0.8, stationary=True,
+                        n_fft=DENOISE_N_FFT, hop_length=DENOISE_HOP_LENGTH
+                    ).astype(np.float32)
+                
+                blocks = _iter_with_context(itertools.chain([first], blocks), margin, denoise,
+                                            align=DENOISE_HOP_LENGTH)
+            elif do_denoise:
+                logger.warning("⚠️  noisereduce not available, skipping denoising")
+            
+            for block in blocks:
+                scratch.write(block)
+                n_samples += len(block)
+                
+                # Per-hop energy/peak for trim bounds and normalization
+                samples = np.concatenate([leftover, block])
+                full = len(samples) // hop * hop
+                hops = samples[:full].reshape(-1, hop)
+                hop_energy.append(np.square(hops, dtype=np.float64).sum(axis=1))
+                hop_peak.append(np.abs(hops).max(axis=1) if full else np.zeros(0))
+                leftover = samples[full:]
+            
+            if len(leftover):
+                hop_energy.append([np.square(leftover, dtype=np.float64).sum()])
+                hop_peak.append([np.abs(leftover).max()])
+        
+        hop_energy = np.concatenate(hop_energy) if hop_energy else np.zeros(0)
+        hop_peak = np.concatenate(hop_peak) if hop_peak else np.zeros(0)
+        
+        start, end = 0, n_samples
+        if do_trim:
+            logger.info(f"🔇 Trimming silence (threshold: {SILENCE_THRESHOLD_DB}dB)")
+            start, end = find_trim_bounds(hop_energy, n_samples, SILENCE_THRESHOLD_DB)
+            logger.info(f"   Trimmed {(n_samples - (end - start)) / sr:.2f}s of silence")
+        
+        gain = 1.0
+        if do_normalize:
+            logger.info(f"📊 Normalizing audio (target peak: {PEAK_NORMALIZE_DB}dB)")
+            current_peak = hop_peak[start // hop:math.ceil(end / hop)].max() if end > start else 0
+            if current_peak == 0:
+                logger.warning("   Audio is silent, skipping normalization")
+            else:
+                gain = 10 ** (PEAK_NORMALIZE_DB / 20) / current_peak
+                logger.info(f"   Peak adjusted from {20 * np.log10(current_peak):.1f}dB "
+                            f"to {PEAK_NORMALIZE_DB}dB")
+        
+        # Pass 2: gain + clip + PCM_16, only over the kept region
+        logger.info(f"💾 Saving to: {output_path}")
+        block_samples = int(block_seconds * sr)
+        with sf.SoundFile(tmp_name) as scratch, \
+                sf.SoundFile(out_tmp, 'w', sr, 1, subtype='PCM_16') as out:
+            scratch.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                block = scratch.read(min(block_samples, remaining), dtype='float32')
+                if not len(block):
+                    break
+                remaining -= len(block)
+                if do_normalize:
+                    block *= gain
+                # Denoised audio can overshoot full scale even without
+                # normalization; PCM_16 would wrap it around
+                np.clip(block, -1.0, 1.0, out=block)
+                out.write(block)
+        
+        os.replace(out_tmp, output_path)
+    finally:
+        for name in (tmp_name, out_tmp):
+            if os.path.exists(name):
+                os.remove(name)
+    
+    duration = (end - start) / sr
+    logger.info(f"✅ Done! Duration: {duration:.2f}s")
+    
+    return str(output_path), duration
+
+
+def load_pending_rows(split_csv: str, start_id: Optional[str] = None) -> list:
+    """
+    Read the pending rows of a split CSV, in file order.
+    
+    Args:
+        split_csv: Path to a final_dataset_part_*.csv file
+        start_id: First ID recorded in the session (optional)
+        
+    Returns:
+        List of row dictionaries with Audio_Status == 'pending'
+    """
+    if dataset_store.ARROW_AVAILABLE:
+        table = dataset_store.read_table(Path(split_csv))
+        rows = dataset_store.filter_rows(table, 'Audio_Status', 'pending').to_pylist()
+    else:
+        with open(split_csv, 'r', encoding='utf-8', newline='') as f:
+            rows = [row for row in csv.DictReader(f) if row['Audio_Status'] == 'pending']
+    
+    if start_id is not None:
+        ids = [row['ID'] for row in rows]
+        if start_id not in ids:
+            raise ValueError(f"{start_id} is not a pending ID in {split_csv}")
+        rows = rows[ids.index(start_id):]
+    
+    return rows
+
+
+def clip_filename(date: str, speaker_id: str, domain: str, sentence_id: str) -> str:
+    """
+    Name a clip [DATE]_[SPEAKER]_[DOMAIN]_[ID].wav.
+    
+    Raises:
+        ValueError: If update_audio_status.py would not parse the name back
+                    into the same date, speaker, domain and ID
+    """
+    try:
+        valid = len(date) == 8 and date.isdigit() and bool(datetime.strptime(date, '%Y%m%d'))
+    except ValueError:
+        valid = False
+    if not valid:
+        raise ValueError(f"Date {date!r} is not a valid YYYYMMDD date")
+    
+    name = f"{date}_{speaker_id}_{domain}_{sentence_id}.wav"
+    match = FILENAME_PATTERN.match(name)
+    if match is None or match.groups() != (date, speaker_id, domain, sentence_id):
+        raise ValueError(f"Speaker {speaker_id!r} gives clip names update_audio_status.py "
+                         f"cannot parse ({name}); use letters, digits and _ (e.g. S01_M)")
+    return name
+
+
+def segment_session(
+    input_path: str,
+    split_csv: str,
+    speaker_id: str,
+    output_folder: Optional[str] = None,
+    date: Optional[str] = None,
+    start_id: Optional[str] = None,
+    allow_mismatch: bool = False,
+    min_pause: float = SEGMENT_MIN_PAUSE
+) -> list:
+    """
+    Cut a recording of a whole split into one clip per pending sentence.
+    
+    Utterances found by find_utterances() are matched in order to the
+    pending IDs of the split and written as
+    clips/[DOMAIN]/[DATE]_[SPEAKER]_[DOMAIN]_[ID].wav, the naming that
+    update_audio_status.py expects.
+    
+    The recording is read block by block, like process_audio_streaming():
+    it is resampled into a temporary float file next to the clips while
+    the frame energies are collected, and each clip is then read back
+    from that file, so memory does not grow with the session length. The
+    input must be a format soundfile reads (WAV, FLAC, OGG, MP3).
+    
+    Args:
+        input_path: Long session recording
+        split_csv: Split CSV that was read aloud
+        speaker_id: Speaker identifier (e.g. S01_M)
+        output_folder: Root folder for clips (default: clips/)
+        date: Recording date as YYYYMMDD (default: today)
+        start_id: First pending ID read in the session (default: first pending)
+        allow_mismatch: Write clips even if utterance and sentence counts differ
+        min_pause: Shortest silence (s) treated as a sentence boundary
+        
+    Returns:
+        List of (sentence_id, clip_path, duration) tuples
+    
+    Raises:
+        ValueError: If speaker_id or date give unparseable clip names, or
+                    the counts differ without allow_mismatch
+    """
+    output_folder = Path(output_folder) if output_folder else CLIPS_DIR
+    date = date or datetime.now().strftime('%Y%m%d')
+    
+    rows = load_pending_rows(split_csv, start_id)
+    if not rows:
+        logger.warning(f"No pending sentences in {split_csv}")
+        return []
+    # Before reading the recording: a bad name fails fast
+    names = [clip_filename(date, speaker_id, row['Domain'], row['ID']) for row in rows]
+    
+    sr = TARGET_SAMPLE_RATE
+    frame = max(1, int(SEGMENT_FRAME_SECONDS * sr))
+    rms = []
+    leftover = np.zeros(0, dtype=np.float32)  # Samples not yet filling a frame
+    n_samples = 0
+    
+    output_folder.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(suffix='.wav', dir=output_folder)
+    os.close(fd)
+    
+    try:
+        logger.info(f"Loading audio: {input_path}")
+        with sf.SoundFile(str(input_path)) as snd, \
+                sf.SoundFile(tmp_name, 'w', sr, 1, subtype='FLOAT') as scratch:
+            logger.info(f"   Original duration: {snd.frames / snd.samplerate:.2f}s, "
+                        f"Sample rate: {snd.samplerate}Hz")
+            block_frames = int(STREAM_BLOCK_SECONDS * snd.samplerate)
+            for block in _iter_resampled_blocks(snd, block_frames):
+                scratch.write(block)
+                n_samples += len(block)
+                
+                samples = np.concatenate([leftover, block])
+                full = len(samples) // frame * frame
+                frames = samples[:full].reshape(-1, frame)
+                rms.append(np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1)))
+                leftover = samples[full:]
+        
+        rms = np.concatenate(rms) if rms else np.zeros(0)
+        
+        logger.info(f"✂️  Segmenting session (min pause: {min_pause}s)")
+        utterances = utterances_from_rms(rms, n_samples, sr, min_pause=min_pause)
+        logger.info(f"   Found {len(utterances)} utterances for {len(rows)} pending sentences")
+        
+        if len(utterances) != len(rows):
+            message = (f"Utterance count ({len(utterances)}) does not match pending "
+                       f"sentences ({len(rows)}); check for skipped or repeated sentences")
+            if not allow_mismatch:
+                raise ValueError(message + " or pass --allow-mismatch")
+            logger.warning(f"⚠️  {message}, mapping the first {min(len(utterances), len(rows))}")
+        
+        clips = []
+        with sf.SoundFile(tmp_name) as scratch:
+            for (start, end), row, name in zip(utterances, rows, names):
+                clip_path = output_folder / row['Domain'] / name
+                clip_path.parent.mkdir(parents=True, exist_ok=True)
+                
+                scratch.seek(start)
+                audio = scratch.read(end - start, dtype='float32')
+                np.clip(audio, -1.0, 1.0, out=audio)
+                sf.write(str(clip_path), audio, sr, subtype='PCM_16')
+                duration = (end - start) / sr
+                logger.info(f"   {row['ID']}: {start / sr:.2f}s → {end / sr:.2f}s ({clip_path.name})")
+                clips.append((row['ID'], str(clip_path), duration))
+    finally:
+        os.remove(tmp_name)
+    
+    logger.info(f"✅ Wrote {len(clips)} clips to {output_folder}")
+    
+    return clips
+
+
+def file_hash(file_path: str) -> str:
+    """Hash a file's content (BLAKE2b, 128-bit hex digest)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pipeline_params(do_trim: bool = True, do_normalize: bool = True, do_denoise: bool = True,
+                    stream: bool = False, session_profile: bool = True) -> dict:
+    """
+    Describe the pipeline settings that determine a processed file.
+    
+    Stored in the processing manifest; a change in any value makes the
+    affected clips eligible for re-processing.
+    """
+    return {
+        'do_trim': do_trim,
+        'do_normalize': do_normalize,
+        'do_denoise': do_denoise and NOISEREDUCE_AVAILABLE,
+        'sample_rate': TARGET_SAMPLE_RATE,
+        'silence_threshold_db': SILENCE_THRESHOLD_DB if do_trim else None,
+        'peak_normalize_db': PEAK_NORMALIZE_DB if do_normalize else None,
+        'noise_sample_duration': NOISE_SAMPLE_DURATION if do_denoise else None,
+        'session_profile': session_profile if do_denoise else None,
+        'stream': stream
+    }
+
+
+def load_manifest(output_folder: Path) -> dict:
+    """Load the processing manifest of an output folder (empty if none)."""
+    manifest_path = output_folder / MANIFEST_NAME
+    if not manifest_path.exists():
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️  Ignoring unreadable manifest {manifest_path}: {e}")
+        return {}
+
+
+def save_manifest(output_folder: Path, manifest: dict):
+    """Write the processing manifest atomically (temp file + rename)."""
+    manifest_path = output_folder / MANIFEST_NAME
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, manifest_path)
+
+
+def check_manifest(entry: Optional[dict], input_path: Path, output_path: Path,
+                   input_hash: str, params: dict) -> Optional[str]:
+    """
+    Decide whether a batch file can be skipped.
+    
+    Args:
+        entry: Manifest entry for output_path (None if never processed)
+        input_path: Source file
+        output_path: Destination file (equal to input_path when in place)
+        input_hash: Current hash of input_path
+        params: Current pipeline_params()
+        
+    Returns:
+        Reason for skipping, or None if the file must be processed
+    """
+    if entry is None:
+        return None
+    
+    if input_path == output_path:
+        # In place: the input *is* the last output. Processing it again
+        # would denoise/normalize twice, whatever the parameters are.
+        if input_hash != entry['output_hash']:
+            return None
+        if entry['params'] != params:
+            logger.warning(
+                f"⚠️  {input_path.name} was already processed in place with other "
+                f"parameters; re-run from the raw recording to apply the new ones"
+            )
+        return 'already processed in place'
+    
+    if entry['input_hash'] != input_hash or entry['params'] != params:
+        return None
+    if not output_path.exists() or file_hash(str(output_path)) != entry['output_hash']:
+        return None
+    return 'input and parameters unchanged'
+
+
+def _process_batch_item(input_path: str, output_path: str, options: dict) -> dict:
+    """
+    Process one file of a batch and return its result record.
+    
+    Runs in a worker process when process_batch() is called with jobs > 1,
+    so any failure is turned into an error record instead of propagating.
+    """
+    try:
+        processed_path, duration = process_audio(input_path, output_path, **options)
+        return {
+            'input': input_path,
+            'output': processed_path,
+            'duration': duration,
+            'status': 'success',
+            'output_hash': file_hash(processed_path)
+        }
+    except Exception as e:
+        logger.error(f"❌ Failed to process {Path(input_path).name}: {e}")
+        return {
+            'input': input_path,
+            'output': None,
+            'duration': None,
+            'status': f'error: {e}'
+        }
+
+
+def _crash_record(input_path: str) -> dict:
+    """Result record for a file whose worker process died."""
+    logger.error(f"❌ Worker crashed while processing {Path(input_path).name}")
+    return {
+        'input': input_path,
+        'output': None,
+        'duration': None,
+        'status': 'error: worker process crashed'
+    }
+
+
+def _run_parallel(tasks: list, jobs: int, on_result=None) -> list:
+    """
+    Run batch tasks in a process pool, returning results in task order.
+    
+    At most jobs * MAX_IN_FLIGHT_PER_JOB files are queued at once. If a
+    worker dies outright (e.g. killed for memory), the files queued in
+    that pool are recorded as errors and a fresh pool picks up the rest.
+    on_result(index, result) is called as each result comes in.
+    """
+    results = [None] * len(tasks)
+    max_in_flight = jobs * MAX_IN_FLIGHT_PER_JOB
+    next_task = 0
+    
+    while next_task < len(tasks):
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            in_flight = {}
+            try:
+                while next_task < len(tasks) or in_flight:
+                    # Top up the queue
+                    while next_task < len(tasks) and len(in_flight) < max_in_flight:
+                        future = executor.submit(_process_batch_item, *tasks[next_task])
+                        in_flight[future] = next_task
+                        next_task += 1
+                    
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = in_flight.pop(future)
+                        try:
+                            results[index] = future.result()
+                        except BrokenProcessPool:
+                            results[index] = _crash_record(tasks[index][0])
+                        if on_result is not None:
+                            on_result(index, results[index])
+            except BrokenProcessPool:
+                pass
+            
+            # A broken pool fails everything still queued in it
+            for index in in_flight.values():
+                results[index] = _crash_record(tasks[index][0])
+                if on_result is not None:
+                    on_result(index, results[index])
+    
+    return results
+
+
+def process_batch(
+    input_folder: str,
+    output_folder: str,
+    jobs: int = 1,
+    do_trim: bool = True,
+    do_normalize: bool = True,
+    do_denoise: bool = True,
+    stream: bool = False,
+    session_profile: bool = True,
+    force: bool = False
+):
     """
     Process all audio files in a folder.
     
+    A manifest (MANIFEST_NAME in the output folder) records the input hash,
+    pipeline parameters (with the digest of the session noise profile
+    used) and output hash of every processed file, so files whose input
+    and parameters are unchanged are skipped on later runs.
+    Entries are saved as results come in, so an interrupted batch keeps
+    what it finished. In place, a file is processed into a temporary file
+    and its entry saved before that file replaces the original: a clip is
+    never overwritten without the manifest knowing it was processed.
+    
     Args:
         input_folder: Folder containing raw audio files
         output_folder: Folder for processed output
+        jobs: Number of worker processes (1 = process sequentially)
+        do_trim: Whether to trim silence
+        do_normalize: Whether to normalize volume
+        do_denoise: Whether to remove noise
+        stream: Use the bounded-memory streaming pipeline for every file
+        session_profile: Denoise with per speaker/session noise profiles
+        force: Process every file, ignoring the manifest
     """
     input_folder = Path(input_folder)
     output_folder = Path(output_folder)
     
     # Find all audio files
     audio_extensions = {'.wav', '.mp3', '.flac', '.ogg', '.m4a'}
-    audio_files = [f for f in input_folder.iterdir() if f.suffix.lower() in audio_extensions]
+    # Hidden files are our own temporaries (see the in-place case below)
+    audio_files = [f for f in input_folder.iterdir()
+                   if f.suffix.lower() in audio_extensions and not f.name.startswith('.')]
     
     if not audio_files:
         logger.warning(f"No audio files found in {input_folder}")
@@ -290,30 +1356,116 @@ def process_batch(input_folder: str, output_folder: str):
     
     output_folder.mkdir(parents=True, exist_ok=True)
     
+    options = {
+        'do_trim': do_trim,
+        'do_normalize': do_normalize,
+        'do_denoise': do_denoise,
+        'stream': stream,
+        'session_profile': session_profile
+    }
+    params = pipeline_params(**options)
+    manifest = load_manifest(output_folder)
+    
     results = []
+    tasks = []
+    task_slots = []  # Position of each task's record in results
+    final_paths = []  # Output of each task once its file is in place
+    input_hashes = {str(f): file_hash(str(f)) for f in sorted(audio_files)}
+    file_params = {}  # params plus the noise profile digest, per input
+    
+    # Session noise profiles are estimated up front, once per session, and
+    # their digest is part of each clip's parameters: a re-estimated
+    # profile makes the clips denoised with the old one stale
+    use_profiles = do_denoise and session_profile and NOISEREDUCE_AVAILABLE
+    if use_profiles:
+        processed = frozenset(
+            f for f in audio_files
+            if output_folder / f"{f.stem}.wav" == f
+            and manifest.get(f.name, {}).get('output_hash') == input_hashes[str(f)]
+        )
+        build_noise_profiles(audio_files, input_hashes, processed)
+    
     for audio_file in sorted(audio_files):
         output_path = output_folder / f"{audio_file.stem}.wav"
-        try:
-            processed_path, duration = process_audio(str(audio_file), str(output_path))
-            results.append({
-                'input': str(audio_file),
-                'output': processed_path,
-                'duration': duration,
-                'status': 'success'
-            })
-        except Exception as e:
-            logger.error(f"❌ Failed to process {audio_file.name}: {e}")
+        input_hash = input_hashes[str(audio_file)]
+        file_params[str(audio_file)] = params
+        if use_profiles:
+            file_params[str(audio_file)] = dict(
+                params, noise_profile=noise_profile_digest(str(audio_file)))
+        
+        reason = None if force else check_manifest(
+            manifest.get(output_path.name), audio_file, output_path, input_hash,
+            file_params[str(audio_file)]
+        )
+        if reason:
+            logger.info(f"⏭️  Skipping {audio_file.name} ({reason})")
             results.append({
                 'input': str(audio_file),
-                'output': None,
-                'duration': None,
-                'status': f'error: {e}'
+                'output': str(output_path),
+                'duration': manifest[output_path.name].get('duration'),
+                'status': 'skipped'
             })
+            continue
+        
+        task_slots.append(len(results))
+        results.append(None)
+        final_paths.append(output_path)
+        if audio_file == output_path:
+            work_path = output_path.with_name(f".{output_path.stem}.processing.wav")
+        else:
+            work_path = output_path
+        tasks.append((str(audio_file), str(work_path), options))
+    
+    unsaved = 0
+    
+    def record(index: int, result: dict):
+        """Add a finished file to the manifest (and put it in place)."""
+        nonlocal unsaved
+        results[task_slots[index]] = result
+        final_path = final_paths[index]
+        in_place = Path(tasks[index][1]) != final_path
+        if result['status'] != 'success':
+            if in_place:
+                Path(tasks[index][1]).unlink(missing_ok=True)
+            return
+        
+        manifest[final_path.name] = {
+            'input': Path(result['input']).name,
+            'input_hash': input_hashes[result['input']],
+            'output_hash': result.pop('output_hash'),
+            'params': file_params[result['input']],
+            'duration': result['duration']
+        }
+        if in_place:
+            # Entry first: a crash before the rename leaves the raw clip,
+            # whose hash does not match, so it is simply processed again
+            save_manifest(output_folder, manifest)
+            unsaved = 0
+            os.replace(result['output'], final_path)
+            result['output'] = str(final_path)
+            return
+        unsaved += 1
+        if unsaved >= MANIFEST_SAVE_EVERY:
+            save_manifest(output_folder, manifest)
+            unsaved = 0
+    
+    try:
+        if jobs > 1 and len(tasks) > 1:
+            logger.info(f"   Using {jobs} worker processes")
+            _run_parallel(tasks, jobs, on_result=record)
+        else:
+            for index, task in enumerate(tasks):
+                record(index, _process_batch_item(*task))
+    finally:
+        # Also when interrupted: keep the entries of finished files
+        if unsaved:
+            save_manifest(output_folder, manifest)
     
     # Summary
     success = sum(1 for r in results if r['status'] == 'success')
+    skipped = sum(1 for r in results if r['status'] == 'skipped')
     logger.info(f"\n{'='*60}")
-    logger.info(f"✅ Batch complete: {success}/{len(results)} files processed")
+    logger.info(f"✅ Batch complete: {success}/{len(results)} files processed, {skipped} unchanged")
     logger.info(f"{'='*60}")
     
     return results
@@ -334,8 +1486,20 @@ Examples:
     # Batch process folder
     python process_audio.py --batch raw_recordings/ --output clips/
     
+    # Batch process on 4 CPU cores
+    python process_audio.py --batch raw_recordings/ --output clips/ --jobs 4
+    
     # Process without denoising
     python process_audio.py recording.wav --no-denoise
+    
+    # Process an hour-long session with bounded memory
+    python process_audio.py session.wav --output session_clean.wav --stream
+    
+    # Re-run a batch from scratch (ignore the processing manifest)
+    python process_audio.py --batch raw_recordings/ --output clips/ --force
+    
+    # Split a recording of a whole part into per-sentence clips
+    python process_audio.py session.wav --segment final_dataset_splits/final_dataset_part_003.csv --speaker S01_M
         """
     )
     
@@ -345,19 +1509,76 @@ Examples:
     parser.add_argument('--no-trim', action='store_true', help='Skip silence trimming')
     parser.add_argument('--no-normalize', action='store_true', help='Skip normalization')
     parser.add_argument('--no-denoise', action='store_true', help='Skip denoising')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes for --batch (0 = all CPU cores)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process block by block with bounded memory (long recordings)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocess every file in --batch, ignoring the manifest')
+    parser.add_argument('--no-session-profile', action='store_true',
+                        help='Denoise each clip from its own first 0.5s instead of the session profile')
+    parser.add_argument('--segment', metavar='SPLIT_CSV',
+                        help='Split the input session into clips for the pending IDs of SPLIT_CSV')
+    parser.add_argument('--speaker', help='Speaker ID for --segment (e.g. S01_M)')
+    parser.add_argument('--date', help='Recording date YYYYMMDD for --segment (default: today)')
+    parser.add_argument('--start-id', help='First pending ID read in the --segment session')
+    parser.add_argument('--min-pause', type=float, default=SEGMENT_MIN_PAUSE,
+                        help='Shortest pause (s) between sentences for --segment')
+    parser.add_argument('--allow-mismatch', action='store_true',
+                        help='Write --segment clips even if counts do not match')
     
     args = parser.parse_args()
     
-    if args.batch:
+    if not NOISEREDUCE_AVAILABLE and not args.no_denoise and not args.segment:
+        print("⚠️  noisereduce not installed. Denoising will be skipped.")
+        print("   Install with: pip install noisereduce")
+    
+    if args.segment:
+        if not args.input or not args.speaker:
+            parser.error('--segment needs an input recording and --speaker')
+        # Check the clip names before the recording is read
+        try:
+            for row in load_pending_rows(args.segment, args.start_id):
+                clip_filename(args.date or datetime.now().strftime('%Y%m%d'),
+                              args.speaker, row['Domain'], row['ID'])
+        except ValueError as e:
+            parser.error(str(e))
+        try:
+            segment_session(
+                args.input,
+                args.segment,
+                args.speaker,
+                output_folder=args.output,
+                date=args.date,
+                start_id=args.start_id,
+                allow_mismatch=args.allow_mismatch,
+                min_pause=args.min_pause
+            )
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+    elif args.batch:
         output_folder = args.output or str(CLIPS_DIR)
-        process_batch(args.batch, output_folder)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        process_batch(
+            args.batch,
+            output_folder,
+            jobs=jobs,
+            do_trim=not args.no_trim,
+            do_normalize=not args.no_normalize,
+            do_denoise=not args.no_denoise,
+            stream=args.stream,
+            session_profile=not args.no_session_profile,
+            force=args.force
+        )
     elif args.input:
         process_audio(
             args.input,
             args.output,
             do_trim=not args.no_trim,
             do_normalize=not args.no_normalize,
-            do_denoise=not args.no_denoise
+            do_denoise=not args.no_denoise,
+            stream=args.stream,
+            session_profile=not args.no_session_profile
         )
     else:
         parser.print_help()
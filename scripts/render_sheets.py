@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Recording Sheet Rendering for Kirundi Dataset
+=============================================
+
+Renders the recording sheets (ID + Kirundi_Transcription of every pending
+sentence) of the splits in final_dataset_splits/ as PDFs:
+
+- toDo/final_dataset_part_NNN.pdf for splits nobody has taken yet.
+- A split whose sheet was moved to inProgress/ and renamed after its
+  speaker (e.g. inProgress/rugwe_001.pdf) is re-rendered there instead.
+
+Only sheets whose pending rows changed are rendered: a hash of the rows
+(and of the sheet layout version) is kept in .cache/sheets.json. Sheets
+are rendered in a process pool (--jobs); each worker registers the fonts
+and builds the paragraph and table styles once and reuses them for every
+page of every sheet it renders. Sheets of splits that no longer have
+pending rows (or no longer exist) are removed, if this script made them.
+
+The first run (no .cache/sheets.json yet) adopts the sheets already in
+toDo/ and inProgress/ as they are: their digests are recorded without
+rendering them, so hand-made sheets are only reissued once their rows
+change. Sheets that do not exist yet are rendered.
+
+After a make_splits.py --resplit, reissuing every changed sheet takes a
+few seconds.
+
+Usage:
+    python render_sheets.py              # Render changed sheets
+    python render_sheets.py --jobs 4     # In 4 worker processes
+    python render_sheets.py --force      # Render every sheet again (also on a first run)
+    python render_sheets.py --dry-run    # List the sheets that would change
+
+Dependencies:
+    pip install reportlab
+    DejaVu Sans for the Kirundi tone marks (bundled with matplotlib, or
+    fonts-dejavu); Helvetica is used if it is not found
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import dataset_stats
+import dataset_writer
+from lazy_import import is_installed
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+TODO_DIR = BASE_DIR / "toDo"
+IN_PROGRESS_DIR = BASE_DIR / "inProgress"
+SHEET_CACHE_PATH = BASE_DIR / ".cache" / "sheets.json"
+SHEET_VERSION = 1  # Bump when the layout changes, so every sheet is rendered again
+
+REPORTLAB_AVAILABLE = is_installed('reportlab')
+
+FONT_NAME = 'DejaVuSans'
+FONT_FILES = ('DejaVuSans.ttf', 'DejaVuSans-Bold.ttf')
+FONT_DIRS = (
+    '/usr/share/fonts/truetype/dejavu',
+    '/usr/share/fonts/dejavu',
+    '/Library/Fonts',
+    'C:/Windows/Fonts',
+)
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Fonts and styles of this process, set up once by _load_template()
+_template = None
+
+
+def find_font_dir():
+    """Folder holding both DejaVu Sans files, None if there is none."""
+    font_dirs = list(FONT_DIRS)
+    if is_installed('matplotlib'):
+        import matplotlib
+        font_dirs.insert(0, os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf'))
+    for font_dir in font_dirs:
+        if all(os.path.exists(os.path.join(font_dir, name)) for name in FONT_FILES):
+            return font_dir
+    return None
+
+
+def _load_template() -> dict:
+    """Register the fonts and build the styles, once per process."""
+    global _template
+    if _template is not None:
+        return _template
+    
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    
+    font_dir = find_font_dir()
+    if font_dir is not None:
+        regular, bold = FONT_NAME, f"{FONT_NAME}-Bold"
+        pdfmetrics.registerFont(TTFont(regular, os.path.join(font_dir, FONT_FILES[0])))
+        pdfmetrics.registerFont(TTFont(bold, os.path.join(font_dir, FONT_FILES[1])))
+    else:
+        regular, bold = 'Helvetica', 'Helvetica-Bold'
+    
+    _template = {
+        'text': ParagraphStyle('sentence', fontName=regular, fontSize=10, leading=12),
+        'table': [
+            ('FONTNAME', (0, 0), (-1, 0), bold),
+            ('FONTNAME', (0, 1), (0, -1), regular),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.whitesmoke, colors.white]),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ],
+        'fallback': font_dir is None,
+    }
+    return _template
+
+
+def sheet_rows(header: list, rows: list) -> list:
+    """(ID, Kirundi_Transcription) of the pending rows of a split."""
+    id_column = header.index('ID')
+    text_column = header.index('Kirundi_Transcription')
+    status_column = header.index('Audio_Status')
+    return [(row[id_column], row[text_column]) for row in rows
+            if row[status_column] == 'pending']
+
+
+def sheet_digest(rows: list) -> str:
+    """Content hash of a sheet: its rows and the layout version."""
+    payload = json.dumps([SHEET_VERSION, rows], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def sheet_path(csv_path: Path) -> Path:
+    """Where the sheet of a split lives: inProgress/<speaker>_NNN.pdf or toDo/."""
+    number = Path(csv_path).stem.rsplit('_', 1)[-1]
+    taken = sorted(IN_PROGRESS_DIR.glob(f"*_{number}.pdf"))
+    return taken[0] if taken else TODO_DIR / f"{Path(csv_path).stem}.pdf"
+
+
+def render_sheet(rows: list, pdf_path: str) -> str:
+    """
+    Render one sheet (runs in a worker process when jobs > 1).
+    
+    Args:
+        rows: (ID, Kirundi_Transcription) pairs
+        pdf_path: Output PDF, replaced atomically
+    
+    Returns:
+        pdf_path
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+    
+    template = _load_template()
+    pdf_path = Path(pdf_path)
+    tmp_path = pdf_path.with_name(f".{pdf_path.name}.{os.getpid()}.tmp")
+    
+    data = [['ID', 'Kirundi_Transcription']]
+    data += [[sentence_id, Paragraph(_escape(text), template['text'])] for sentence_id, text in rows]
+    table = Table(data, colWidths=[5 * cm, 11 * cm], repeatRows=1)
+    table.setStyle(TableStyle(template['table']))
+    
+    doc = SimpleDocTemplate(str(tmp_path), pagesize=A4, title=pdf_path.stem,
+                            leftMargin=2.5 * cm, rightMargin=2.5 * cm,
+                            topMargin=1.5 * cm, bottomMargin=1.5 * cm,
+                            invariant=1)
+    try:
+        doc.build([table])
+        os.replace(tmp_path, pdf_path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return str(pdf_path)
+
+
+def _escape(text: str) -> str:
+    """Paragraph text is markup: escape &, < and >."""
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def load_sheet_cache() -> dict:
+    """{split name: {'pdf': path relative to the repo, 'digest': hash}}"""
+    try:
+        with open(SHEET_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sheet_cache(cache: dict):
+    SHEET_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SHEET_CACHE_PATH.with_name(f".{SHEET_CACHE_PATH.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, SHEET_CACHE_PATH)
+
+
+def render_sheets(jobs: int = 1, force: bool = False, dry_run: bool = False) -> dict:
+    """
+    Render the sheets of every split whose pending rows changed.
+    
+    Args:
+        jobs: Worker processes rendering sheets
+        force: Render every sheet, even unchanged ones
+        dry_run: Only log what would be rendered or removed
+    
+    Returns:
+        Dictionary with sheets, rendered, removed and adopted counts
+    """
+    start = time.time()
+    # No cache yet: take the existing PDFs as they are (see module docstring)
+    adopt = not force and not SHEET_CACHE_PATH.exists()
+    cache = {} if force else load_sheet_cache()
+    
+    sheets = {}
+    for csv_path in dataset_stats.split_files():
+        rows = sheet_rows(*dataset_writer.read_rows(csv_path))
+        if rows:
+            sheets[csv_path.stem] = (rows, sheet_path(csv_path))
+    
+    to_render = []
+    adopted = 0
+    new_cache = {}
+    for name, (rows, pdf_path) in sheets.items():
+        digest = sheet_digest(rows)
+        rel_path = pdf_path.relative_to(BASE_DIR).as_posix()
+        new_cache[name] = {'pdf': rel_path, 'digest': digest}
+        if adopt and pdf_path.exists():
+            adopted += 1
+            continue
+        unchanged = cache.get(name) == new_cache[name] and pdf_path.exists()
+        if not unchanged:
+            to_render.append((name, rows, pdf_path))
+    
+    # Sheets this script made for splits without pending rows now, and
+    # toDo/ copies of sheets that were since moved to inProgress/
+    stale = [BASE_DIR / entry['pdf'] for name, entry in cache.items()
+             if entry['pdf'] != new_cache.get(name, {}).get('pdf')
+             and (BASE_DIR / entry['pdf']).exists()]
+    
+    result = {'sheets': len(sheets), 'rendered': len(to_render), 'removed': len(stale),
+              'adopted': adopted}
+    logger.info(f"📄 {len(sheets)} sheets, {len(to_render)} to render, {len(stale)} to remove")
+    if adopted:
+        logger.info(f"   {adopted} existing sheets adopted as they are, not rendered "
+                    f"(--force renders them again)")
+    if dry_run:
+        for name, rows, pdf_path in to_render:
+            logger.info(f"   {pdf_path.relative_to(BASE_DIR)}: {len(rows)} sentences")
+        for pdf_path in stale:
+            logger.info(f"   {pdf_path.relative_to(BASE_DIR)}: removed")
+        return result
+    
+    if to_render:
+        TODO_DIR.mkdir(parents=True, exist_ok=True)
+        if not REPORTLAB_AVAILABLE:
+            raise RuntimeError("Rendering sheets needs reportlab: pip install reportlab")
+        if _load_template()['fallback']:
+            logger.warning("⚠️  DejaVu Sans not found, using Helvetica (tone marks may be lost)")
+    
+    logger.info(f"🔨 Rendering {len(to_render)} sheets with {jobs} worker(s)")
+    if jobs > 1 and len(to_render) > 1:
+        # Each worker loads the fonts and styles once, on its first sheet
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(render_sheet, rows, str(pdf_path))
+                       for _, rows, pdf_path in to_render]
+            for (name, _, pdf_path), future in zip(to_render, futures):
+                future.result()
+                logger.info(f"   ✅ {pdf_path.relative_to(BASE_DIR)}")
+    else:
+        for name, rows, pdf_path in to_render:
+            render_sheet(rows, str(pdf_path))
+            logger.info(f"   ✅ {pdf_path.relative_to(BASE_DIR)}")
+    
+    for pdf_path in stale:
+        pdf_path.unlink()
+        logger.info(f"   🗑️  Removed {pdf_path.relative_to(BASE_DIR)}")
+    
+    save_sheet_cache(new_cache)
+    logger.info(f"✅ Sheets up to date in {time.time() - start:.1f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Render the recording sheets of the splits as PDFs',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes rendering sheets (0 = all CPU cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='Render every sheet, even unchanged ones')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only list the sheets that would be rendered or removed')
+    args = parser.parse_args()
+    
+    if not REPORTLAB_AVAILABLE and not args.dry_run:
+        parser.error('Rendering sheets needs reportlab: pip install reportlab')
+    
+    render_sheets(
+        jobs=args.jobs if args.jobs > 0 else (os.cpu_count() or 1),
+        force=args.force,
+        dry_run=args.dry_run
+    )
+
+
+if __name__ == "__main__":
+    main()
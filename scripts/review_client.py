@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Review Client for the Kirundi Status Daemon
+===========================================
+
+Thin command-line client for status_daemon.py. It only uses the standard
+library, so each call starts in a few milliseconds; the dataset stays
+loaded in the daemon.
+
+Usage:
+    python review_client.py status krd_000001_jokes krd_000002_jokes
+    python review_client.py validate krd_000001_jokes krd_000002_jokes
+    python review_client.py reject krd_000003_jokes
+    python review_client.py review decisions.txt     # "ID status" per line, - for stdin
+    python review_client.py summary
+    python review_client.py flush                    # Write pending decisions now
+
+    python review_client.py --socket /tmp/kirundi.sock summary
+"""
+
+import sys
+import json
+import socket
+import argparse
+import http.client
+from urllib.parse import urlencode
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+TIMEOUT = 30
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket."""
+    
+    def __init__(self, socket_path: str, timeout: float = TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def request(args, method: str, path: str, payload: dict = None) -> dict:
+    """Send one request to the daemon and return its JSON answer."""
+    if args.socket:
+        conn = UnixHTTPConnection(args.socket)
+    else:
+        conn = http.client.HTTPConnection(args.host, args.port, timeout=TIMEOUT)
+    
+    body = json.dumps(payload).encode('utf-8') if payload is not None else None
+    headers = {'Content-Type': 'application/json', 'Connection': 'close'}
+    try:
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        answer = json.loads(response.read() or b'{}')
+    except (ConnectionRefusedError, FileNotFoundError):
+        where = args.socket or f"{args.host}:{args.port}"
+        sys.exit(f"❌ No status daemon at {where}. Start it with: python status_daemon.py")
+    finally:
+        conn.close()
+    
+    if response.status != 200:
+        sys.exit(f"❌ {response.status}: {answer.get('error', answer)}")
+    return answer
+
+
+def print_review(result: dict):
+    for change in result['changes']:
+        print(f"   {change['id']}: {change['old']} → {change['new']}")
+    if result['invalid']:
+        print(f"❌ {len(result['invalid'])} invalid statuses: "
+              + ', '.join(f"{i}={s}" for i, s in result['invalid']))
+    if result['unknown']:
+        print(f"❌ {len(result['unknown'])} sentence IDs not found: " + ', '.join(result['unknown']))
+    print(f"✅ {result['updated']} decisions applied (written to disk within a second)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Query and review recordings through the status daemon',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--socket', metavar='PATH', help='Daemon Unix socket')
+    parser.add_argument('command', choices=['status', 'validate', 'reject', 'review',
+                                            'summary', 'flush', 'health'])
+    parser.add_argument('args', nargs='*', help='Sentence IDs, or the review file')
+    args = parser.parse_args()
+    
+    if args.command == 'status':
+        result = request(args, 'GET', '/status?' + urlencode([('id', i) for i in args.args]))
+        for sentence_id, row in result['statuses'].items():
+            print(f"{sentence_id}: {row['Audio_Status']:<10} {row['split']}  {row.get('File_Path', '')}")
+        for sentence_id in result['unknown']:
+            print(f"{sentence_id}: ❌ not found")
+    
+    elif args.command in ('validate', 'reject'):
+        status = 'validated' if args.command == 'validate' else 'rejected'
+        print_review(request(args, 'POST', '/review',
+                             {'decisions': [[i, status] for i in args.args]}))
+    
+    elif args.command == 'review':
+        if len(args.args) != 1:
+            parser.error("review takes one file (or - for stdin)")
+        if args.args[0] == '-':
+            text = sys.stdin.read()
+        else:
+            with open(args.args[0], 'r', encoding='utf-8') as f:
+                text = f.read()
+        print_review(request(args, 'POST', '/review', {'text': text}))
+    
+    elif args.command == 'summary':
+        result = request(args, 'GET', '/summary')
+        total = result['total'] or 1
+        for status, count in result['counts'].items():
+            print(f"   {status:<10} {count:>5} ({100 * count / total:.1f}%)")
+        print(f"   Total sentences: {result['total']}")
+    
+    elif args.command == 'flush':
+        print(f"✅ Wrote {request(args, 'POST', '/flush')['written']} decisions")
+    
+    else:
+        print(request(args, 'GET', '/health'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Review/Status Daemon for Kirundi Dataset
+========================================
+
+Resident service that keeps the ID index and every split in memory and
+answers status queries and review decisions over a small local JSON API,
+so review tools don't pay the interpreter, pandas and dataset load cost
+on every action.
+
+- Decisions are applied in memory at once and written to disk in batches
+  every FLUSH_INTERVAL seconds, one locked, journaled write per touched
+  split (see dataset_writer.py). Pending writes are flushed on shutdown.
+- Splits changed on disk by other tools (a sync run, git pull) are
+  re-read before they are queried.
+
+Usage:
+    python status_daemon.py                      # http://127.0.0.1:8765
+    python status_daemon.py --port 9000
+    python status_daemon.py --socket /tmp/kirundi.sock   # Unix socket
+
+Then drive it with review_client.py, or any HTTP client:
+    GET  /health
+    GET  /status?id=krd_000001_jokes&id=...
+    GET  /summary
+    POST /review   {"decisions": [["krd_000001_jokes", "validated"], ...]}
+                   {"text": "krd_000001_jokes validated\\n..."}
+    POST /flush
+
+Dependencies:
+    pip install pandas
+"""
+
+import json
+import time
+import signal
+import asyncio
+import argparse
+import logging
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+import dataset_store
+import update_audio_status as status_tool
+
+# Configuration
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+FLUSH_INTERVAL = 1.0  # Seconds between batched writes
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found',
+                405: 'Method Not Allowed', 413: 'Payload Too Large',
+                500: 'Internal Server Error'}
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class StatusService:
+    """In-memory dataset state shared by all API requests."""
+    
+    def __init__(self):
+        self.frames = status_tool.load_splits()
+        self.id_to_location = status_tool.load_all_csvs(self.frames)
+        # csv_path -> {sentence_id: {column: value}} not yet on disk
+        self.pending = {}
+        self.flush_lock = asyncio.Lock()
+    
+    def refresh(self):
+        """Re-read splits another process changed since they were loaded."""
+        changed = False
+        csv_files = sorted(status_tool.SPLITS_DIR.glob("final_dataset_part_*.csv"))
+        for csv_path in csv_files:
+            # Our own pending changes would be lost; they are merged with
+            # the new file content when flushed instead
+            if csv_path in self.pending:
+                continue
+            frame = self.frames.get(csv_path)
+            if frame is None or frame.attrs.get('source_stamp') != dataset_store.source_stamp(csv_path):
+                logger.info(f"   {csv_path.name} changed on disk, re-reading it")
+                self.frames[csv_path] = status_tool.read_split(csv_path)
+                changed = True
+        # Splits removed by make_splits.py --resplit
+        for csv_path in set(self.frames) - set(csv_files) - set(self.pending):
+            del self.frames[csv_path]
+            changed = True
+        if changed:
+            self.id_to_location = status_tool.load_all_csvs(self.frames)
+    
+    def status(self, sentence_ids: list) -> dict:
+        """Current row of each requested sentence."""
+        self.refresh()
+        statuses = {}
+        unknown = []
+        
+        for sentence_id in sentence_ids:
+            location = self.id_to_location.get(sentence_id)
+            if location is None:
+                unknown.append(sentence_id)
+                continue
+            row = self.frames[location['csv_path']].loc[location['row_index']]
+            statuses[sentence_id] = {'split': location['csv_path'].name, **row.to_dict()}
+        
+        return {'statuses': statuses, 'unknown': unknown}
+    
+    def summary(self) -> dict:
+        """Sentence counts per Audio_Status."""
+        self.refresh()
+        counts = status_tool.count_statuses(self.frames)
+        return {'total': sum(counts.values()), 'counts': counts,
+                'pending_writes': sum(len(c) for c in self.pending.values())}
+    
+    def review(self, decisions: list) -> dict:
+        """Apply decisions in memory and queue them for the next flush."""
+        self.refresh()
+        by_split, unknown, invalid = status_tool.plan_review(decisions, self.id_to_location)
+        changes = []
+        
+        for csv_path, rows in by_split.items():
+            df = self.frames[csv_path]
+            queued = self.pending.setdefault(csv_path, {})
+            for sentence_id, values in rows.items():
+                row_index = self.id_to_location[sentence_id]['row_index']
+                old_status = df.at[row_index, 'Audio_Status']
+                df.at[row_index, 'Audio_Status'] = values['Audio_Status']
+                queued.setdefault(sentence_id, {}).update(values)
+                changes.append({'id': sentence_id, 'old': old_status, 'new': values['Audio_Status']})
+                logger.info(f"   {sentence_id}: {old_status} → {values['Audio_Status']}")
+        
+        return {'updated': len(changes), 'changes': changes,
+                'unknown': unknown, 'invalid': invalid}
+    
+    async def flush(self) -> int:
+        """Write every queued change to disk, one write per split."""
+        async with self.flush_lock:
+            return await self._flush()
+    
+    async def _flush(self) -> int:
+        pending, self.pending = self.pending, {}
+        written = 0
+        try:
+            for csv_path in list(pending):
+                written += await self._flush_split(csv_path, pending)
+        finally:
+            # Splits not reached (an unexpected error) are written next time
+            self._requeue(pending)
+        return written
+    
+    def _requeue(self, pending: dict):
+        """Put unwritten changes back in front of the ones queued since."""
+        for csv_path, changes in pending.items():
+            queued = self.pending.setdefault(csv_path, {})
+            for sentence_id, values in changes.items():
+                queued[sentence_id] = {**values, **queued.get(sentence_id, {})}
+    
+    async def _flush_split(self, csv_path: Path, pending: dict) -> int:
+        """Write the changes of one split; removes them from pending once written."""
+        changes = pending[csv_path]
+        loaded = self.frames[csv_path]
+        try:
+            # The locked write runs in a thread so requests keep flowing
+            _, missing = await asyncio.to_thread(
+                status_tool.write_changes, csv_path, changes, self.frames)
+        except Exception as e:
+            logger.error(f"❌ Could not write {csv_path.name}, will retry: {e}")
+            return 0
+        del pending[csv_path]
+        
+        # write_changes() re-reads the split if another process wrote
+        # it: rows may have moved (even to another split, e.g. after
+        # make_splits.py --resplit), and decisions received during the
+        # write are not in the new frame yet
+        df = self.frames[csv_path]
+        if df is not loaded:
+            self.refresh()
+            self.id_to_location = status_tool.load_all_csvs(self.frames)
+        queued = self.pending.get(csv_path, {})
+        moved = [(sentence_id, changes[sentence_id]['Audio_Status']) for sentence_id in missing
+                 if 'Audio_Status' in changes[sentence_id]]
+        for sentence_id in list(queued):
+            location = self.id_to_location.get(sentence_id)
+            if location is None or location['csv_path'] != csv_path:
+                values = queued.pop(sentence_id)
+                if 'Audio_Status' in values:
+                    moved.append((sentence_id, values['Audio_Status']))
+                continue
+            for col, value in queued[sentence_id].items():
+                df.at[location['row_index'], col] = value
+        if not queued:
+            self.pending.pop(csv_path, None)
+        
+        # Decisions for rows that left this split follow them
+        if moved:
+            result = self.review(moved)
+            if result['unknown']:
+                logger.error(f"❌ {len(result['unknown'])} decisions dropped, IDs no longer "
+                             f"in any split: {', '.join(result['unknown'])}")
+        
+        logger.info(f"✅ Saved {len(changes) - len(missing)} decisions to {csv_path.name}")
+        return len(changes) - len(missing)
+    
+    async def flush_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            if not self.pending:
+                continue
+            # One failed flush must not stop the flusher; unwritten
+            # changes stay queued for the next round
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Flush failed, will retry: {e}")
+
+
+class StatusServer:
+    """Minimal HTTP/1.1 JSON front end for StatusService."""
+    
+    def __init__(self, service: StatusService):
+        self.service = service
+    
+    async def dispatch(self, method: str, target: str, body: bytes) -> tuple:
+        """Route one request; returns (HTTP status, JSON payload)."""
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        
+        if url.path == '/health':
+            return 200, {'ok': True, 'sentences': len(self.service.id_to_location)}
+        
+        if url.path == '/summary' and method == 'GET':
+            return 200, self.service.summary()
+        
+        if url.path.startswith('/status') and method == 'GET':
+            ids = query.get('id', [])
+            if url.path.startswith('/status/'):
+                ids.append(url.path[len('/status/'):])
+            if not ids:
+                return 400, {'error': 'no sentence id given'}
+            return 200, self.service.status(ids)
+        
+        if url.path == '/review' and method == 'POST':
+            try:
+                request = json.loads(body or b'{}')
+                decisions = [(str(i), str(s).lower()) for i, s in request.get('decisions', [])]
+                if request.get('text'):
+                    decisions += status_tool.parse_review_lines(
+                        request['text'].splitlines(), 'request')
+            except (ValueError, TypeError, AttributeError) as e:
+                return 400, {'error': str(e)}
+            return 200, self.service.review(decisions)
+        
+        if url.path == '/flush' and method == 'POST':
+            return 200, {'written': await self.service.flush()}
+        
+        if url.path in ('/summary', '/status', '/review', '/flush'):
+            return 405, {'error': f'{method} not allowed on {url.path}'}
+        return 404, {'error': f'unknown endpoint {url.path}'}
+    
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one (keep-alive) connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get('content-length', 0))
+                start = time.perf_counter()
+                if length > MAX_BODY_BYTES:
+                    code, payload = 413, {'error': 'request body too large'}
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    try:
+                        code, payload = await self.dispatch(method.upper(), target, body)
+                    except Exception as e:
+                        logger.exception(f"Error handling {method} {target}")
+                        code, payload = 500, {'error': str(e)}
+                
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                writer.write(
+                    f"HTTP/1.1 {code} {HTTP_REASONS[code]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode('latin-1') + data)
+                await writer.drain()
+                logger.debug(f"{method} {target} -> {code} "
+                             f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+                
+                if headers.get('connection', '').lower() == 'close' or code == 413:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host: str, port: int, socket_path: str = None,
+                flush_interval: float = FLUSH_INTERVAL):
+    """Load the dataset and serve the API until SIGINT/SIGTERM."""
+    logger.info("📂 Loading dataset...")
+    service = StatusService()
+    logger.info(f"   Found {len(service.id_to_location)} sentences")
+    handler = StatusServer(service).handle_connection
+    
+    if socket_path:
+        server = await asyncio.start_unix_server(handler, path=socket_path)
+        logger.info(f"🎧 Listening on unix:{socket_path}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        logger.info(f"🎧 Listening on http://{host}:{port}")
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, AttributeError):
+            pass  # Windows: Ctrl+C raises KeyboardInterrupt instead
+    
+    flusher = asyncio.create_task(service.flush_periodically(flush_interval))
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        flusher.cancel()
+        if service.pending:
+            logger.info("💾 Writing pending decisions before exit...")
+            await service.flush()
+        logger.info("👋 Stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serve audio status queries and reviews over a local JSON API',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_INTERVAL,
+                        help=f'Seconds between batched writes (default: {FLUSH_INTERVAL})')
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args.host, args.port, args.socket, args.flush_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
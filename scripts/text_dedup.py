@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Sentence Deduplication for Kirundi Dataset
+==========================================
+
+Normalized-text keys and a persistent hash index used by append_to_csv.py
+to stop the same sentence from being imported twice.
+
+Two sentences get the same key when they differ only by:
+- Unicode composition (NFC vs NFD)
+- tone/length marks (wewé == wewe, ā == a)
+- letter case
+- whitespace or punctuation
+
+The index is a sorted array of 64-bit key hashes in .cache/dedup/, loaded
+with a memory map (no parsing) and searched with a binary search. It is
+updated in place after every append and rebuilt automatically if
+metadata.csv was edited by hand.
+
+Near-duplicates (sentences differing by a word or a suffix) are found with
+MinHash signatures over character n-grams and LSH banding: only sentences
+sharing a band bucket are compared, so the cost grows roughly linearly
+with the number of sentences instead of quadratically.
+
+Usage:
+    python text_dedup.py --rebuild              # Rebuild the index from metadata.csv
+    python text_dedup.py --check "Sentence."    # Is this sentence already present?
+    python text_dedup.py --near-duplicates      # Report near-duplicate clusters in the splits
+    python text_dedup.py --near-duplicates --scope metadata --threshold 0.7
+
+Dependencies:
+    pip install numpy
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import time
+import hashlib
+import argparse
+import functools
+import logging
+import unicodedata
+from pathlib import Path
+
+import dataset_store
+from lazy_import import lazy_import
+
+# Imported on first use, see lazy_import.py
+np = lazy_import('numpy')
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+BASE_DIR = SCRIPT_DIR.parent
+METADATA_FILE = BASE_DIR / "metadata.csv"
+SPLITS_DIR = BASE_DIR / "final_dataset_splits"
+DEDUP_DIR = BASE_DIR / ".cache" / "dedup"
+
+TRANSCRIPTION_COLUMN = "kirundi_transcription"  # Matched case-insensitively
+
+# Anything that is not a letter or digit separates words
+NON_WORD = re.compile(r'[\W_]+', re.UNICODE)
+
+# MinHash / LSH settings
+SHINGLE_SIZE = 5            # Characters per n-gram
+NUM_PERMUTATIONS = 128      # Signature length
+LSH_BANDS = 32              # 32 bands x 4 rows: pairs above ~0.6 similarity
+                            # become candidates with high probability
+NEAR_DUPLICATE_THRESHOLD = 0.8
+MAX_BUCKET_PAIRS = 64       # Larger buckets are linked to their first member only
+MINHASH_SEED = 1
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _combining_marks() -> dict:
+    """str.translate table deleting every combining mark of the BMP."""
+    return {cp: None for cp in range(0x10000) if unicodedata.combining(chr(cp))}
+
+
+def normalize_sentence(sentence: str) -> str:
+    """
+    Reduce a sentence to its deduplication form.
+    
+    Example: '"Ni wewé  watōyé?"' -> 'ni wewe watoye'
+    """
+    # Decompose so tone marks become separate combining characters
+    decomposed = unicodedata.normalize('NFD', sentence)
+    folded = decomposed.translate(_combining_marks())
+    folded = unicodedata.normalize('NFC', folded).casefold()
+    return NON_WORD.sub(' ', folded).strip()
+
+
+def sentence_key(sentence: str) -> int:
+    """64-bit hash of the normalized sentence."""
+    digest = hashlib.blake2b(normalize_sentence(sentence).encode('utf-8'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def sentence_keys(sentences) -> np.ndarray:
+    """Hash many sentences into a uint64 array."""
+    return np.fromiter((sentence_key(s) for s in sentences), dtype=np.uint64)
+
+
+def index_paths(csv_path: Path) -> tuple:
+    """(keys .npy, stamp .json) files of the index for csv_path."""
+    stem = Path(csv_path).stem
+    return DEDUP_DIR / f"{stem}.keys.npy", DEDUP_DIR / f"{stem}.stamp.json"
+
+
+def read_transcriptions(csv_path: Path, keep_empty: bool = False) -> list:
+    """
+    Read the Kirundi transcription column of a dataset CSV.
+    
+    Uses the columnar store when available; the header is matched
+    case-insensitively, like append_to_csv.py always did.
+    
+    Args:
+        csv_path: metadata.csv or a split CSV
+        keep_empty: Keep empty cells, so list positions match row indices
+    """
+    if dataset_store.ARROW_AVAILABLE:
+        table = dataset_store.read_table(csv_path)
+        names = table.column_names
+    else:
+        table = dataset_store.read_csv_frame(csv_path)
+        names = list(table.columns)
+    
+    column = next((n for n in names if n.strip().lower() == TRANSCRIPTION_COLUMN), None)
+    if column is None:
+        raise ValueError(f"Could not find '{TRANSCRIPTION_COLUMN}' column in {csv_path}. "
+                         f"Headers found: {names}")
+    
+    values = table.column(column).to_pylist() if dataset_store.ARROW_AVAILABLE else table[column].tolist()
+    return values if keep_empty else [v for v in values if v]
+
+
+def save_index(csv_path: Path, keys: np.ndarray):
+    """Write sorted unique keys and stamp them with the CSV's size + mtime."""
+    DEDUP_DIR.mkdir(parents=True, exist_ok=True)
+    keys_path, stamp_path = index_paths(csv_path)
+    
+    tmp_keys = keys_path.with_name(f".{keys_path.name}.tmp.npy")
+    np.save(tmp_keys, np.unique(keys))
+    os.replace(tmp_keys, keys_path)
+    
+    # The stamp is written last: if we crash in between, the index is
+    # simply considered stale and rebuilt on the next run
+    tmp_stamp = stamp_path.with_name(f".{stamp_path.name}.tmp")
+    with open(tmp_stamp, 'w', encoding='utf-8') as f:
+        json.dump({'source_stamp': dataset_store.source_stamp(csv_path)}, f)
+    os.replace(tmp_stamp, stamp_path)
+
+
+def rebuild_index(csv_path: Path = METADATA_FILE) -> np.ndarray:
+    """Rebuild the index from every transcription in csv_path."""
+    keys = sentence_keys(read_transcriptions(csv_path))
+    save_index(csv_path, keys)
+    logger.info(f"Rebuilt dedup index: {len(np.unique(keys))} unique sentences")
+    return np.load(index_paths(csv_path)[0], mmap_mode='r')
+
+
+def load_index(csv_path: Path = METADATA_FILE) -> np.ndarray:
+    """
+    Load the sorted key array for csv_path (memory-mapped).
+    
+    Rebuilt first if missing or if the CSV changed since it was written.
+    """
+    keys_path, stamp_path = index_paths(csv_path)
+    
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            stamp = json.load(f)['source_stamp']
+        if stamp == dataset_store.source_stamp(csv_path) and keys_path.exists():
+            return np.load(keys_path, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    return rebuild_index(csv_path)
+
+
+def contains(index: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Vectorized membership test of keys in a sorted index."""
+    if len(index) == 0:
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.searchsorted(index, keys)
+    positions[positions == len(index)] = 0
+    return index[positions] == keys
+
+
+def add_to_index(csv_path: Path, index: np.ndarray, new_keys: np.ndarray):
+    """
+    Merge new keys into the index after rows were appended to csv_path.
+    
+    Call this once the CSV is written, so the stamp matches its new state.
+    """
+    save_index(csv_path, np.concatenate([np.asarray(index), new_keys]))
+
+
+def shingle_hashes(sentences: list) -> tuple:
+    """
+    Hash the character n-grams of every normalized sentence.
+    
+    All sentences are processed as one UTF-32 code point array, so there
+    is no per-n-gram Python work.
+    
+    Returns:
+        (hashes, starts): uint64 n-gram hashes of all sentences laid end to
+        end, and the index in hashes where each sentence starts
+    """
+    # Pad so every sentence has at least one full n-gram
+    texts = [f" {normalize_sentence(s)} ".ljust(SHINGLE_SIZE) for s in sentences]
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+    codes = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+    
+    # Polynomial rolling hash of each window (wraps around mod 2**64)
+    n_windows = len(codes) - SHINGLE_SIZE + 1
+    hashes = np.zeros(n_windows, dtype=np.uint64)
+    for offset in range(SHINGLE_SIZE):
+        hashes = hashes * np.uint64(1000003) + codes[offset:offset + n_windows]
+    
+    # Keep only windows that lie entirely inside one sentence
+    ends = np.cumsum(lengths)
+    begins = ends - lengths
+    counts = lengths - SHINGLE_SIZE + 1
+    window_starts = np.repeat(begins, counts) + (
+        np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+    hashes = hashes[window_starts]
+    
+    # Mix the bits so similar n-grams get unrelated hashes
+    hashes ^= hashes >> np.uint64(29)
+    hashes *= np.uint64(0xbf58476d1ce4e5b9)
+    hashes ^= hashes >> np.uint64(32)
+    starts = np.cumsum(counts) - counts
+    return hashes, starts
+
+
+def minhash_signatures(sentences: list) -> np.ndarray:
+    """
+    MinHash signature of every sentence.
+    
+    Returns:
+        uint32 array of shape (len(sentences), NUM_PERMUTATIONS)
+    """
+    if not sentences:
+        return np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32)
+    
+    hashes, starts = shingle_hashes(sentences)
+    
+    # Multiply-shift hashing: (a*x + b) mod 2**64, top 32 bits. The
+    # wraparound does the modulo, so each permutation is three array ops
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(0, 2**63, NUM_PERMUTATIONS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, NUM_PERMUTATIONS, dtype=np.uint64)
+    
+    signatures = np.empty((len(sentences), NUM_PERMUTATIONS), dtype=np.uint32)
+    permuted = np.empty_like(hashes)
+    for i in range(NUM_PERMUTATIONS):
+        np.multiply(hashes, a[i], out=permuted)
+        permuted += b[i]
+        permuted >>= np.uint64(32)
+        signatures[:, i] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def signature_similarity(signatures: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Estimated Jaccard similarity of each (i, j) row pair."""
+    if len(pairs) == 0:
+        return np.zeros(0)
+    return (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """
+    LSH bucket key of every row in every band.
+    
+    Returns:
+        uint64 array of shape (len(signatures), LSH_BANDS)
+    """
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    keys = np.zeros((len(signatures), LSH_BANDS), dtype=np.uint64)
+    for column in range(rows):
+        block = signatures[:, column::rows][:, :LSH_BANDS].astype(np.uint64)
+        keys = (keys ^ block) * np.uint64(0x100000001b3)
+    return keys
+
+
+def candidate_pairs(signatures: np.ndarray) -> np.ndarray:
+    """
+    Pairs of rows that share at least one LSH band bucket.
+    
+    Returns:
+        int64 array of shape (n_pairs, 2) with i < j, without repeats
+    """
+    all_keys = band_keys(signatures)
+    pairs = []
+    
+    for band in range(LSH_BANDS):
+        keys = all_keys[:, band]
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        run_starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        run_lengths = np.diff(np.r_[run_starts, len(keys)])
+        
+        # Most buckets hold a single row: only visit the shared ones
+        for start, length in zip(run_starts[run_lengths > 1].tolist(),
+                                 run_lengths[run_lengths > 1].tolist()):
+            bucket = order[start:start + length]
+            if len(bucket) > MAX_BUCKET_PAIRS:
+                # Linking everyone to one member is enough for clustering
+                pairs.append(np.column_stack([np.full(len(bucket) - 1, bucket[0]), bucket[1:]]))
+            else:
+                i, j = np.triu_indices(len(bucket), k=1)
+                pairs.append(np.column_stack([bucket[i], bucket[j]]))
+    
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def similar_pairs(signatures: np.ndarray, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> tuple:
+    """Candidate pairs whose estimated similarity reaches threshold, with scores."""
+    pairs = candidate_pairs(signatures)
+    scores = signature_similarity(signatures, pairs)
+    keep = scores >= threshold
+    return pairs[keep], scores[keep]
+
+
+def cluster_pairs(n: int, pairs: np.ndarray) -> list:
+    """Group rows linked by pairs into clusters (union-find), largest first."""
+    parent = list(range(n))
+    
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    
+    for i, j in pairs.tolist():
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    
+    groups = {}
+    for i in np.unique(pairs).tolist():
+        groups.setdefault(find(i), []).append(i)
+    return sorted((sorted(g) for g in groups.values()), key=lambda g: (-len(g), g[0]))
+
+
+def find_near_duplicates(sentences: list, threshold: float = NEAR_DUPLICATE_THRESHOLD) -> list:
+    """
+    Cluster near-duplicate sentences.
+    
+    Args:
+        sentences: Sentences to compare
+        threshold: Minimum estimated Jaccard similarity of character n-grams
+    
+    Returns:
+        List of clusters; each cluster is a list of (index, similarity to
+        the cluster's first sentence) tuples
+    """
+    signatures = minhash_signatures(sentences)
+    pairs, _ = similar_pairs(signatures, threshold)
+    
+    clusters = []
+    for members in cluster_pairs(len(sentences), pairs):
+        first = members[0]
+        scores = signature_similarity(
+            signatures, np.array([[first, m] for m in members], dtype=np.int64))
+        clusters.append(list(zip(members, scores.tolist())))
+    return clusters
+
+
+class NearDuplicateIndex:
+    """
+    LSH band tables that grow as sentences are accepted.
+    
+    For gating a long import batch by batch: each new sentence is looked
+    up in the band buckets of the sentences seen so far and compared with
+    those candidates only, then added if it is kept. The work per batch
+    does not depend on how many sentences the index already holds.
+    """
+    
+    def __init__(self, signatures: np.ndarray = None,
+                 threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.signatures = np.zeros((0, NUM_PERMUTATIONS), dtype=np.uint32)
+        self.size = 0
+        # One {bucket key: [row, ...]} table per band
+        self.tables = [{} for _ in range(LSH_BANDS)]
+        if signatures is not None and len(signatures):
+            self._append(signatures, band_keys(signatures))
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _append(self, signatures: np.ndarray, keys: np.ndarray):
+        """Add rows without checking them."""
+        needed = self.size + len(signatures)
+        if needed > len(self.signatures):
+            # Grow geometrically, so adding batch by batch stays linear
+            grown = np.empty((max(needed, 2 * len(self.signatures)), NUM_PERMUTATIONS),
+                             dtype=np.uint32)
+            grown[:self.size] = self.signatures[:self.size]
+            self.signatures = grown
+        self.signatures[self.size:needed] = signatures
+        
+        for band, table in enumerate(self.tables):
+            for row, key in enumerate(keys[:, band].tolist(), self.size):
+                bucket = table.setdefault(key, [])
+                # Like candidate_pairs(): huge buckets only keep their first members
+                if len(bucket) < MAX_BUCKET_PAIRS:
+                    bucket.append(row)
+        self.size = needed
+    
+    def add(self, signatures: np.ndarray) -> np.ndarray:
+        """
+        Check new rows in order and add the ones that are kept.
+        
+        Returns:
+            Boolean array over the rows: True means a near-duplicate of an
+            indexed row or of an earlier kept row, so it was not added
+        """
+        keys = band_keys(signatures)
+        skip = np.zeros(len(signatures), dtype=bool)
+        
+        for j in range(len(signatures)):
+            row_keys = keys[j].tolist()
+            candidates = set()
+            for table, key in zip(self.tables, row_keys):
+                candidates.update(table.get(key, ()))
+            if candidates:
+                matches = self.signatures[list(candidates)] == signatures[j]
+                if (matches.mean(axis=1) >= self.threshold).any():
+                    skip[j] = True
+                    continue
+            self._append(signatures[j:j + 1], keys[j:j + 1])
+        return skip
+
+
+def near_duplicate_mask(existing: list, new: list,
+                        threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                        existing_signatures: np.ndarray = None) -> np.ndarray:
+    """
+    Flag new sentences that nearly duplicate an existing sentence or an
+    earlier new one.
+    
+    Args:
+        existing: Sentences already in the dataset
+        new: Candidate sentences
+        threshold: Minimum estimated similarity
+        existing_signatures: minhash_signatures(existing), instead of existing
+    
+    Returns:
+        Boolean array over new: True means the sentence should be skipped
+    """
+    if existing_signatures is None:
+        existing_signatures = minhash_signatures(list(existing))
+    index = NearDuplicateIndex(existing_signatures, threshold)
+    return index.add(minhash_signatures(list(new)))
+
+
+def load_scope(scope: str) -> list:
+    """(csv_path, row_index, sentence) for every transcription in scope."""
+    if scope == 'metadata':
+        paths = [METADATA_FILE]
+    else:
+        paths = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    
+    rows = []
+    for csv_path in paths:
+        for row_index, sentence in enumerate(read_transcriptions(csv_path, keep_empty=True)):
+            if sentence:
+                rows.append((csv_path, row_index, sentence))
+    return rows
+
+
+def report_near_duplicates(scope: str = 'splits', threshold: float = NEAR_DUPLICATE_THRESHOLD):
+    """Print near-duplicate clusters with their similarity scores."""
+    rows = load_scope(scope)
+    logger.info(f"Comparing {len(rows)} sentences ({scope}) at similarity >= {threshold}")
+    
+    start = time.perf_counter()
+    clusters = find_near_duplicates([sentence for _, _, sentence in rows], threshold)
+    logger.info(f"Found {len(clusters)} clusters in {time.perf_counter() - start:.1f}s")
+    
+    for number, cluster in enumerate(clusters, 1):
+        print(f"\nCluster {number} ({len(cluster)} sentences)")
+        for index, score in cluster:
+            csv_path, row_index, sentence = rows[index]
+            print(f"  {score:4.2f}  {Path(csv_path).name}:{row_index + 2}  {sentence}")
+    
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(f"\n{len(clusters)} clusters, {duplicates} sentences could be dropped")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Manage the sentence dedup index of metadata.csv',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the index')
+    parser.add_argument('--check', metavar='SENTENCE', help='Check whether a sentence exists')
+    parser.add_argument('--near-duplicates', action='store_true',
+                        help='Report clusters of near-duplicate sentences')
+    parser.add_argument('--scope', choices=['splits', 'metadata'], default='splits',
+                        help='Sentences to compare (default: splits)')
+    parser.add_argument('--threshold', type=float, default=NEAR_DUPLICATE_THRESHOLD,
+                        help=f'Minimum similarity (default: {NEAR_DUPLICATE_THRESHOLD})')
+    args = parser.parse_args()
+    
+    if args.rebuild:
+        rebuild_index(METADATA_FILE)
+    elif args.check:
+        index = load_index(METADATA_FILE)
+        found = contains(index, sentence_keys([args.check]))[0]
+        print(f"{'✅ Already in' if found else '❌ Not in'} metadata.csv: "
+              f"{normalize_sentence(args.check)!r}")
+    elif args.near_duplicates:
+        report_near_duplicates(args.scope, args.threshold)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
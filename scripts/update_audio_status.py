@@ -18,6 +18,16 @@ Usage:
     python update_audio_status.py --dry-run          # Preview changes only
     python update_audio_status.py --validate ID123   # Validate specific recording
     python update_audio_status.py --reject ID123     # Reject specific recording
+    python update_audio_status.py --validate ID1 ID2 --reject ID3   # Several at once
+    python update_audio_status.py --review decisions.txt   # "ID status" per line
+    cat decisions.txt | python update_audio_status.py --review -
+    python update_audio_status.py --no-cache         # Re-probe every clip
+    python update_audio_status.py --watch            # Sync clip changes as they happen
+    python update_audio_status.py --summary --by domain   # Also: speaker, split
+
+Probe results (duration, sample rate, channels, content hash) are cached in
+.cache/audio_probe.sqlite, keyed by path + size + mtime, so unchanged clips
+are not decoded again on later runs.
 
 Audio_Status values:
     - pending: Not recorded yet
@@ -25,26 +35,42 @@ Audio_Status values:
     - validated: Peer-review passed
     - rejected: Needs re-recording
 
+WAV and FLAC durations are read from the file header; soundfile/librosa
+are only imported to probe compressed formats such as mp3. The status-only
+commands (--summary, --validate, --reject, --review) read and write the
+splits with the csv module and never import pandas. Summaries come from the
+counters kept by dataset_stats.py, so they do not read the splits at all.
+
 Dependencies:
-    pip install pandas librosa
+    pip install pandas
+    pip install soundfile librosa   # optional, for mp3 clips
 """
 
+from __future__ import annotations
+
 import os
 import re
+import sys
+import time
+import sqlite3
+import struct
+import hashlib
 import argparse
 import logging
 from pathlib import Path
 from datetime import datetime
 
-import pandas as pd
+import dataset_stats
+import dataset_writer
+from lazy_import import lazy_import
 
-# Try to import librosa for duration calculation
-try:
-    import librosa
-    LIBROSA_AVAILABLE = True
-except ImportError:
-    LIBROSA_AVAILABLE = False
-    print("⚠️  librosa not installed. Duration calculation will be skipped.")
+# Only the clip sync needs pandas, see lazy_import.py
+pd = lazy_import('pandas')
+
+# librosa/soundfile are only needed for compressed formats (mp3); WAV and
+# FLAC durations are read straight from the file header. They are imported
+# lazily by _load_decoder() so the status commands never pay for them.
+_DECODERS = {}
 
 # Configuration
 SCRIPT_DIR = Path(__file__).parent
@@ -52,6 +78,19 @@ BASE_DIR = SCRIPT_DIR.parent
 CLIPS_DIR = BASE_DIR / "clips"
 SPLITS_DIR = BASE_DIR / "final_dataset_splits"
 
+# Probe results for clips/, keyed by relative path + size + mtime
+PROBE_CACHE_PATH = BASE_DIR / ".cache" / "audio_probe.sqlite"
+PROBE_CACHE_VERSION = 2  # Bump when the probes table layout changes
+
+# Expected clip format (see process_audio.py), used to report anomalies
+EXPECTED_SAMPLE_RATE = 16000
+EXPECTED_CHANNELS = 1
+EXPECTED_BITS_PER_SAMPLE = 16
+
+# WAV format tags
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
 # Filename pattern: DATE_SPEAKER_DOMAIN_ID.wav
 # Example: 20260131_S01_M_jokes_krd_000001.wav
 FILENAME_PATTERN = re.compile(
@@ -62,6 +101,11 @@ FILENAME_PATTERN = re.compile(
 # Alternative simpler pattern: just look for the ID
 ID_PATTERN = re.compile(r'(krd_\d+_[a-z-]+)', re.IGNORECASE)
 
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.flac'}
+
+# Valid Audio_Status values (see module docstring)
+AUDIO_STATUSES = ('pending', 'recorded', 'validated', 'rejected')
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -70,9 +114,159 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _load_decoder(name: str):
+    """Import soundfile or librosa on first use, None if not installed."""
+    if name not in _DECODERS:
+        try:
+            _DECODERS[name] = __import__(name)
+        except ImportError:
+            _DECODERS[name] = None
+            logger.warning(f"⚠️  {name} not installed. Compressed clips cannot be probed.")
+    return _DECODERS[name]
+
+
+def read_wav_header(file_path: str) -> dict:
+    """
+    Read format and duration from a WAV file's RIFF header.
+    
+    Only the chunk headers are read; the sample data is never touched.
+    
+    Returns:
+        Dictionary with format_tag, sample_rate, channels, bits_per_sample,
+        duration, and data_offset/data_size (byte range of the samples),
+        or None if the file is not a readable WAV
+    """
+    with open(file_path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return None
+        
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+            
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                if len(body) < 16:
+                    return None
+                format_tag, channels, sample_rate, byte_rate, _, bits = \
+                    struct.unpack('<HHIIHH', body[:16])
+                # WAVE_FORMAT_EXTENSIBLE stores the real format in the
+                # first two bytes of the SubFormat GUID
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                fmt = {
+                    'format_tag': format_tag,
+                    'sample_rate': sample_rate,
+                    'channels': channels,
+                    'bits_per_sample': bits,
+                    'byte_rate': byte_rate
+                }
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None or not fmt['byte_rate']:
+                    return None
+                # Recorders that crash or stream may leave a bogus size;
+                # never count more bytes than the file actually holds
+                available = os.fstat(f.fileno()).st_size - f.tell()
+                data_size = min(chunk_size, available)
+                fmt['duration'] = data_size / fmt.pop('byte_rate')
+                fmt['data_offset'] = f.tell()
+                fmt['data_size'] = data_size
+                return fmt
+            else:
+                f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def read_flac_header(file_path: str) -> dict:
+    """
+    Read format and duration from a FLAC file's STREAMINFO block.
+    
+    Returns:
+        Dictionary with format_tag, sample_rate, channels, bits_per_sample
+        and duration, or None if the file is not a readable FLAC
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(42)
+    
+    # 'fLaC' + 4-byte block header + 34-byte STREAMINFO (always first)
+    if len(head) < 42 or head[:4] != b'fLaC' or head[4] & 0x7F != 0:
+        return None
+    
+    # 20 bits sample rate, 3 bits channels-1, 5 bits bps-1, 36 bits samples
+    packed = int.from_bytes(head[18:26], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    
+    if not sample_rate:
+        return None
+    
+    return {
+        'format_tag': None,
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bits_per_sample': bits,
+        # A zero sample count means "unknown" in STREAMINFO
+        'duration': total_samples / sample_rate if total_samples else None
+    }
+
+
+def find_header_anomalies(header: dict) -> list:
+    """
+    Compare a parsed header against the project's clip specification.
+    
+    Returns:
+        List of human-readable anomaly descriptions (empty if compliant)
+    """
+    anomalies = []
+    
+    if header.get('format_tag') not in (None, WAVE_FORMAT_PCM):
+        anomalies.append(f"non-PCM format (tag 0x{header['format_tag']:04X})")
+    if header.get('bits_per_sample') and header['bits_per_sample'] != EXPECTED_BITS_PER_SAMPLE:
+        anomalies.append(f"{header['bits_per_sample']}-bit samples")
+    if header.get('sample_rate') and header['sample_rate'] != EXPECTED_SAMPLE_RATE:
+        anomalies.append(f"sample rate {header['sample_rate']}Hz")
+    if header.get('channels') and header['channels'] != EXPECTED_CHANNELS:
+        anomalies.append(f"{header['channels']} channels")
+    
+    return anomalies
+
+
+def read_audio_header(file_path: str) -> dict:
+    """Parse the header of a WAV or FLAC file, None for other formats."""
+    suffix = Path(file_path).suffix.lower()
+    try:
+        if suffix == '.wav':
+            return read_wav_header(file_path)
+        if suffix == '.flac':
+            return read_flac_header(file_path)
+    except OSError as e:
+        logger.warning(f"Could not read header of {file_path}: {e}")
+    return None
+
+
 def get_audio_duration(file_path: str) -> float:
     """Get duration of audio file in seconds."""
-    if not LIBROSA_AVAILABLE:
+    header = read_audio_header(file_path)
+    if header is not None and header['duration'] is not None:
+        return round(header['duration'], 2)
+    
+    # Compressed (or unusual) file: decode through soundfile, then librosa
+    sf = _load_decoder('soundfile')
+    if sf is not None:
+        try:
+            return round(sf.info(file_path).duration, 2)
+        except Exception:
+            pass  # e.g. mp3 on older libsndfile
+    
+    librosa = _load_decoder('librosa')
+    if librosa is None:
         return None
     
     try:
@@ -83,6 +277,141 @@ def get_audio_duration(file_path: str) -> float:
         return None
 
 
+def get_audio_fingerprint(file_path: str) -> str:
+    """Hash the audio file content (BLAKE2b, 128-bit hex digest)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_audio(file_path: str) -> dict:
+    """
+    Probe an audio file for duration, sample rate and channel count.
+    
+    WAV and FLAC files are probed from their header alone; anything else
+    goes through soundfile/librosa.
+    
+    Returns:
+        Dictionary with duration, sample_rate, channels, fingerprint and
+        anomalies (list of header problems). Values that could not be
+        read are None.
+    """
+    probe = {
+        'duration': None,
+        'sample_rate': None,
+        'channels': None,
+        'fingerprint': get_audio_fingerprint(file_path),
+        'anomalies': []
+    }
+    
+    header = read_audio_header(file_path)
+    if header is not None:
+        probe['sample_rate'] = header['sample_rate']
+        probe['channels'] = header['channels']
+        probe['anomalies'] = find_header_anomalies(header)
+        if header['duration'] is not None:
+            probe['duration'] = round(header['duration'], 2)
+            return probe
+    
+    sf = _load_decoder('soundfile')
+    if sf is not None:
+        try:
+            info = sf.info(file_path)
+            probe['duration'] = round(info.duration, 2)
+            probe['sample_rate'] = info.samplerate
+            probe['channels'] = info.channels
+            return probe
+        except Exception:
+            pass  # e.g. mp3 on older libsndfile, fall back to librosa
+    
+    probe['duration'] = get_audio_duration(file_path)
+    return probe
+
+
+def open_probe_cache(cache_path: Path = PROBE_CACHE_PATH) -> sqlite3.Connection:
+    """Open (and create if needed) the persistent audio probe cache."""
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(cache_path))
+    
+    # Older layouts are simply rebuilt; the cache holds nothing that
+    # cannot be probed again
+    if conn.execute("PRAGMA user_version").fetchone()[0] != PROBE_CACHE_VERSION:
+        conn.execute("DROP TABLE IF EXISTS probes")
+        conn.execute(f"PRAGMA user_version = {PROBE_CACHE_VERSION}")
+    
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS probes (
+            rel_path    TEXT PRIMARY KEY,
+            size        INTEGER NOT NULL,
+            mtime_ns    INTEGER NOT NULL,
+            duration    REAL,
+            sample_rate INTEGER,
+            channels    INTEGER,
+            fingerprint TEXT,
+            anomalies   TEXT NOT NULL,
+            last_seen   REAL NOT NULL
+        )
+    """)
+    return conn
+
+
+def cached_probe(conn: sqlite3.Connection, audio_file: Path, rel_path: str,
+                 scan_time: float) -> dict:
+    """
+    Probe an audio file through the cache.
+    
+    A cached entry is reused only while the file keeps the same size and
+    mtime; otherwise the file is probed again and the entry replaced.
+    
+    Args:
+        conn: Connection from open_probe_cache()
+        audio_file: Absolute path to the audio file
+        rel_path: Path relative to BASE_DIR (the cache key)
+        scan_time: Timestamp of the current scan, stored as last_seen
+        
+    Returns:
+        Probe dictionary as returned by probe_audio()
+    """
+    stat = audio_file.stat()
+    row = conn.execute(
+        "SELECT duration, sample_rate, channels, fingerprint, anomalies FROM probes "
+        "WHERE rel_path = ? AND size = ? AND mtime_ns = ?",
+        (rel_path, stat.st_size, stat.st_mtime_ns)
+    ).fetchone()
+    
+    if row is not None:
+        conn.execute("UPDATE probes SET last_seen = ? WHERE rel_path = ?",
+                     (scan_time, rel_path))
+        probe = dict(zip(('duration', 'sample_rate', 'channels', 'fingerprint'), row))
+        probe['anomalies'] = row[4].split('; ') if row[4] else []
+        return probe
+    
+    probe = probe_audio(str(audio_file))
+    conn.execute(
+        "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (rel_path, stat.st_size, stat.st_mtime_ns, probe['duration'],
+         probe['sample_rate'], probe['channels'], probe['fingerprint'],
+         '; '.join(probe['anomalies']), scan_time)
+    )
+    return probe
+
+
+def prune_probe_cache(conn: sqlite3.Connection, scan_time: float) -> int:
+    """
+    Drop cache entries that were not seen in the scan at scan_time.
+    
+    Entries are touched on every lookup, so anything older than the
+    current scan belongs to a clip that was deleted or renamed.
+    
+    Returns:
+        Number of entries removed
+    """
+    cursor = conn.execute("DELETE FROM probes WHERE last_seen < ?", (scan_time,))
+    return cursor.rowcount
+
+
 def parse_filename(filename: str) -> dict:
     """
     Parse audio filename to extract metadata.
@@ -116,34 +445,183 @@ def parse_filename(filename: str) -> dict:
     return None
 
 
-def load_all_csvs() -> dict:
+def read_split(csv_path: Path) -> pd.DataFrame:
+    """
+    Read a split with every column kept as text.
+    
+    Goes through the memory-mapped columnar store (dataset_store.py),
+    which falls back to parsing the CSV when pyarrow is not installed.
+    Empty cells stay empty strings instead of NaN, so writing the frame
+    back reproduces the untouched rows byte for byte. The frame remembers
+    which version of the file it was read from, see dataset_writer.py.
+    """
+    return dataset_writer.read_frame(csv_path)
+
+
+def write_changes(csv_path: Path, changes: dict, frames: dict = None) -> tuple:
+    """
+    Save cell changes to a split through the crash-safe write layer.
+    
+    The split is locked, the changes journaled, and the file re-read if
+    another process wrote it since it was loaded; the changes are then
+    applied by ID and the split written atomically (dataset_writer.py).
+    
+    Args:
+        csv_path: Split to modify
+        changes: {sentence_id: {column: new_value}}
+        frames: Loaded splits; the entry for csv_path is refreshed
+        
+    Returns:
+        ({sentence_id: {column: old_value}}, IDs no longer in the split)
+    """
+    frame = frames.get(csv_path) if frames is not None else None
+    frame, previous, missing = dataset_writer.apply_changes(csv_path, changes, frame)
+    if frames is not None:
+        frames[csv_path] = frame
+    return previous, missing
+
+
+def load_splits() -> dict:
+    """
+    Load every CSV file from final_dataset_splits/ exactly once.
+    
+    Returns:
+        Dictionary mapping csv_path to its DataFrame
+    """
+    csv_files = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    return {csv_path: read_split(csv_path) for csv_path in csv_files}
+
+
+def read_split_rows() -> dict:
+    """
+    Read every split as (header, rows) with the csv module.
+    
+    The pandas-free counterpart of load_splits(), for the status-only
+    commands.
+    
+    Returns:
+        Dictionary mapping csv_path to (header, rows)
+    """
+    csv_files = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    return {csv_path: dataset_writer.read_rows(csv_path) for csv_path in csv_files}
+
+
+def index_split_rows(split_rows: dict) -> dict:
+    """
+    Build the ID index over splits from read_split_rows().
+    
+    Returns:
+        Dictionary mapping sentence_id to {'csv_path', 'row_index'}.
+        For duplicated IDs the last occurrence wins.
+    """
+    id_to_location = {}
+    for csv_path, (header, rows) in split_rows.items():
+        id_column = header.index('ID')
+        for row_index, row in enumerate(rows):
+            id_to_location[row[id_column]] = {'csv_path': csv_path, 'row_index': row_index}
+    return id_to_location
+
+
+def build_id_index(frames: dict) -> dict:
+    """
+    Build the ID index over all loaded splits.
+    
+    Works on whole columns at once (no per-row Series), and reports IDs
+    that appear more than once across the splits.
+    
+    Args:
+        frames: Loaded splits from load_splits()
+        
+    Returns:
+        Dictionary mapping sentence_id to {'csv_path', 'row_index'}.
+        For duplicated IDs the last occurrence wins.
+    """
+    if not frames:
+        return {}
+    
+    ids = pd.concat([df['ID'] for df in frames.values()], ignore_index=True)
+    paths = [csv_path for csv_path, df in frames.items() for _ in range(len(df))]
+    rows = [row_index for df in frames.values() for row_index in df.index]
+    
+    duplicated = ids.duplicated(keep=False)
+    if duplicated.any():
+        dup_paths = pd.Series(paths)[duplicated].map(lambda p: p.name)
+        for sentence_id, names in dup_paths.groupby(ids[duplicated]):
+            logger.warning(f"⚠️  Duplicate ID {sentence_id} in: {', '.join(names)}")
+    
+    return {
+        sentence_id: {'csv_path': csv_path, 'row_index': row_index}
+        for sentence_id, csv_path, row_index in zip(ids.tolist(), paths, rows)
+    }
+
+
+def load_all_csvs(frames: dict = None) -> dict:
     """
     Load all CSV files from final_dataset_splits/ into a dictionary.
     
+    Args:
+        frames: Already loaded splits from load_splits() (optional)
+        
     Returns:
         Dictionary mapping sentence_id to (csv_path, row_index)
     """
-    id_to_location = {}
+    if frames is None:
+        frames = load_splits()
     
-    csv_files = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    return build_id_index(frames)
+
+
+def is_audio_file(path: Path) -> bool:
+    """True for clip files the sync looks at (by extension)."""
+    return path.suffix.lower() in AUDIO_EXTENSIONS and path.name != '.gitkeep'
+
+
+def describe_clip(audio_file: Path, conn: sqlite3.Connection = None,
+                  scan_time: float = None) -> dict:
+    """
+    Collect the info the CSV update needs about one clip.
     
-    for csv_path in csv_files:
-        df = pd.read_csv(csv_path)
+    Args:
+        audio_file: Absolute path to the clip
+        conn: Probe cache connection (None to always probe the file)
+        scan_time: Timestamp of the current scan, for the probe cache
         
-        for idx, row in df.iterrows():
-            sentence_id = row['ID']
-            id_to_location[sentence_id] = {
-                'csv_path': csv_path,
-                'row_index': idx
-            }
+    Returns:
+        Dictionary with paths, parsed filename and probe results
+    """
+    parsed = parse_filename(audio_file.name)
     
-    return id_to_location
+    # Calculate relative path from BASE_DIR
+    rel_path = audio_file.relative_to(BASE_DIR)
+    
+    if conn is not None:
+        probe = cached_probe(conn, audio_file, str(rel_path), scan_time or time.time())
+    else:
+        probe = probe_audio(str(audio_file))
+    
+    if probe['anomalies']:
+        logger.warning(f"⚠️  {rel_path}: {', '.join(probe['anomalies'])}")
+    
+    return {
+        'full_path': audio_file,
+        'relative_path': str(rel_path),
+        'filename': audio_file.name,
+        'parsed': parsed,
+        'duration': probe['duration'],
+        'sample_rate': probe['sample_rate'],
+        'channels': probe['channels'],
+        'fingerprint': probe['fingerprint'],
+        'anomalies': probe['anomalies']
+    }
 
 
-def scan_clips_folder() -> list:
+def scan_clips_folder(use_cache: bool = True) -> list:
     """
     Scan clips/ folder for audio files.
     
+    Args:
+        use_cache: Reuse probe results for unchanged files from PROBE_CACHE_PATH
+        
     Returns:
         List of dictionaries with file info
     """
@@ -152,35 +630,135 @@ def scan_clips_folder() -> list:
         return []
     
     audio_files = []
-    audio_extensions = {'.wav', '.mp3', '.flac'}
-    
-    # Scan clips/ and subdirectories
-    for audio_file in CLIPS_DIR.rglob('*'):
-        if audio_file.suffix.lower() in audio_extensions and audio_file.is_file():
-            # Skip .gitkeep
-            if audio_file.name == '.gitkeep':
-                continue
-            
-            parsed = parse_filename(audio_file.name)
+    
+    conn = open_probe_cache() if use_cache else None
+    scan_time = time.time()
+    
+    try:
+        # Scan clips/ and subdirectories
+        for audio_file in CLIPS_DIR.rglob('*'):
+            if is_audio_file(audio_file) and audio_file.is_file():
+                audio_files.append(describe_clip(audio_file, conn, scan_time))
+        
+        if conn is not None:
+            removed = prune_probe_cache(conn, scan_time)
+            if removed:
+                logger.info(f"   Pruned {removed} stale entries from probe cache")
+            conn.commit()
+    finally:
+        if conn is not None:
+            conn.close()
+    
+    return audio_files
+
+
+def plan_audio_updates(audio_files: list, id_to_location: dict) -> dict:
+    """
+    Group pending clip updates by the split they belong to.
+    
+    Args:
+        audio_files: List of audio file info from scan_clips_folder()
+        id_to_location: Mapping of IDs to CSV locations
+        
+    Returns:
+        Dictionary mapping csv_path to {row_index: (sentence_id, audio_info)}.
+        When several clips target the same row, the last one wins.
+    """
+    plan = {}
+    
+    for audio_info in audio_files:
+        if audio_info['parsed'] is None:
+            logger.warning(f"Could not parse filename: {audio_info['filename']}")
+            continue
+        
+        sentence_id = audio_info['parsed']['sentence_id']
+        
+        if sentence_id not in id_to_location:
+            logger.warning(f"Sentence ID not found in dataset: {sentence_id}")
+            continue
+        
+        location = id_to_location[sentence_id]
+        rows = plan.setdefault(location['csv_path'], {})
+        rows[location['row_index']] = (sentence_id, audio_info)
+    
+    return plan
+
+
+def apply_audio_updates(plan: dict, frames: dict, dry_run: bool = False) -> int:
+    """
+    Apply grouped clip updates to the loaded splits.
+    
+    Every touched split gets one vectorized assignment per column and is
+    written back exactly once.
+    
+    Args:
+        plan: Output of plan_audio_updates()
+        frames: Loaded splits from load_splits()
+        dry_run: If True, only preview changes
+        
+    Returns:
+        Number of rows updated
+    """
+    updated = 0
+    
+    for csv_path, rows in plan.items():
+        df = frames[csv_path]
+        row_index = list(rows)
+        current_status = df.loc[row_index, 'Audio_Status']
+        
+        # Column -> (rows, values); Duration and Speaker_id are only
+        # overwritten when the clip actually provides them
+        columns = {
+            'File_Path': (row_index, [info['relative_path'] for _, info in rows.values()]),
+            'Audio_Status': (row_index, ['recorded'] * len(row_index)),
+            'Duration': ([], []),
+            'Speaker_id': ([], []),
+        }
+        
+        for idx, (sentence_id, audio_info) in rows.items():
+            if audio_info['duration'] is not None:
+                columns['Duration'][0].append(idx)
+                columns['Duration'][1].append(str(audio_info['duration']))
             
-            # Calculate relative path from BASE_DIR
-            rel_path = audio_file.relative_to(BASE_DIR)
+            if audio_info['parsed']['speaker_id']:
+                columns['Speaker_id'][0].append(idx)
+                columns['Speaker_id'][1].append(audio_info['parsed']['speaker_id'])
             
-            audio_files.append({
-                'full_path': audio_file,
-                'relative_path': str(rel_path),
-                'filename': audio_file.name,
-                'parsed': parsed,
-                'duration': get_audio_duration(str(audio_file))
-            })
+            # Log changes
+            logger.info(f"📝 {sentence_id}:")
+            logger.info(f"   File: {csv_path.name}")
+            logger.info(f"   Status: {current_status[idx]} → recorded")
+            logger.info(f"   Path: {audio_info['relative_path']}")
+            if audio_info['duration']:
+                logger.info(f"   Duration: {audio_info['duration']}s")
+        
+        updated += len(row_index)
+        
+        if dry_run:
+            logger.info(f"   [DRY RUN - {len(row_index)} rows in {csv_path.name} not saved]")
+            continue
+        
+        # Apply updates
+        changes = {sentence_id: {} for sentence_id, _ in rows.values()}
+        for col, (idx, values) in columns.items():
+            for row, value in zip(idx, values):
+                changes[rows[row][0]][col] = value
+        
+        # Save CSV (locked + journaled; re-read first if it changed on disk)
+        previous, missing = write_changes(csv_path, changes, frames)
+        logger.info(f"   ✅ Saved {len(previous)} rows to {csv_path.name}")
+        updated -= len(missing)
     
-    return audio_files
+    return updated
 
 
 def update_csv_with_audio(audio_info: dict, id_to_location: dict, dry_run: bool = False) -> bool:
     """
     Update CSV file with audio information.
     
+    Single-clip convenience wrapper around the batch engine; prefer
+    plan_audio_updates()/apply_audio_updates() when syncing many clips.
+    
     Args:
         audio_info: Dictionary with audio file info
         id_to_location: Mapping of IDs to CSV locations
@@ -189,117 +767,211 @@ def update_csv_with_audio(audio_info: dict, id_to_location: dict, dry_run: bool
     Returns:
         True if update was successful
     """
-    if audio_info['parsed'] is None:
-        logger.warning(f"Could not parse filename: {audio_info['filename']}")
+    plan = plan_audio_updates([audio_info], id_to_location)
+    if not plan:
         return False
     
-    sentence_id = audio_info['parsed']['sentence_id']
+    frames = {csv_path: read_split(csv_path) for csv_path in plan}
+    return apply_audio_updates(plan, frames, dry_run) > 0
+
+
+def update_status(sentence_id: str, new_status: str, id_to_location: dict,
+                  frames: dict = None) -> bool:
+    """
+    Update the Audio_Status for a specific sentence.
     
+    Args:
+        sentence_id: The sentence ID (e.g., krd_000001_jokes)
+        new_status: New status (validated, rejected, pending, recorded)
+        id_to_location: Mapping of IDs to CSV locations
+        frames: Already loaded splits (optional, read from disk otherwise)
+        
+    Returns:
+        True if update was successful
+    """
     if sentence_id not in id_to_location:
-        logger.warning(f"Sentence ID not found in dataset: {sentence_id}")
+        logger.error(f"❌ Sentence ID not found: {sentence_id}")
         return False
     
     location = id_to_location[sentence_id]
     csv_path = location['csv_path']
     
-    # Load CSV
-    df = pd.read_csv(csv_path)
-    
-    # Find the row
-    mask = df['ID'] == sentence_id
-    if not mask.any():
-        logger.warning(f"ID {sentence_id} not found in {csv_path.name}")
+    # Save (the change is applied by ID on the current version of the
+    # split, even if someone else wrote it since it was loaded)
+    previous, missing = write_changes(csv_path, {sentence_id: {'Audio_Status': new_status}}, frames)
+    if missing:
+        logger.error(f"❌ ID index is stale for {csv_path.name}, please re-run")
         return False
     
-    # Get current status
-    current_status = df.loc[mask, 'Audio_Status'].values[0]
-    current_file_path = df.loc[mask, 'File_Path'].values[0]
-    
-    # Prepare updates
-    updates = {
-        'File_Path': audio_info['relative_path'],
-        'Audio_Status': 'recorded'
-    }
-    
-    if audio_info['duration'] is not None:
-        updates['Duration'] = audio_info['duration']
-    
-    if audio_info['parsed']['speaker_id']:
-        updates['Speaker_id'] = audio_info['parsed']['speaker_id']
+    old_status = previous[sentence_id]['Audio_Status']
+    logger.info(f"✅ Updated {sentence_id}: {old_status} → {new_status}")
     
-    # Log changes
-    logger.info(f"📝 {sentence_id}:")
-    logger.info(f"   File: {csv_path.name}")
-    logger.info(f"   Status: {current_status} → recorded")
-    logger.info(f"   Path: {audio_info['relative_path']}")
-    if audio_info['duration']:
-        logger.info(f"   Duration: {audio_info['duration']}s")
+    return True
+
+
+def parse_review_lines(lines, name: str = '<input>') -> list:
+    """
+    Parse review decisions, one "ID status" pair per line.
     
-    if dry_run:
-        logger.info("   [DRY RUN - no changes made]")
-        return True
+    ID and status may be separated by spaces, a tab or a comma; blank lines
+    and lines starting with # are ignored.
     
-    # Apply updates
-    for col, value in updates.items():
-        df.loc[mask, col] = value
+    Returns:
+        List of (sentence_id, status) in input order
+    """
+    decisions = []
     
-    # Save CSV
-    df.to_csv(csv_path, index=False)
-    logger.info(f"   ✅ Saved to {csv_path.name}")
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.replace(',', ' ').split()
+        if len(parts) != 2:
+            raise ValueError(f"{name}:{line_number}: expected 'ID status', got {line!r}")
+        decisions.append((parts[0], parts[1].lower()))
     
-    return True
+    return decisions
+
 
+def read_review_file(path: str) -> list:
+    """Read review decisions from a file (path '-' reads standard input)."""
+    if path == '-':
+        return parse_review_lines(sys.stdin, 'stdin')
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_review_lines(f, path)
 
-def update_status(sentence_id: str, new_status: str, id_to_location: dict) -> bool:
+
+def plan_review(decisions: list, id_to_location: dict) -> tuple:
     """
-    Update the Audio_Status for a specific sentence.
+    Check review decisions and group them per split.
     
     Args:
-        sentence_id: The sentence ID (e.g., krd_000001_jokes)
-        new_status: New status (validated, rejected, pending, recorded)
+        decisions: List of (sentence_id, new_status); statuses may be mixed.
+                   If an ID appears twice, the last decision wins.
         id_to_location: Mapping of IDs to CSV locations
         
     Returns:
-        True if update was successful
+        (by_split, unknown, invalid): {csv_path: {sentence_id: {'Audio_Status':
+        status}}}, IDs not in the dataset, and (ID, status) pairs with an
+        invalid status
     """
-    if sentence_id not in id_to_location:
-        logger.error(f"❌ Sentence ID not found: {sentence_id}")
-        return False
+    final = {}
+    invalid = []
     
-    location = id_to_location[sentence_id]
-    csv_path = location['csv_path']
+    for sentence_id, status in decisions:
+        if status not in AUDIO_STATUSES:
+            invalid.append((sentence_id, status))
+            continue
+        if sentence_id in final and final[sentence_id] != status:
+            logger.warning(f"⚠️  {sentence_id} listed twice, keeping '{status}'")
+        final[sentence_id] = status
     
-    # Load CSV
-    df = pd.read_csv(csv_path)
+    by_split = {}
+    unknown = []
+    for sentence_id, status in final.items():
+        if sentence_id not in id_to_location:
+            unknown.append(sentence_id)
+            continue
+        csv_path = id_to_location[sentence_id]['csv_path']
+        by_split.setdefault(csv_path, {})[sentence_id] = {'Audio_Status': status}
     
-    # Find and update
-    mask = df['ID'] == sentence_id
-    old_status = df.loc[mask, 'Audio_Status'].values[0]
+    return by_split, unknown, invalid
+
+
+def review_batch(decisions: list, id_to_location: dict, frames: dict = None,
+                 dry_run: bool = False) -> dict:
+    """
+    Apply many review decisions with one write per touched split.
     
-    df.loc[mask, 'Audio_Status'] = new_status
+    Args:
+        decisions: List of (sentence_id, new_status); statuses may be mixed.
+                   If an ID appears twice, the last decision wins.
+        id_to_location: Mapping of IDs to CSV locations
+        frames: Already loaded splits (optional). Without them the splits
+                are read and written with the csv module (no pandas).
+        dry_run: If True, only preview changes
+        
+    Returns:
+        {'updated': n, 'unknown': [IDs], 'invalid': [(ID, status)]}
+    """
+    by_split, unknown, invalid = plan_review(decisions, id_to_location)
+    result = {'updated': 0, 'unknown': unknown, 'invalid': invalid}
     
-    # Save
-    df.to_csv(csv_path, index=False)
+    for csv_path, changes in sorted(by_split.items()):
+        if dry_run:
+            if frames is not None:
+                current = frames[csv_path].set_index('ID')['Audio_Status']
+            else:
+                header, rows = dataset_writer.read_rows(csv_path)
+                id_column, status_column = header.index('ID'), header.index('Audio_Status')
+                current = {row[id_column]: row[status_column] for row in rows}
+            for sentence_id, values in changes.items():
+                logger.info(f"   {sentence_id}: {current.get(sentence_id)} → {values['Audio_Status']}")
+            logger.info(f"   [DRY RUN - {len(changes)} rows in {csv_path.name} not saved]")
+            result['updated'] += len(changes)
+            continue
+        
+        if frames is not None:
+            previous, missing = write_changes(csv_path, changes, frames)
+        else:
+            previous, missing = dataset_writer.apply_row_changes(csv_path, changes)
+        for sentence_id, old in previous.items():
+            logger.info(f"   {sentence_id}: {old['Audio_Status']} → {changes[sentence_id]['Audio_Status']}")
+        logger.info(f"✅ Saved {len(previous)} decisions to {csv_path.name}")
+        result['updated'] += len(previous)
+        result['unknown'].extend(missing)
     
-    logger.info(f"✅ Updated {sentence_id}: {old_status} → {new_status}")
+    # Report problems together instead of stopping at the first one
+    if result['invalid']:
+        logger.error(f"❌ {len(result['invalid'])} invalid statuses (expected one of "
+                     f"{', '.join(AUDIO_STATUSES)}): "
+                     + ', '.join(f"{i}={s}" for i, s in result['invalid']))
+    if result['unknown']:
+        logger.error(f"❌ {len(result['unknown'])} sentence IDs not found: "
+                     + ', '.join(result['unknown']))
     
-    return True
+    return result
 
 
-def print_summary(id_to_location: dict):
-    """Print summary of audio status across all files."""
-    
-    status_counts = {'pending': 0, 'recorded': 0, 'validated': 0, 'rejected': 0}
+def count_statuses(frames: dict = None) -> dict:
+    """
+    Number of sentences per Audio_Status across the loaded splits.
     
-    csv_files = sorted(SPLITS_DIR.glob("final_dataset_part_*.csv"))
+    Without frames the counts come from the persisted statistics
+    (dataset_stats.py), which reflect the splits on disk.
+    """
+    status_counts = {status: 0 for status in AUDIO_STATUSES}
     
-    for csv_path in csv_files:
-        df = pd.read_csv(csv_path)
+    if frames is None:
+        statuses = dataset_stats.summarize(dataset_stats.read_stats())['all']['statuses']
+        for status in status_counts:
+            status_counts[status] = statuses.get(status, 0)
+    elif frames:
+        counts = pd.concat(
+            [df['Audio_Status'] for df in frames.values()]
+        ).value_counts()
         for status in status_counts:
-            status_counts[status] += (df['Audio_Status'] == status).sum()
+            status_counts[status] = int(counts.get(status, 0))
     
+    return status_counts
+
+
+def print_summary(by: str = None):
+    """
+    Print summary of audio status across all files.
+    
+    Reads the persisted statistics (dataset_stats.py) instead of the
+    splits; by adds a breakdown per 'domain', 'speaker' or 'split'.
+    """
+    stats = dataset_stats.read_stats()
+    totals = dataset_stats.summarize(stats)['all']
+    status_counts = {status: totals['statuses'].get(status, 0) for status in AUDIO_STATUSES}
     total = sum(status_counts.values())
     
+    if total == 0:
+        print("\nNo sentences found in final_dataset_splits/\n")
+        return
+    
     print(f"\n{'='*50}")
     print("📊 AUDIO STATUS SUMMARY")
     print(f"{'='*50}")
@@ -308,6 +980,16 @@ def print_summary(id_to_location: dict):
     print(f"   🎙️  Recorded:  {status_counts['recorded']:>5} ({100*status_counts['recorded']/total:.1f}%)")
     print(f"   ✅ Validated: {status_counts['validated']:>5} ({100*status_counts['validated']/total:.1f}%)")
     print(f"   ❌ Rejected:  {status_counts['rejected']:>5} ({100*status_counts['rejected']/total:.1f}%)")
+    print(f"   ⏱️  Audio:     {totals['seconds'] / 3600:.2f}h in {totals['clips']} clips")
+    
+    if by:
+        groups = dataset_stats.summarize(stats, by)
+        print(f"\n   {'By ' + by:<28}" + ''.join(f"{status:>10}" for status in AUDIO_STATUSES)
+              + f"{'hours':>8}")
+        for key, bucket in sorted(groups.items()):
+            print(f"   {key:<28}"
+                  + ''.join(f"{bucket['statuses'].get(status, 0):>10}" for status in AUDIO_STATUSES)
+                  + f"{bucket['seconds'] / 3600:>8.2f}")
     print(f"{'='*50}\n")
 
 
@@ -319,40 +1001,65 @@ def main():
     
     parser.add_argument('--dry-run', action='store_true', 
                         help='Preview changes without saving')
-    parser.add_argument('--validate', metavar='ID', 
-                        help='Mark a recording as validated')
-    parser.add_argument('--reject', metavar='ID', 
-                        help='Mark a recording as rejected')
+    parser.add_argument('--validate', metavar='ID', nargs='+', default=[],
+                        help='Mark recordings as validated')
+    parser.add_argument('--reject', metavar='ID', nargs='+', default=[],
+                        help='Mark recordings as rejected')
+    parser.add_argument('--review', metavar='FILE',
+                        help='Apply "ID status" decisions from a file (- for stdin)')
     parser.add_argument('--summary', action='store_true',
                         help='Show status summary only')
+    parser.add_argument('--by', choices=dataset_stats.BREAKDOWNS,
+                        help='With --summary: break the counts down by domain, speaker or split')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Probe every clip again, ignoring the probe cache')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and sync clips as they are added or removed')
+    parser.add_argument('--poll', type=float, metavar='SECONDS',
+                        help='With --watch: poll clips/ instead of using inotify')
     
     args = parser.parse_args()
     
-    # Load CSV mappings
-    logger.info("📂 Loading dataset...")
-    id_to_location = load_all_csvs()
-    logger.info(f"   Found {len(id_to_location)} sentences")
-    
-    # Handle specific actions
-    if args.validate:
-        update_status(args.validate, 'validated', id_to_location)
+    if args.watch:
+        # Imported here: clip_watcher builds on this module
+        import clip_watcher
+        clip_watcher.watch(args.poll)
         return
     
-    if args.reject:
-        update_status(args.reject, 'rejected', id_to_location)
+    # Status-only commands work on the CSV rows directly: no pandas, and
+    # only the touched splits are rewritten
+    if args.validate or args.reject or args.review:
+        decisions = [(sentence_id, 'validated') for sentence_id in args.validate]
+        decisions += [(sentence_id, 'rejected') for sentence_id in args.reject]
+        if args.review:
+            try:
+                decisions += read_review_file(args.review)
+            except (OSError, ValueError) as e:
+                logger.error(f"❌ Could not read review file: {e}")
+                return
+        
+        id_to_location = index_split_rows(read_split_rows())
+        result = review_batch(decisions, id_to_location, dry_run=args.dry_run)
+        logger.info(f"\n✅ Applied {result['updated']}/{len(decisions)} review decisions")
         return
     
     if args.summary:
-        print_summary(id_to_location)
+        print_summary(args.by)
         return
     
+    # Load every split once; the frames are reused by the batch sync
+    logger.info("📂 Loading dataset...")
+    frames = load_splits()
+    id_to_location = load_all_csvs(frames)
+    logger.info(f"   Found {len(id_to_location)} sentences")
+    
     # Scan clips folder
     logger.info(f"\n🔍 Scanning clips folder: {CLIPS_DIR}")
-    audio_files = scan_clips_folder()
+    audio_files = scan_clips_folder(use_cache=not args.no_cache)
     
     if not audio_files:
         logger.info("No new audio files found in clips/")
-        print_summary(id_to_location)
+        print_summary()
         return
     
     logger.info(f"   Found {len(audio_files)} audio files")
@@ -362,16 +1069,14 @@ def main():
     logger.info("UPDATING CSV FILES")
     logger.info(f"{'='*50}\n")
     
-    success_count = 0
-    for audio_info in audio_files:
-        if update_csv_with_audio(audio_info, id_to_location, args.dry_run):
-            success_count += 1
+    plan = plan_audio_updates(audio_files, id_to_location)
+    success_count = apply_audio_updates(plan, frames, args.dry_run)
     
     logger.info(f"\n✅ Updated {success_count}/{len(audio_files)} files")
     
     # Show summary
     if not args.dry_run:
-        print_summary(id_to_location)
+        print_summary()
 
 
 if __name__ == "__main__":